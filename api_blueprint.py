@@ -5,15 +5,18 @@ import json
 import threading
 import hashlib
 import fcntl
-import shutil
-import tempfile
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from dotenv import load_dotenv, set_key
-from scheduler_engine import SchedulerEngine, Task
+from scheduler_engine import SchedulerEngine, Task, ResourceLimiter, resolve_path
+from log_reader import (read_log_lines, read_log_from, current_cursor, watch_log, list_log_executions, read_execution_log,
+                        read_task_events, event_log_path)
+from log_writer import clear_log
+from logger_helper import get_logging_stats
 from dataclasses import asdict
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
 from functools import wraps
+from file_transaction import FileTransaction, sweep_trash
 
 api_bp = Blueprint('api_bp', __name__)
 
@@ -21,12 +24,11 @@ logger = logging.getLogger(__name__)
 ENV_FILE_PATH = '.env'
 
 # 任务锁目录
-LOCKS_DIR = 'locks'
+LOCKS_DIR = resolve_path('locks')
 if not os.path.exists(LOCKS_DIR):
     os.makedirs(LOCKS_DIR, exist_ok=True)
-
-# 任务操作锁
-task_locks = {}
+# 删除任务时锁文件被移入回收区，清理上次退出时未删除完的残留
+sweep_trash(LOCKS_DIR)
 
 # This will be initialized by the main app
 scheduler_engine = None
@@ -44,48 +46,78 @@ def init_scheduler_engine(engine: SchedulerEngine):
         raise ValueError("调度引擎实例不能为空")
     scheduler_engine = engine
     
-def acquire_task_lock(task_id, timeout=10):
-    """获取任务操作锁，防止并发操作同一任务"""
-    lock_file = os.path.join(LOCKS_DIR, f"{task_id}.lock")
-    start_time = time.time()
+# 多进程部署（如多个 gunicorn worker）时启用，任务锁额外通过锁文件（flock）在进程间互斥
+TASK_LOCK_MULTI_PROCESS = os.getenv('TASK_LOCK_MULTI_PROCESS', 'false').lower() in ('1', 'true', 'yes')
+# 等待任务锁的最长时间（秒）
+TASK_LOCK_TIMEOUT = float(os.getenv('TASK_LOCK_TIMEOUT', '10'))
+
+class TaskLockRegistry:
+    """按任务ID管理的操作锁，防止并发请求同时修改同一任务
     
-    # 确保锁目录存在
-    os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+    进程内每个任务对应一个 threading.Lock，等待方阻塞在锁上直到超时，锁释放时立即交接给下一个等待方，
+    不占用轮询时间片；没有请求持有或等待的锁会被回收。
+    多进程模式下获得进程内的锁后，再通过锁文件的 flock 与其他进程互斥。
+    """
     
-    try:
-        # 创建或打开锁文件
-        fd = open(lock_file, 'w+')
-        
+    def __init__(self, locks_dir: str, multi_process: bool = False):
+        self.locks_dir = locks_dir
+        self.multi_process = multi_process
+        self._guard = threading.Lock()
+        self._locks = {}  # task_id -> [threading.Lock, 持有和等待的请求数]
+    
+    def acquire(self, task_id: str, timeout: float = TASK_LOCK_TIMEOUT) -> tuple:
+        """获取任务锁，返回传给 release 的句柄；超时未获得时抛出 TimeoutError"""
+        deadline = time.monotonic() + timeout
+        with self._guard:
+            entry = self._locks.setdefault(task_id, [threading.Lock(), 0])
+            entry[1] += 1
+        fd = None
+        try:
+            if not entry[0].acquire(timeout=max(timeout, 0)):
+                raise TimeoutError(f"获取任务 {task_id} 的锁超时")
+            if self.multi_process:
+                try:
+                    fd = self._acquire_file_lock(task_id, deadline)
+                except BaseException:
+                    entry[0].release()
+                    raise
+        except BaseException:
+            self._unref(task_id, entry)
+            raise
+        return task_id, entry, fd
+    
+    def release(self, handle: tuple):
+        task_id, entry, fd = handle
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            fd.close()
+        entry[0].release()
+        self._unref(task_id, entry)
+    
+    def _unref(self, task_id: str, entry: list):
+        with self._guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[task_id]
+    
+    def _acquire_file_lock(self, task_id: str, deadline: float):
+        """进程间的任务锁。flock 不支持超时，按指数退避重试；同一进程内只有持有进程内锁的请求在此等待"""
+        os.makedirs(self.locks_dir, exist_ok=True)
+        fd = open(os.path.join(self.locks_dir, f"{task_id}.lock"), 'w+')
+        delay = 0.001
         while True:
             try:
-                # 尝试获取文件锁
                 fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
-                # 成功获取锁
-                task_locks[task_id] = fd
                 return fd
-            except IOError:
-                # 锁被其他进程持有
-                if time.time() - start_time > timeout:
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     fd.close()
                     raise TimeoutError(f"获取任务 {task_id} 的锁超时")
-                # 等待一段时间后重试
-                time.sleep(0.1)
-    except Exception as e:
-        logger.error(f"获取任务 {task_id} 的锁失败: {e}")
-        raise
-        
-def release_task_lock(task_id):
-    """释放任务操作锁"""
-    if task_id in task_locks:
-        try:
-            fd = task_locks[task_id]
-            fcntl.flock(fd, fcntl.LOCK_UN)
-            fd.close()
-            del task_locks[task_id]
-            return True
-        except Exception as e:
-            logger.error(f"释放任务 {task_id} 的锁失败: {e}")
-    return False
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.05)
+
+task_locks = TaskLockRegistry(LOCKS_DIR, TASK_LOCK_MULTI_PROCESS)
 
 def with_task_lock(func):
     """任务锁装饰器，确保同一时间只有一个请求可以操作指定任务"""
@@ -104,172 +136,57 @@ def with_task_lock(func):
         if not task_id:
             return func(*args, **kwargs)
 
-        lock_acquired = False
         try:
-            # 尝试获取锁
-            acquire_task_lock(task_id)
-            lock_acquired = True
-            return func(*args, **kwargs)
+            handle = task_locks.acquire(task_id)
         except TimeoutError:
             logger.warning(f"API接口: 任务 {task_id} 正在被其他请求处理，请稍后重试")
             return jsonify({"success": False, "message": "任务正在被其他请求处理，请稍后重试"}), 423
+        try:
+            return func(*args, **kwargs)
         finally:
-            if lock_acquired:
-                release_task_lock(task_id)
+            task_locks.release(handle)
     return wrapper
 
-class TransactionManager:
-    """事务管理器，用于确保文件操作的原子性"""
+class TransactionManager(FileTransaction):
+    """任务文件操作的事务管理器：只记录实际改动的文件，发生异常时回滚，见 FileTransaction
+
+    同一任务的并发请求由任务锁（with_task_lock）串行化，事务期间不持有调度引擎的全局配置锁，
+    只在引擎切换任务状态时短暂持有。事务期间文件监控触发的重载会跳过该任务，
+    事务结束后按提交或回滚后的配置重新核对。
+    """
     
     def __init__(self, task_id):
+        super().__init__()
         self.task_id = task_id
-        self.task_dir = os.path.join("tasks", task_id)
-        self.backup_dir = None
-        self.operations = []
-        self.success = False
-        
+        self.task_dir = os.path.join(resolve_path("tasks"), task_id)
+        self.engine = validate_scheduler_engine()
+    
     def __enter__(self):
-        """开始事务"""
-        # 创建临时备份目录
-        if os.path.exists(self.task_dir):
-            self.backup_dir = tempfile.mkdtemp(prefix=f"task_{self.task_id}_backup_")
-            # 复制任务目录内容到备份目录
-            if os.path.exists(self.task_dir):
-                for item in os.listdir(self.task_dir):
-                    src = os.path.join(self.task_dir, item)
-                    dst = os.path.join(self.backup_dir, item)
-                    if os.path.isdir(src):
-                        shutil.copytree(src, dst)
-                    else:
-                        shutil.copy2(src, dst)
-        return self
-        
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """结束事务，如果有异常则回滚"""
-        if exc_type is not None:
-            # 发生异常，回滚操作
-            self.rollback()
-            return False
-        
-        # 标记事务成功
-        self.success = True
-        
-        # 清理备份
-        if self.backup_dir and os.path.exists(self.backup_dir):
-            shutil.rmtree(self.backup_dir)
-        
-        return True
+        self.engine.begin_config_change(self.task_id)
+        return super().__enter__()
     
-    def rollback(self):
-        """回滚所有操作"""
-        if not self.backup_dir or not os.path.exists(self.backup_dir):
-            logger.warning(f"API接口: 无法回滚任务 {self.task_id} 的操作，备份目录不存在")
-            return False
-            
+    def __exit__(self, exc_type, exc_val, exc_tb):
         try:
-            # 删除当前任务目录
-            if os.path.exists(self.task_dir):
-                shutil.rmtree(self.task_dir)
-                
-            # 从备份恢复
-            shutil.copytree(self.backup_dir, self.task_dir)
-            
-            # 清理备份
-            shutil.rmtree(self.backup_dir)
-            
-            logger.info(f"API接口: 成功回滚任务 {self.task_id} 的操作")
-            return True
-        except Exception as e:
-            logger.error(f"API接口: 回滚任务 {self.task_id} 的操作失败: {e}")
-            return False
+            return super().__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            self.engine.end_config_change(self.task_id)
     
-    def add_operation(self, operation):
-        """记录操作"""
-        self.operations.append(operation)
+    def rollback(self):
+        super().rollback()
+        logger.info(f"API接口: 已回滚任务 {self.task_id} 的文件操作")
 
 # 日志文件管理
 class LogManager:
-    """日志文件管理器，处理日志轮转和大小限制"""
-    
-    MAX_LOG_SIZE = 10 * 1024 * 1024  # 默认最大日志大小为10MB
-    MAX_LOG_FILES = 5  # 默认最多保留5个历史日志文件
-    
-    @staticmethod
-    def check_and_rotate_log(log_file, max_size=None, max_files=None):
-        """检查日志文件大小，如果超过限制则进行轮转"""
-        if not os.path.exists(log_file):
-            return
-            
-        if max_size is None:
-            max_size = LogManager.MAX_LOG_SIZE
-            
-        if max_files is None:
-            max_files = LogManager.MAX_LOG_FILES
-            
-        # 检查文件大小
-        file_size = os.path.getsize(log_file)
-        if file_size <= max_size:
-            return
-            
-        # 需要轮转日志
-        logger.info(f"日志文件 {log_file} 大小 ({file_size} 字节) 超过限制 ({max_size} 字节)，开始轮转")
-        
-        # 删除最老的日志文件（如果存在）
-        oldest_log = f"{log_file}.{max_files}"
-        if os.path.exists(oldest_log):
-            try:
-                os.remove(oldest_log)
-                logger.debug(f"已删除最老的日志文件: {oldest_log}")
-            except Exception as e:
-                logger.error(f"删除日志文件 {oldest_log} 失败: {e}")
-        
-        # 轮转现有的日志文件
-        for i in range(max_files - 1, 0, -1):
-            old_log = f"{log_file}.{i}"
-            new_log = f"{log_file}.{i + 1}"
-            if os.path.exists(old_log):
-                try:
-                    shutil.move(old_log, new_log)
-                    logger.debug(f"轮转日志文件: {old_log} -> {new_log}")
-                except Exception as e:
-                    logger.error(f"轮转日志文件 {old_log} 失败: {e}")
-        
-        # 轮转当前日志文件
-        try:
-            shutil.copy2(log_file, f"{log_file}.1")
-            with open(log_file, 'w') as f:
-                f.truncate(0)
-            logger.info(f"成功轮转日志文件 {log_file}")
-        except Exception as e:
-            logger.error(f"轮转当前日志文件 {log_file} 失败: {e}")
+    """日志文件读取。日志轮转由写入端（log_writer.RotatingLogWriter）完成，读取不修改任何文件"""
     
     @staticmethod
     def get_log_content(log_file, limit=100, offset=0):
-        """获取日志内容，支持分页"""
-        if not os.path.exists(log_file):
-            return []
-            
+        """获取日志内容，支持分页，返回格式见 log_reader.read_log_lines"""
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            # 计算总行数
-            total_lines = len(lines)
-            
-            # 如果offset为负数，表示从末尾开始计算
-            if offset < 0:
-                offset = max(0, total_lines + offset)
-            
-            # 确保offset在有效范围内
-            offset = min(offset, total_lines)
-            
-            # 获取指定范围的行
-            selected_lines = lines[offset:offset + limit]
-            
-            return [{"line": offset + i + 1, "content": line.strip()} for i, line in enumerate(selected_lines)]
+            return read_log_lines(log_file, limit, offset)
         except Exception as e:
             logger.error(f"读取日志文件 {log_file} 失败: {e}")
-            return []
+            return {"lines": [], "total_lines": 0, "partial": False, "next_cursor": None}
 
 # --- System Config API ---
 
@@ -326,11 +243,11 @@ def update_config():
 @api_bp.route('/api/scheduler/tasks', methods=['GET'])
 def get_all_tasks():
     """获取所有任务列表"""
-    logger.info("接收到请求: GET /api/scheduler/tasks")
+    logger.debug("接收到请求: GET /api/scheduler/tasks")
     try:
         engine = validate_scheduler_engine()
         tasks = engine.get_tasks()
-        logger.info(f"成功获取任务列表，共 {len(tasks)} 个任务")
+        logger.debug(f"成功获取任务列表，共 {len(tasks)} 个任务")
         return jsonify({"success": True, "data": tasks, "total": len(tasks)})
     except Exception as e:
         logger.error(f"API接口: 获取所有任务列表失败: {e}")
@@ -376,12 +293,17 @@ def create_task():
             logger.warning(f"API接口: 创建任务失败，因为任务 {task_id} 已存在")
             return jsonify({"success": False, "message": f"任务ID '{task_id}' 已存在，请使用其他ID"}), 400
             
+        limits_error = ResourceLimiter.validate_limits(data.get('task_limits'))
+        if limits_error:
+            logger.warning(f"API接口: 创建任务失败，无效的资源限制: {data.get('task_limits')}")
+            return jsonify({"success": False, "message": limits_error}), 400
+            
         script_type = data.get('script_type', 'python')  # 默认为python
         
         # 使用事务管理器确保操作的原子性
         with TransactionManager(task_id) as transaction:
             # 确定任务目录路径
-            task_dir = os.path.join("tasks", task_id)
+            task_dir = os.path.join(resolve_path("tasks"), task_id)
             
             # 确定脚本文件名和执行命令
             if script_type == "python":
@@ -403,14 +325,14 @@ def create_task():
             
             # 创建任务目录
             if not os.path.exists(task_dir):
-                os.makedirs(task_dir, exist_ok=True)
+                transaction.make_dirs(task_dir)
                 logger.info(f"API接口: 成功创建任务目录 {task_dir}")
             
             # 确定模板文件路径
             if script_type == "python":
-                template_path = "templates/task/python_template.py"
+                template_path = resolve_path("templates/task/python_template.py")
             else:
-                template_path = "templates/task/shell_template.sh"
+                template_path = resolve_path("templates/task/shell_template.sh")
             
             # 目标脚本文件路径
             script_path = os.path.join(task_dir, script_name)
@@ -421,12 +343,8 @@ def create_task():
                     with open(template_path, 'r', encoding='utf-8') as src_file:
                         template_content = src_file.read()
                         
-                    with open(script_path, 'w', encoding='utf-8') as dest_file:
-                        dest_file.write(template_content)
-                        
                     # 如果是shell脚本，设置执行权限
-                    if script_type == "shell":
-                        os.chmod(script_path, 0o755)
+                    transaction.write_file(script_path, template_content, mode=0o755 if script_type == "shell" else None)
                         
                     logger.info(f"API接口: 成功创建任务脚本文件 {script_path}")
                 else:
@@ -434,15 +352,11 @@ def create_task():
                     return jsonify({"success": False, "message": f"模板文件 {template_path} 不存在"}), 404
             
             # 创建或更新config.json文件
-            config_path = os.path.join(task_dir, "config.json")
-            with open(config_path, 'w', encoding='utf-8') as config_file:
-                json.dump(asdict(task), config_file, indent=2, ensure_ascii=False)
+            config_path = engine.task_loader.config_path(task_id)
+            engine.task_loader.write_config(task, transaction)
                 
             logger.info(f"API接口: 成功创建任务配置文件 {config_path}")
             
-            # 标记API操作，避免文件监控误触发
-            engine._mark_api_operation()
-            
             # 添加任务到调度引擎
             if engine.add_task(task):
                 logger.info(f"任务创建成功: {task.task_id}")
@@ -531,7 +445,7 @@ def update_task(task_id):
                         setattr(existing_task, key, value)
 
             # 验证执行文件是否存在（在任务目录内）
-            task_dir = os.path.join("tasks", task_id)
+            task_dir = os.path.join(resolve_path("tasks"), task_id)
             exec_path = existing_task.task_exec
             
             # 提取执行文件路径
@@ -563,15 +477,24 @@ def update_task(task_id):
             if existing_task.task_retry_interval <= 0:
                 logger.warning(f"API接口: 无效的重试间隔: {existing_task.task_retry_interval}")
                 return jsonify({"success": False, "message": "重试间隔必须大于0"}), 400
-            
-            # 标记API操作，避免文件监控误触发
-            engine._mark_api_operation()
-            
+
+            if existing_task.task_retry_backoff < 1:
+                logger.warning(f"API接口: 无效的重试退避倍数: {existing_task.task_retry_backoff}")
+                return jsonify({"success": False, "message": "重试退避倍数不能小于1"}), 400
+
+            if not 0 <= existing_task.task_retry_jitter <= 1:
+                logger.warning(f"API接口: 无效的重试抖动比例: {existing_task.task_retry_jitter}")
+                return jsonify({"success": False, "message": "重试抖动比例必须在0到1之间"}), 400
+
+            limits_error = ResourceLimiter.validate_limits(existing_task.task_limits)
+            if limits_error:
+                logger.warning(f"API接口: 无效的资源限制: {existing_task.task_limits}")
+                return jsonify({"success": False, "message": limits_error}), 400
+
             # 更新配置文件
-            config_path = os.path.join(task_dir, "config.json")
+            config_path = engine.task_loader.config_path(task_id)
             try:
-                with open(config_path, 'w', encoding='utf-8') as config_file:
-                    json.dump(asdict(existing_task), config_file, indent=2, ensure_ascii=False)
+                engine.task_loader.write_config(existing_task, transaction)
                 logger.info(f"API接口: 成功更新任务配置文件 {config_path}")
             except Exception as e:
                 logger.error(f"API接口: 更新任务配置文件失败: {e}")
@@ -610,8 +533,6 @@ def toggle_task_enabled(task_id):
         data = request.get_json()
         enabled = data.get('enabled', True)
         engine = validate_scheduler_engine()
-        # 标记API操作，避免文件监控误触发
-        engine._mark_api_operation()
         if engine.toggle_task(task_id, enabled):
             logger.info(f"API接口: 任务 {task_id} 已切换为 {'启用' if enabled else '禁用'} 状态")
             return jsonify({"success": True, "message": f"任务已{'启用' if enabled else '禁用'}"})
@@ -622,87 +543,30 @@ def toggle_task_enabled(task_id):
         logger.error(f"API接口: 切换任务 {task_id} 状态时发生异常: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
 
-class DeleteTaskTransactionManager:
-    """为任务删除操作提供事务管理的上下文管理器"""
+class DeleteTaskTransactionManager(TransactionManager):
+    """任务删除的事务管理器：任务目录和日志文件被移动到各自目录下的回收区，
+    提交后在后台删除，失败时移回原位，删除耗时与任务目录和日志大小无关。
+    回滚时在恢复文件后把已从调度引擎移除的任务重新加入，恢复其调度计划"""
+    
+    def __init__(self, task_id):
+        super().__init__(task_id)
+        self.removed_task = None
+    
+    def remove_task(self):
+        """从调度引擎中移除任务，并记录任务以便回滚时恢复"""
+        task = self.engine.tasks.get(self.task_id)
+        if not self.engine.remove_task(self.task_id):
+            raise Exception("从调度引擎移除任务失败")
+        self.removed_task = task
     
-    def __init__(self, task_id, task_info):
-        self.task_id = task_id
-        self.task_info = task_info
-        self.backup_dir = tempfile.mkdtemp(prefix=f"task_delete_{self.task_id}_backup_")
-        self.logger = logging.getLogger(__name__)
-
-    def __enter__(self):
-        """开始事务，备份所有相关文件"""
-        try:
-            # 备份任务目录
-            task_dir = os.path.join("tasks", self.task_id)
-            if os.path.exists(task_dir):
-                shutil.copytree(task_dir, os.path.join(self.backup_dir, "task_dir"))
-
-            # 备份日志文件
-            log_file_path = self.task_info.get('task_log', f'logs/task_{self.task_id}.log')
-            log_dir = os.path.dirname(log_file_path)
-            log_basename = os.path.basename(log_file_path)
-            if os.path.exists(log_dir):
-                backup_log_dir = os.path.join(self.backup_dir, "logs")
-                os.makedirs(backup_log_dir, exist_ok=True)
-                for filename in os.listdir(log_dir):
-                    if filename.startswith(log_basename):
-                        shutil.copy2(os.path.join(log_dir, filename), os.path.join(backup_log_dir, filename))
-
-            # 备份锁文件
-            lock_file_path = os.path.join(LOCKS_DIR, f"{self.task_id}.lock")
-            if os.path.exists(lock_file_path):
-                backup_lock_dir = os.path.join(self.backup_dir, "locks")
-                os.makedirs(backup_lock_dir, exist_ok=True)
-                shutil.copy2(lock_file_path, os.path.join(backup_lock_dir, os.path.basename(lock_file_path)))
-                
-            self.logger.info(f"API接口: 成功备份任务 {self.task_id} 的相关文件")
-            return self
-        except Exception as e:
-            self.logger.error(f"API接口: 备份任务 {self.task_id} 文件时出错: {e}")
-            self.cleanup()
-            raise
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """结束事务，如果发生异常则回滚"""
-        if exc_type:
-            self.logger.error(f"API接口: 删除任务 {self.task_id} 过程中发生异常，开始回滚...")
-            self.rollback()
-        self.cleanup()
-
     def rollback(self):
-        """从备份中恢复所有文件"""
-        try:
-            # 恢复任务目录
-            backup_task_dir = os.path.join(self.backup_dir, "task_dir")
-            if os.path.exists(backup_task_dir):
-                task_dir = os.path.join("tasks", self.task_id)
-                if os.path.exists(task_dir):
-                    shutil.rmtree(task_dir)
-                shutil.copytree(backup_task_dir, task_dir)
-
-            # 恢复日志文件
-            backup_log_dir = os.path.join(self.backup_dir, "logs")
-            if os.path.exists(backup_log_dir):
-                log_dir = os.path.dirname(self.task_info.get('task_log', f'logs/task_{self.task_id}.log'))
-                for filename in os.listdir(backup_log_dir):
-                    shutil.copy2(os.path.join(backup_log_dir, filename), os.path.join(log_dir, filename))
-
-            # 恢复锁文件
-            backup_lock_dir = os.path.join(self.backup_dir, "locks")
-            if os.path.exists(backup_lock_dir):
-                lock_file_path = os.path.join(LOCKS_DIR, f"{self.task_id}.lock")
-                shutil.copy2(os.path.join(backup_lock_dir, os.path.basename(lock_file_path)), lock_file_path)
-                
-            self.logger.info(f"API接口: 成功回滚任务 {self.task_id} 的删除操作")
-        except Exception as e:
-            self.logger.error(f"API接口: 回滚任务 {self.task_id} 删除操作失败: {e}")
-
-    def cleanup(self):
-        """清理备份目录"""
-        if os.path.exists(self.backup_dir):
-            shutil.rmtree(self.backup_dir)
+        super().rollback()
+        if self.removed_task is not None and self.task_id not in self.engine.tasks:
+            if self.engine.add_task(self.removed_task):
+                logger.info(f"API接口: 已将任务 {self.task_id} 恢复到调度引擎")
+            else:
+                logger.error(f"API接口: 回滚时恢复任务 {self.task_id} 到调度引擎失败")
+            self.removed_task = None
 
 @api_bp.route('/api/scheduler/tasks/<task_id>', methods=['DELETE'])
 @with_task_lock
@@ -716,34 +580,26 @@ def delete_task(task_id):
         return jsonify({"success": False, "message": "任务不存在"}), 404
 
     try:
-        # 标记API操作，避免文件监控误触发
-        engine._mark_api_operation()
-        
-        with DeleteTaskTransactionManager(task_id, task):
-            # 1. 从调度引擎中移除任务
-            if not engine.remove_task(task_id):
-                # 如果移除失败，手动触发异常以进行回滚
-                raise Exception("从调度引擎移除任务失败")
+        with DeleteTaskTransactionManager(task_id) as transaction:
+            # 1. 先把任务目录移入回收区，再从调度引擎中移除任务（移除失败时抛出异常触发回滚）
+            transaction.remove(transaction.task_dir)
+            transaction.remove_task()
             
             logger.info(f"API接口: 成功从调度引擎中删除任务 {task_id}")
 
-            # 2. 清理日志文件
-            log_file_path = task.get('task_log', f'logs/task_{task_id}.log')
+            # 2. 清理日志文件（任务日志及其分段、执行索引，以及生命周期事件日志）
+            log_file_path = resolve_path(task.get('task_log', f'logs/task_{task_id}.log'))
             log_dir = os.path.dirname(log_file_path)
-            log_basename = os.path.basename(log_file_path)
+            log_prefixes = (os.path.basename(log_file_path), os.path.basename(event_log_path(log_file_path)))
             
             if os.path.exists(log_dir):
                 for filename in os.listdir(log_dir):
-                    if filename.startswith(log_basename):
-                        file_to_delete = os.path.join(log_dir, filename)
-                        os.remove(file_to_delete)
-                        logger.info(f"API接口: 已删除日志文件 {file_to_delete}")
+                    if filename.startswith(log_prefixes):
+                        transaction.remove(os.path.join(log_dir, filename))
+                        logger.info(f"API接口: 已删除日志文件 {os.path.join(log_dir, filename)}")
             
             # 3. 清理锁文件
-            lock_file_path = os.path.join(LOCKS_DIR, f"{task_id}.lock")
-            if os.path.exists(lock_file_path):
-                os.remove(lock_file_path)
-                logger.info(f"API接口: 已删除锁文件 {lock_file_path}")
+            transaction.remove(os.path.join(LOCKS_DIR, f"{task_id}.lock"))
 
         return jsonify({"success": True, "message": "任务及相关文件已成功删除"})
 
@@ -824,33 +680,221 @@ def get_task_logs(task_id):
             return jsonify({"success": False, "message": f"任务 {task_id} 不存在"}), 404
         
         log_file = task.get('task_log', f'logs/task_{task_id}.log')
-        logger.debug(f"读取任务日志: {log_file}")
+        log_path = resolve_path(log_file)
+        logger.debug(f"读取任务日志: {log_path}")
         
-        # 检查并轮转日志文件
-        LogManager.check_and_rotate_log(log_file)
-        
-        if not os.path.exists(log_file):
+        if not os.path.exists(log_path):
             logger.debug(f"任务日志文件不存在: {log_file}")
-            return jsonify({"success": True, "data": [], "message": "暂无日志", "log_file": log_file})
+            return jsonify({"success": True, "data": [], "message": "暂无日志", "log_file": log_file,
+                            "next_cursor": current_cursor(log_path)})
+        
+        # 传入 execution_id 时直接定位到该次执行的输出，可配合 cursor 分批读取
+        cursor = request.args.get('cursor')
+        execution_id = request.args.get('execution_id')
+        if execution_id:
+            content = read_execution_log(log_path, execution_id, cursor)
+            if content is None:
+                return jsonify({"success": False, "message": f"日志中没有执行 {execution_id} 的记录"}), 404
+            return jsonify({
+                "success": True,
+                "data": content["lines"],
+                "log_file": log_file,
+                "execution": content["execution"],
+                "available": content["available"],
+                "next_cursor": content["next_cursor"],
+                "total_lines": content["total_lines"],
+                "has_more": content["has_more"]
+            })
+        
+        # 传入 cursor 时只返回游标之后新增的完整行
+        if cursor is not None:
+            content = read_log_from(log_path, cursor)
+            return jsonify({
+                "success": True,
+                "data": content["lines"],
+                "log_file": log_file,
+                "next_cursor": content["next_cursor"],
+                "reset": content["reset"],
+                "total_lines": content["total_lines"],
+                "has_more": content["has_more"]
+            })
         
         # 获取分页参数
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
         
         # 使用LogManager获取日志内容
-        log_entries = LogManager.get_log_content(log_file, limit, offset)
+        content = LogManager.get_log_content(log_path, limit, offset)
+        log_entries = content["lines"]
         
         logger.debug(f"API接口: 成功获取任务 {task_id} 的日志")
         return jsonify({
             "success": True, 
             "data": log_entries, 
             "log_file": log_file,
-            "has_more": os.path.getsize(log_file) > 0 and len(log_entries) == limit
+            "total_lines": content["total_lines"],
+            "partial": content["partial"],
+            "next_cursor": content["next_cursor"],
+            "has_more": bool(log_entries) and log_entries[-1]["line"] < content["total_lines"]
         })
     except Exception as e:
         logger.error(f"API接口: 读取任务 {task_id} 日志时发生异常: {e}")
         return jsonify({"success": False, "message": f"读取日志失败: {e}"}), 500
 
+@api_bp.route('/api/scheduler/tasks/<task_id>/logs/executions', methods=['GET'])
+def get_task_log_executions(task_id):
+    """列出任务日志中记录的执行及其输出在日志中的位置，最新的在前"""
+    logger.debug(f"接收到请求: GET /api/scheduler/tasks/{task_id}/logs/executions")
+    try:
+        engine = validate_scheduler_engine()
+        task = engine.get_task(task_id)
+        if not task:
+            logger.warning(f"获取任务 {task_id} 日志执行列表失败，任务不存在")
+            return jsonify({"success": False, "message": f"任务 {task_id} 不存在"}), 404
+        
+        limit = request.args.get('limit', 50, type=int)
+        log_path = resolve_path(task.get('task_log', f'logs/task_{task_id}.log'))
+        return jsonify({"success": True, "data": list_log_executions(log_path, limit)})
+    except Exception as e:
+        logger.error(f"API接口: 获取任务 {task_id} 日志执行列表时发生异常: {e}")
+        return jsonify({"success": False, "message": f"获取日志执行列表失败: {e}"}), 500
+
+@api_bp.route('/api/scheduler/tasks/<task_id>/events', methods=['GET'])
+def get_task_events(task_id):
+    """获取任务的生命周期事件（需启用 TASK_LOG_EVENT_FORMAT=jsonl 或 both），可按 execution_id 和 event 过滤"""
+    logger.debug(f"接收到请求: GET /api/scheduler/tasks/{task_id}/events")
+    try:
+        engine = validate_scheduler_engine()
+        task = engine.get_task(task_id)
+        if not task:
+            logger.warning(f"获取任务 {task_id} 生命周期事件失败，任务不存在")
+            return jsonify({"success": False, "message": f"任务 {task_id} 不存在"}), 404
+        
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        log_path = resolve_path(task.get('task_log', f'logs/task_{task_id}.log'))
+        events = read_task_events(log_path, execution_id=request.args.get('execution_id') or None,
+                                  event=request.args.get('event') or None, limit=limit)
+        return jsonify({"success": True, "data": events})
+    except Exception as e:
+        logger.error(f"API接口: 获取任务 {task_id} 生命周期事件时发生异常: {e}")
+        return jsonify({"success": False, "message": f"获取生命周期事件失败: {e}"}), 500
+
+# SSE 连接在没有新日志时发送心跳的间隔（秒）
+LOG_STREAM_HEARTBEAT = 15
+
+@api_bp.route('/api/scheduler/tasks/<task_id>/logs/stream', methods=['GET'])
+def stream_task_logs(task_id):
+    """通过 Server-Sent Events 推送任务日志的新增行
+    
+    从断线重连时浏览器携带的 Last-Event-ID 或 cursor 参数指定的位置开始推送，
+    未指定时从日志当前末尾开始。事件类型为 lines（追加）或 reset（日志文件被替换，需清空后重新显示），
+    事件ID即下一次读取的游标。
+    """
+    logger.debug(f"接收到请求: GET /api/scheduler/tasks/{task_id}/logs/stream")
+    engine = validate_scheduler_engine()
+    task = engine.get_task(task_id)
+    if not task:
+        logger.warning(f"订阅任务 {task_id} 日志失败，任务不存在")
+        return jsonify({"success": False, "message": f"任务 {task_id} 不存在"}), 404
+    
+    log_path = resolve_path(task.get('task_log', f'logs/task_{task_id}.log'))
+    # 浏览器自动重连时 URL 中的 cursor 已过期，以 Last-Event-ID 为准
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor') or current_cursor(log_path)
+    
+    def generate(cursor):
+        with watch_log(log_path) as watch:
+            while True:
+                version = watch.version
+                content = read_log_from(log_path, cursor)
+                if content["lines"] or content["reset"]:
+                    cursor = content["next_cursor"]
+                    payload = json.dumps({"lines": content["lines"], "total_lines": content["total_lines"]},
+                                         ensure_ascii=False)
+                    event = "reset" if content["reset"] else "lines"
+                    yield f"id: {cursor}\nevent: {event}\ndata: {payload}\n\n"
+                    if content["has_more"]:
+                        continue
+                if not watch.wait(version, LOG_STREAM_HEARTBEAT):
+                    yield ": heartbeat\n\n"
+    
+    return Response(stream_with_context(generate(cursor)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@api_bp.route('/api/scheduler/tasks/<task_id>/history', methods=['GET'])
+def get_task_history(task_id):
+    """分页获取任务执行历史"""
+    logger.debug(f"接收到请求: GET /api/scheduler/tasks/{task_id}/history")
+    try:
+        engine = validate_scheduler_engine()
+        if not engine.get_task(task_id):
+            logger.warning(f"获取任务 {task_id} 执行历史失败，任务不存在")
+            return jsonify({"success": False, "message": f"任务 {task_id} 不存在"}), 404
+
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        status = request.args.get('status') or None
+
+        history = engine.get_task_history(task_id, limit=limit, offset=offset, status=status)
+        return jsonify({
+            "success": True,
+            "data": history["items"],
+            "total": history["total"],
+            "limit": limit,
+            "offset": offset,
+            "has_more": offset + len(history["items"]) < history["total"]
+        })
+    except Exception as e:
+        logger.error(f"API接口: 获取任务 {task_id} 执行历史时发生异常: {e}")
+        return jsonify({"success": False, "message": f"获取执行历史失败: {e}"}), 500
+
+@api_bp.route('/api/logs/search', methods=['GET'])
+def search_logs():
+    """全文检索系统日志和任务日志，可按任务、日志级别和起始时间过滤"""
+    logger.debug("接收到请求: GET /api/logs/search")
+    try:
+        engine = validate_scheduler_engine()
+        if not engine.log_search.enabled:
+            return jsonify({"success": False, "message": "当前 SQLite 版本不支持日志全文检索，检索功能已禁用"}), 503
+        query = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        try:
+            result = engine.search_logs(
+                query,
+                task_id=request.args.get('task_id') or None,
+                level=request.args.get('level') or None,
+                since=request.args.get('since') or None,
+                limit=limit
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "message": f"检索参数无效: {e}"}), 400
+        return jsonify({
+            "success": True,
+            "data": result["items"],
+            "has_more": result["has_more"],
+            "took_ms": result["took_ms"]
+        })
+    except Exception as e:
+        logger.error(f"API接口: 检索日志时发生异常: {e}")
+        return jsonify({"success": False, "message": f"检索日志失败: {e}"}), 500
+
+@api_bp.route('/api/logging/stats', methods=['GET'])
+def logging_stats():
+    """获取异步日志管道的队列深度、丢弃数量和日志耗时"""
+    return jsonify({"success": True, "data": get_logging_stats()})
+
+@api_bp.route('/api/scheduler/running', methods=['GET'])
+def get_running_executions():
+    """获取正在执行的任务列表，可通过 task_id 参数过滤"""
+    logger.debug("接收到请求: GET /api/scheduler/running")
+    try:
+        engine = validate_scheduler_engine()
+        task_id = request.args.get('task_id') or None
+        executions = engine.get_running_executions(task_id)
+        return jsonify({"success": True, "data": executions, "total": len(executions)})
+    except Exception as e:
+        logger.error(f"API接口: 获取正在执行的任务时发生异常: {e}")
+        return jsonify({"success": False, "message": f"获取正在执行的任务失败: {e}"}), 500
+
 @api_bp.route('/api/scheduler/tasks/<task_id>/logs/clear', methods=['POST'])
 @with_task_lock
 def clear_task_logs(task_id):
@@ -863,11 +907,10 @@ def clear_task_logs(task_id):
             logger.warning(f"API接口: 清空任务 {task_id} 日志失败，任务不存在")
             return jsonify({"success": False, "message": "任务不存在"}), 404
 
-        log_file = task.get('task_log', f'logs/task_{task_id}.log')
+        log_file = resolve_path(task.get('task_log', f'logs/task_{task_id}.log'))
         if os.path.exists(log_file):
-            # 直接清空日志文件，不创建备份
-            with open(log_file, 'w') as f:
-                f.truncate(0)
+            # 清空日志及其历史分段，不创建备份；正在执行的任务会继续写入新的日志文件
+            clear_log(log_file)
             logger.info(f"API接口: 成功清空任务 {task_id} 的日志")
             return jsonify({"success": True, "message": "日志已清空"})
         else:
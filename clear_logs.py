@@ -1,40 +1,115 @@
 #!/usr/bin/env python3
 """
-清理日志目录中所有.log文件的脚本。
-此脚本会清空文件内容，但不会删除文件本身。
+清理日志目录中所有.log文件（及任务事件日志 .events.jsonl）的脚本。
+默认清空文件内容，但不会删除文件本身；
+指定 --budget-mb（或环境变量 TASK_LOG_DISK_BUDGET_MB）时改为按总磁盘预算删除最旧的已轮转分段。
 """
 import os
+import re
 import glob
+import argparse
 
-def clear_all_logs():
+from log_reader import event_log_path
+from log_writer import clear_log, task_log_writer
+from project_paths import resolve_path
+
+# 已轮转的日志分段：task.log.1、task.log.2.gz、task.events.jsonl.1 ...
+ROTATED_SEGMENT_PATTERN = re.compile(r'\.(log|jsonl)\.\d+(\.gz)?$')
+# 由 logging 的 RotatingFileHandler 写入的系统日志，不经过任务日志写入器
+SYSTEM_LOG_NAME = "sys.log"
+
+def clear_all_logs(logs_dir: str = "logs"):
     """
     查找 logs/ 目录下的所有 .log 文件并清空其内容。
+    任务日志通过日志写入器清空（同时删除历史分段、执行索引和事件日志），
+    正在运行的调度器中的写入器会发现文件被重置并从新文件的开头继续写入，游标和执行索引不会失效。
     """
-    logs_dir = "logs"
+    logs_dir = resolve_path(logs_dir)
     
     # 确保日志目录存在
     if not os.path.exists(logs_dir):
         print(f"日志目录 '{logs_dir}' 不存在，无需清理。")
         return
 
-    # 查找所有.log文件
+    # 查找所有.log文件和任务事件日志
     log_files = glob.glob(os.path.join(logs_dir, '*.log'))
+    event_logs = set(glob.glob(os.path.join(logs_dir, '*.events.jsonl'))) - {event_log_path(path) for path in log_files}
     
-    if not log_files:
+    if not log_files and not event_logs:
         print(f"在 '{logs_dir}' 目录中未找到.log日志文件。")
         return
 
     print("开始清理日志文件...")
-    for log_file in log_files:
+    for log_file in sorted(log_files) + sorted(event_logs):
         try:
-            # 以写模式打开文件会清空其内容
-            with open(log_file, 'w') as f:
-                pass  # 不需要写入任何内容
+            if os.path.basename(log_file) == SYSTEM_LOG_NAME:
+                # 系统日志以追加模式写入，截断后写入方会从新的文件末尾继续
+                with open(log_file, 'w'):
+                    pass
+            elif log_file in event_logs:
+                # 没有对应任务日志的事件日志单独清空
+                with task_log_writer(log_file) as writer:
+                    writer.clear()
+            else:
+                clear_log(log_file)
+            # 保留清空后的空文件
+            open(log_file, 'a').close()
             print(f"  - 已清空: {log_file}")
         except Exception as e:
             print(f"  - 清空失败: {log_file} (错误: {e})")
     
     print("日志清理完成。")
 
+def enforce_disk_budget(budget_bytes: int, logs_dir: str = "logs"):
+    """
+    使 logs/ 目录下所有日志（活动文件与已轮转分段）的总大小不超过预算。
+    按修改时间从旧到新删除已轮转分段，同一日志总是先删除编号最大（最旧）的分段；
+    正在写入的活动日志文件不会被删除。
+    """
+    logs_dir = resolve_path(logs_dir)
+    if not os.path.exists(logs_dir):
+        print(f"日志目录 '{logs_dir}' 不存在，无需清理。")
+        return
+
+    total = 0
+    rotated = []
+    for name in os.listdir(logs_dir):
+        path = os.path.join(logs_dir, name)
+        if not (name.endswith(('.log', '.events.jsonl')) or ROTATED_SEGMENT_PATTERN.search(name)):
+            continue
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        total += stat.st_size
+        if ROTATED_SEGMENT_PATTERN.search(name):
+            rotated.append((stat.st_mtime, path, stat.st_size))
+
+    print(f"日志总大小 {total / 1024 / 1024:.1f}MB，预算 {budget_bytes / 1024 / 1024:.1f}MB")
+    for _, path, size in sorted(rotated):
+        if total <= budget_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            print(f"  - 已删除: {path}")
+        except FileNotFoundError:
+            total -= size
+        except Exception as e:
+            print(f"  - 删除失败: {path} (错误: {e})")
+
+    if total > budget_bytes:
+        print(f"已删除全部历史分段，活动日志仍占用 {total / 1024 / 1024:.1f}MB，超出预算。")
+    else:
+        print("日志磁盘预算检查完成。")
+
 if __name__ == "__main__":
-    clear_all_logs()
+    parser = argparse.ArgumentParser(description="清理任务日志")
+    parser.add_argument("--budget-mb", type=float, default=float(os.getenv('TASK_LOG_DISK_BUDGET_MB', '0')),
+                        help="日志总磁盘预算（MB），超出时删除最旧的已轮转分段；为 0 时清空所有 .log 文件")
+    args = parser.parse_args()
+
+    if args.budget_mb > 0:
+        enforce_disk_budget(int(args.budget_mb * 1024 * 1024))
+    else:
+        clear_all_logs()
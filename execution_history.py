@@ -0,0 +1,208 @@
+import os
+import json
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+from project_paths import resolve_path
+from sqlite_pool import SQLiteReadPool
+
+# 执行记录中单独建列的字段，其余字段以 JSON 形式保存在 extra 列中
+CORE_COLUMNS = (
+    "execution_id", "task_id", "start_time", "end_time", "status",
+    "return_code", "duration", "error_message",
+)
+
+
+class ExecutionHistoryStore:
+    """任务执行历史存储
+
+    使用 SQLite（WAL 模式）持久化执行记录：
+    - 写入先进入内存队列，由后台线程批量提交，不阻塞任务执行线程
+    - 按保留天数和每个任务的最大记录数定期清理旧记录
+    - 按 (task_id, start_time) 和 status 建立索引，支持分页查询
+    """
+
+    def __init__(self, db_path: Optional[str] = None, retention_days: Optional[int] = None,
+                 max_per_task: Optional[int] = None, batch_size: int = 100,
+                 flush_interval: float = 1.0, prune_interval: float = 600):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = resolve_path(db_path or os.getenv('EXECUTION_HISTORY_DB', 'logs/execution_history.db'))
+        self.retention_days = retention_days if retention_days is not None else int(os.getenv('EXECUTION_HISTORY_RETENTION_DAYS', '30'))
+        self.max_per_task = max_per_task if max_per_task is not None else int(os.getenv('EXECUTION_HISTORY_MAX_PER_TASK', '1000'))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        self._queue = queue.Queue(maxsize=10000)
+        self._stop_event = threading.Event()
+        self._writer_thread = None
+        # 查询共用一个小连接池，不为每个请求线程单独保留连接
+        self._read_pool = SQLiteReadPool(lambda: self._connect(check_same_thread=False))
+        self._init_db()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=check_same_thread)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self):
+        """创建数据表和索引"""
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS executions (
+                    execution_id TEXT PRIMARY KEY,
+                    task_id TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    status TEXT,
+                    return_code INTEGER,
+                    duration REAL,
+                    error_message TEXT,
+                    extra TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_executions_task_start ON executions (task_id, start_time);
+                CREATE INDEX IF NOT EXISTS idx_executions_status ON executions (status);
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def start(self):
+        """启动后台写入线程"""
+        if self._writer_thread and self._writer_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._writer_thread = threading.Thread(target=self._writer_worker, name="execution-history-writer", daemon=True)
+        self._writer_thread.start()
+        self.logger.info(f"执行历史存储已启动: {self.db_path}")
+
+    def stop(self):
+        """停止后台写入线程，写入队列中剩余的记录并关闭查询连接"""
+        if self._writer_thread and self._writer_thread.is_alive():
+            self._stop_event.set()
+            self._writer_thread.join(timeout=10)
+            self.logger.info("执行历史存储已停止")
+        self._read_pool.close()
+
+    def record(self, execution: Dict[str, Any]):
+        """提交一条执行记录（非阻塞）"""
+        try:
+            self._queue.put_nowait(self._to_row(execution))
+        except queue.Full:
+            self.logger.warning(f"执行历史写入队列已满，丢弃执行记录 {execution.get('execution_id')}")
+
+    @staticmethod
+    def _to_row(execution: Dict[str, Any]) -> tuple:
+        values = {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in execution.items()}
+        extra = {k: v for k, v in values.items() if k not in CORE_COLUMNS}
+        return tuple(values.get(col) for col in CORE_COLUMNS) + (json.dumps(extra, ensure_ascii=False),)
+
+    def _writer_worker(self):
+        """后台写入线程：批量提交执行记录并定期清理旧记录
+
+        单个批次或一次清理出现异常时只记录错误并继续处理后续记录，写入线程和连接保持可用。
+        """
+        conn = self._connect()
+        last_prune = 0.0
+        try:
+            while True:
+                batch = []
+                try:
+                    batch = self._drain_batch()
+                    if batch:
+                        self._write_batch(conn, batch)
+                except Exception as e:
+                    self.logger.error(f"写入执行历史时发生异常，丢弃本批 {len(batch)} 条记录: {e}")
+
+                now = datetime.now().timestamp()
+                if now - last_prune >= self.prune_interval:
+                    last_prune = now
+                    try:
+                        self._prune(conn)
+                    except Exception as e:
+                        self.logger.error(f"清理执行历史时发生异常: {e}")
+
+                if self._stop_event.is_set() and self._queue.empty():
+                    break
+        finally:
+            conn.close()
+
+    def _drain_batch(self) -> List[tuple]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[tuple]):
+        placeholders = ", ".join("?" * (len(CORE_COLUMNS) + 1))
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO executions ({', '.join(CORE_COLUMNS)}, extra) VALUES ({placeholders})",
+                    batch
+                )
+            self.logger.debug(f"已写入 {len(batch)} 条执行历史记录")
+        except sqlite3.Error as e:
+            self.logger.error(f"写入执行历史失败: {e}")
+
+    def _prune(self, conn: sqlite3.Connection):
+        """按保留策略清理旧记录"""
+        try:
+            with conn:
+                deleted = 0
+                if self.retention_days > 0:
+                    cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat()
+                    deleted += conn.execute("DELETE FROM executions WHERE start_time < ?", (cutoff,)).rowcount
+                if self.max_per_task > 0:
+                    over_limit = conn.execute(
+                        "SELECT task_id FROM executions GROUP BY task_id HAVING COUNT(*) > ?",
+                        (self.max_per_task,)
+                    ).fetchall()
+                    for row in over_limit:
+                        deleted += conn.execute(
+                            """DELETE FROM executions WHERE rowid IN (
+                                   SELECT rowid FROM executions WHERE task_id = ?
+                                   ORDER BY start_time DESC LIMIT -1 OFFSET ?)""",
+                            (row["task_id"], self.max_per_task)
+                        ).rowcount
+            if deleted:
+                self.logger.info(f"已清理 {deleted} 条过期的执行历史记录")
+        except sqlite3.Error as e:
+            self.logger.error(f"清理执行历史失败: {e}")
+
+    def query(self, task_id: str, limit: int = 20, offset: int = 0,
+              status: Optional[str] = None) -> Dict[str, Any]:
+        """分页查询任务的执行历史，按开始时间倒序"""
+        where = "task_id = ?"
+        params: List[Any] = [task_id]
+        if status:
+            where += " AND status = ?"
+            params.append(status)
+
+        with self._read_pool.connection() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM executions WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM executions WHERE {where} ORDER BY start_time DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return {"items": [self._from_row(row) for row in rows], "total": total}
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        item = {col: row[col] for col in CORE_COLUMNS}
+        if row["extra"]:
+            item.update(json.loads(row["extra"]))
+        return item
@@ -0,0 +1,204 @@
+import os
+import stat
+import shutil
+import logging
+import tempfile
+import threading
+import uuid
+from typing import List, Optional, Set, Tuple, Union
+
+# 事务中被替换或删除的文件暂存在所在目录下的回收区（与原文件位于同一文件系统，重命名不复制内容）
+TRASH_DIR_NAME = '.trash'
+
+# 当前进程中尚未结束的事务，清理残留回收区时跳过
+_active_txns: Set[str] = set()
+_active_txns_lock = threading.Lock()
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data: Union[str, bytes], mode: Optional[int] = None):
+    """原子地写入文件：写入同目录下的临时文件并 fsync 后 os.replace
+
+    读取方只会看到旧内容或完整的新内容。未指定 mode 时沿用原文件的权限，新文件按 umask 创建。
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is None:
+            try:
+                mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+def sweep_trash(directory: str) -> List[str]:
+    """清理目录下回收区中残留的事务目录，返回被清理的路径
+
+    提交后的回收区在后台线程中删除，进程在删除完成前退出时会留下残留，启动时调用本函数清理。
+    当前进程中进行中的事务不受影响。
+    """
+    trash_root = os.path.join(directory, TRASH_DIR_NAME)
+    try:
+        entries = os.listdir(trash_root)
+    except FileNotFoundError:
+        return []
+    with _active_txns_lock:
+        stale = [entry for entry in entries if entry not in _active_txns]
+    removed = []
+    for entry in stale:
+        path = os.path.join(trash_root, entry)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+        removed.append(path)
+    try:
+        os.rmdir(trash_root)
+    except OSError:
+        pass
+    return removed
+
+
+class FileTransaction:
+    """文件操作事务：只为实际改动的文件保留撤销记录，开销与目录和日志大小无关
+
+    - write_file 原子写入；被覆盖的原文件以硬链接的形式暂存到回收区
+    - make_dirs 记录新建的目录，回滚时删除
+    - remove 把文件或目录重命名到回收区，而不是复制后删除
+    正常结束时提交并清理回收区（包含目录时在后台线程中删除，进程退出时的残留由 sweep_trash 在启动时清理）；
+    发生异常时按相反顺序撤销全部操作。
+    回收区位于被操作文件所在目录下的 .trash/<事务ID>/，与原文件在同一文件系统，重命名是原子操作。
+    """
+
+    def __init__(self):
+        self.txn_id = uuid.uuid4().hex
+        self.logger = logging.getLogger(__name__)
+        self._undo: List[Tuple] = []
+        self._trash_dirs: Set[str] = set()
+        self.success = False
+        with _active_txns_lock:
+            _active_txns.add(self.txn_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.rollback()
+        else:
+            self.commit()
+        return False
+
+    def _trash_path(self, path: str) -> str:
+        trash_dir = os.path.join(os.path.dirname(os.path.abspath(path)), TRASH_DIR_NAME, self.txn_id)
+        os.makedirs(trash_dir, exist_ok=True)
+        self._trash_dirs.add(trash_dir)
+        return os.path.join(trash_dir, os.path.basename(path))
+
+    def write_file(self, path: str, data: Union[str, bytes], mode: Optional[int] = None):
+        """原子地写入文件，并记录撤销所需的原文件"""
+        if os.path.lexists(path):
+            backup = self._trash_path(path)
+            try:
+                os.link(path, backup)
+            except OSError:
+                shutil.copy2(path, backup)
+            self._undo.append(('replaced', path, backup))
+        else:
+            self._undo.append(('created', path))
+        atomic_write(path, data, mode)
+
+    def make_dirs(self, path: str):
+        """创建目录（含缺失的上级目录），回滚时删除本事务新建的目录"""
+        missing = []
+        current = os.path.abspath(path)
+        while not os.path.exists(current):
+            missing.append(current)
+            current = os.path.dirname(current)
+        for directory in reversed(missing):
+            os.mkdir(directory)
+            self._undo.append(('mkdir', directory))
+
+    def remove(self, path: str):
+        """把文件或目录移动到回收区，提交后才真正删除"""
+        if not os.path.lexists(path):
+            return
+        trash = self._trash_path(path)
+        os.rename(path, trash)
+        self._undo.append(('moved', path, trash))
+
+    def commit(self):
+        """提交事务并清理回收区"""
+        self.success = True
+        background = any(op[0] == 'moved' and os.path.isdir(op[2]) for op in self._undo)
+        self._undo = []
+        self._purge_trash(background)
+
+    def rollback(self):
+        """按相反顺序撤销本事务中的全部文件操作"""
+        for op in reversed(self._undo):
+            try:
+                if op[0] == 'replaced':
+                    os.replace(op[2], op[1])
+                elif op[0] == 'created':
+                    if os.path.lexists(op[1]):
+                        os.remove(op[1])
+                elif op[0] == 'mkdir':
+                    shutil.rmtree(op[1], ignore_errors=True)
+                elif op[0] == 'moved':
+                    if os.path.isdir(op[1]) and not os.path.islink(op[1]):
+                        shutil.rmtree(op[1])
+                    os.rename(op[2], op[1])
+            except OSError as e:
+                self.logger.error(f"回滚文件操作 {op} 失败: {e}")
+        self._undo = []
+        self._purge_trash(background=False)
+
+    def _purge_trash(self, background: bool):
+        with _active_txns_lock:
+            _active_txns.discard(self.txn_id)
+        trash_dirs, self._trash_dirs = list(self._trash_dirs), set()
+        if not trash_dirs:
+            return
+
+        def purge():
+            for trash_dir in trash_dirs:
+                shutil.rmtree(trash_dir, ignore_errors=True)
+                try:
+                    os.rmdir(os.path.dirname(trash_dir))
+                except OSError:
+                    # 回收区中还有其他事务的文件
+                    pass
+
+        if background:
+            threading.Thread(target=purge, name=f"trash-purge-{self.txn_id[:8]}", daemon=True).start()
+        else:
+            purge()
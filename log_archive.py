@@ -0,0 +1,230 @@
+import os
+import gzip
+import bisect
+import struct
+import threading
+from typing import List, Optional
+
+# 已轮转的日志分段是否压缩（任务日志在后台压缩，系统日志在轮转时压缩）
+COMPRESS_ROTATED = os.getenv('LOG_COMPRESS_ROTATED', 'true').lower() in ('1', 'true', 'yes')
+# 压缩分段的文件后缀
+COMPRESSED_SUFFIX = '.gz'
+# 压缩块的目标大小（未压缩字节数），块总是在行边界处切分
+COMPRESS_BLOCK_SIZE = 64 * 1024
+
+# 块索引保存在文件开头一个空 gzip 成员的 FEXTRA 字段中，gzip/zcat 可以直接解压整个文件
+_INDEX_SUBFIELD = b'BI'
+_INDEX_HEADER = struct.Struct('<QQQI')  # 未压缩大小、换行符数、最后一个完整行的结束偏移、块数
+_INDEX_BLOCK = struct.Struct('<QQQ')  # 块的未压缩偏移、压缩偏移（相对数据区）、块之前的行数
+_MAX_INDEX_BLOCKS = (0xFFFF - 4 - _INDEX_HEADER.size) // _INDEX_BLOCK.size
+
+
+def compress_segment(src, dest_path: str):
+    """将已轮转的日志分段压缩为带块索引的 gzip 文件
+
+    每个块是一个独立的 gzip 成员，读取某一页日志时只需解压所在的块。
+    src 为以二进制模式打开的源文件；先写入临时文件再重命名，不会留下不完整的压缩文件。
+    压缩文件保留源文件的修改时间，按时间清理日志时顺序不变。
+    """
+    stat = os.fstat(src.fileno())
+    data = src.read()
+    block_size = max(COMPRESS_BLOCK_SIZE, -(-len(data) // _MAX_INDEX_BLOCKS))
+
+    blocks, members = [], []
+    compressed = lines = pos = 0
+    while pos < len(data):
+        end = data.find(b'\n', min(pos + block_size, len(data)) - 1)
+        end = len(data) if end < 0 else end + 1
+        chunk = data[pos:end]
+        member = gzip.compress(chunk, mtime=0)
+        blocks.append(_INDEX_BLOCK.pack(pos, compressed, lines))
+        members.append(member)
+        compressed += len(member)
+        lines += chunk.count(b'\n')
+        pos = end
+
+    last_line_end = data.rfind(b'\n') + 1
+    index = _INDEX_HEADER.pack(len(data), lines, last_line_end, len(blocks)) + b''.join(blocks)
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_index_member(index))
+            for member in members:
+                f.write(member)
+        os.utime(tmp_path, (stat.st_atime, stat.st_mtime))
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def compress_file(src_path: str, dest_path: str):
+    """压缩日志文件并删除原文件，可作为 logging 轮转处理器的 rotator 使用"""
+    with open(src_path, 'rb') as src:
+        compress_segment(src, dest_path)
+    os.remove(src_path)
+
+
+def compressed_name(name: str) -> str:
+    """logging 轮转处理器的 namer：备份文件名加上压缩后缀"""
+    return name + COMPRESSED_SUFFIX if COMPRESS_ROTATED else name
+
+
+def enable_rotated_compression(handler):
+    """让 RotatingFileHandler 轮转时压缩备份文件（task.log.1.gz ...）"""
+    if COMPRESS_ROTATED:
+        handler.namer = compressed_name
+        handler.rotator = compress_file
+
+
+def _index_member(index: bytes) -> bytes:
+    """构造内容为空、FEXTRA 中携带块索引的 gzip 成员"""
+    extra = _INDEX_SUBFIELD + struct.pack('<H', len(index)) + index
+    header = b'\x1f\x8b\x08\x04' + b'\x00' * 4 + b'\x00\xff' + struct.pack('<H', len(extra)) + extra
+    # 空内容的 deflate 数据，随后是 CRC32 和 ISIZE
+    return header + b'\x03\x00' + b'\x00' * 8
+
+
+def _read_index(f) -> tuple:
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b'\x1f\x8b\x08\x04':
+        raise ValueError("不是带块索引的压缩日志分段")
+    extra = f.read(struct.unpack('<H', header[10:12])[0])
+    if extra[:2] != _INDEX_SUBFIELD:
+        raise ValueError("压缩日志分段缺少块索引")
+    index = extra[4:4 + struct.unpack('<H', extra[2:4])[0]]
+    size, newlines, last_line_end, count = _INDEX_HEADER.unpack_from(index)
+    blocks = [_INDEX_BLOCK.unpack_from(index, _INDEX_HEADER.size + i * _INDEX_BLOCK.size) for i in range(count)]
+    data_start = f.tell() + 10  # 跳过空 deflate 数据与 CRC32/ISIZE
+    return size, newlines, last_line_end, blocks, data_start
+
+
+class BlockIndex:
+    """压缩分段的行索引，与 log_reader.LineIndex 接口一致
+
+    压缩分段不再变化，索引在打开文件时从块索引中读出，refresh 无需扫描。
+    """
+
+    def __init__(self, inode: int, size: int, newlines: int, last_line_end: int, blocks: List[tuple]):
+        self.lock = threading.Lock()
+        self.inode = inode
+        self.scanned = size
+        self.newlines = newlines
+        self.last_line_end = last_line_end
+        self.ends_with_newline = last_line_end == size
+        self.offsets = [block[0] for block in blocks]
+        self.lines_before = [block[2] for block in blocks]
+
+    @property
+    def total_lines(self) -> int:
+        return self.newlines + (0 if self.ends_with_newline else 1)
+
+    def refresh(self, f):
+        pass
+
+    def line_number_at(self, f, offset: int) -> int:
+        if not self.offsets:
+            return 0
+        block = max(bisect.bisect_right(self.offsets, offset) - 1, 0)
+        f.seek(self.offsets[block])
+        return self.lines_before[block] + f.read(offset - self.offsets[block]).count(b'\n')
+
+    def seek_line(self, f, line: int):
+        if not self.offsets:
+            f.seek(0)
+            return
+        block = max(bisect.bisect_right(self.lines_before, line) - 1, 0)
+        f.seek(self.offsets[block])
+        for _ in range(line - self.lines_before[block]):
+            if not f.readline():
+                break
+
+
+class CompressedSegment:
+    """以未压缩偏移随机读取压缩分段的只读文件对象（seek/tell/read/readline）
+
+    按需解压所在的块并缓存最近解压的一个块，顺序读取时每个块只解压一次。
+    """
+
+    def __init__(self, path: str):
+        self._raw = open(path, 'rb')
+        try:
+            size, newlines, last_line_end, blocks, self._data_start = _read_index(self._raw)
+        except Exception:
+            self._raw.close()
+            raise
+        self._blocks = blocks
+        self._compressed_size = os.fstat(self._raw.fileno()).st_size - self._data_start
+        self._pos = 0
+        self._cached = (None, b'')
+        self.index = BlockIndex(os.fstat(self._raw.fileno()).st_ino, size, newlines, last_line_end, blocks)
+
+    def fileno(self) -> int:
+        return self._raw.fileno()
+
+    def seek(self, pos: int, whence: int = 0) -> int:
+        if whence == 1:
+            pos += self._pos
+        elif whence == 2:
+            pos += self.index.scanned
+        self._pos = max(pos, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def _block(self, i: int) -> bytes:
+        if self._cached[0] != i:
+            start = self._blocks[i][1]
+            end = self._blocks[i + 1][1] if i + 1 < len(self._blocks) else self._compressed_size
+            self._raw.seek(self._data_start + start)
+            self._cached = (i, gzip.decompress(self._raw.read(end - start)))
+        return self._cached[1]
+
+    def _current(self) -> Optional[tuple]:
+        """返回当前位置所在块的数据及块内偏移，已到文件末尾时返回 None"""
+        if self._pos >= self.index.scanned:
+            return None
+        i = bisect.bisect_right(self.index.offsets, self._pos) - 1
+        return self._block(i), self._pos - self._blocks[i][0]
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.index.scanned - self._pos if size is None or size < 0 else size
+        parts = []
+        while remaining > 0:
+            current = self._current()
+            if current is None:
+                break
+            block, start = current
+            chunk = block[start:start + remaining]
+            parts.append(chunk)
+            self._pos += len(chunk)
+            remaining -= len(chunk)
+        return b''.join(parts)
+
+    def readline(self, limit: int = -1) -> bytes:
+        remaining = self.index.scanned if limit is None or limit < 0 else limit
+        parts = []
+        while remaining > 0:
+            current = self._current()
+            if current is None:
+                break
+            block, start = current
+            newline = block.find(b'\n', start, start + remaining)
+            chunk = block[start:newline + 1 if newline >= 0 else start + remaining]
+            parts.append(chunk)
+            self._pos += len(chunk)
+            remaining -= len(chunk)
+            if newline >= 0:
+                break
+        return b''.join(parts)
+
+    def close(self):
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
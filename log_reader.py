@@ -0,0 +1,578 @@
+import os
+import json
+import bisect
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from log_archive import COMPRESSED_SUFFIX, CompressedSegment
+
+# 按块读取日志文件时的块大小
+READ_BLOCK_SIZE = 64 * 1024
+# 稀疏行索引的间隔：每隔多少行记录一次该行的起始字节偏移
+INDEX_INTERVAL = 1000
+# 最多缓存的日志文件索引数量
+MAX_CACHED_INDEXES = 256
+# 按游标增量读取时单次返回的最大字节数
+MAX_CURSOR_READ_BYTES = 256 * 1024
+
+
+class LineIndex:
+    """单个日志文件的稀疏行偏移索引
+
+    checkpoints[k] 为第 k * INDEX_INTERVAL 行（从 0 开始计数）的起始字节偏移。
+    文件追加写入时只扫描新增的部分；文件被截断或替换（inode 变化）时重新建立索引。
+    last_line_end 为最后一个完整行的结束偏移，游标只会停在完整行的边界上。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, inode):
+        self.inode = inode
+        self.scanned = 0
+        self.newlines = 0
+        self.ends_with_newline = True
+        self.last_line_end = 0
+        self.last_byte = b''
+        self.checkpoints = [0]
+
+    @property
+    def total_lines(self) -> int:
+        return self.newlines + (0 if self.ends_with_newline else 1)
+
+    def refresh(self, f):
+        """扫描上次索引之后新写入的内容"""
+        stat = os.fstat(f.fileno())
+        if stat.st_ino != self.inode or stat.st_size < self.scanned or not self._tail_unchanged(f):
+            self._reset(stat.st_ino)
+        if stat.st_size == self.scanned:
+            return
+
+        pos = self.scanned
+        f.seek(pos)
+        while pos < stat.st_size:
+            block = f.read(min(READ_BLOCK_SIZE, stat.st_size - pos))
+            if not block:
+                break
+            count = block.count(b'\n')
+            # 只有本块跨越了下一个检查点时才逐个定位换行符
+            if self.newlines + count >= len(self.checkpoints) * INDEX_INTERVAL:
+                newlines = self.newlines
+                idx = block.find(b'\n')
+                while idx >= 0:
+                    newlines += 1
+                    if newlines % INDEX_INTERVAL == 0:
+                        self.checkpoints.append(pos + idx + 1)
+                    idx = block.find(b'\n', idx + 1)
+            self.newlines += count
+            self.ends_with_newline = block.endswith(b'\n')
+            self.last_byte = block[-1:]
+            last_newline = block.rfind(b'\n')
+            if last_newline >= 0:
+                self.last_line_end = pos + last_newline + 1
+            pos += len(block)
+        self.scanned = pos
+    
+    def _tail_unchanged(self, f) -> bool:
+        """检查已索引部分的最后一个字节是否仍然相同，用于发现被截断后又重新写入的文件"""
+        if self.scanned == 0:
+            return True
+        f.seek(self.scanned - 1)
+        return f.read(1) == self.last_byte
+
+    def line_number_at(self, f, offset: int) -> int:
+        """返回 offset 之前的完整行数（offset 须位于行边界）"""
+        checkpoint = bisect.bisect_right(self.checkpoints, offset) - 1
+        f.seek(self.checkpoints[checkpoint])
+        return checkpoint * INDEX_INTERVAL + f.read(offset - self.checkpoints[checkpoint]).count(b'\n')
+
+    def seek_line(self, f, line: int):
+        """将文件定位到第 line 行（从 0 开始计数）的起始位置"""
+        checkpoint = min(line // INDEX_INTERVAL, len(self.checkpoints) - 1)
+        f.seek(self.checkpoints[checkpoint])
+        for _ in range(line - checkpoint * INDEX_INTERVAL):
+            if not f.readline():
+                break
+
+
+_indexes: "OrderedDict[Tuple[int, int], LineIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _get_index(key: Tuple[int, int]) -> LineIndex:
+    """按 (设备号, inode) 缓存索引，日志轮转重命名后索引依然有效"""
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = LineIndex()
+            _indexes[key] = index
+            if len(_indexes) > MAX_CACHED_INDEXES:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(key)
+        return index
+
+
+def rotated_segment(path: str, number: int) -> Optional[str]:
+    """第 number 个已轮转分段的实际文件名（未压缩或已压缩），不存在时返回 None"""
+    for candidate in (f"{path}.{number}", f"{path}.{number}{COMPRESSED_SUFFIX}"):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def log_segments(path: str) -> List[str]:
+    """日志的全部分段文件，按从旧到新排列：task.log.N[.gz] ... task.log.1[.gz], task.log"""
+    rotated = []
+    while True:
+        segment = rotated_segment(path, len(rotated) + 1)
+        if segment is None:
+            break
+        rotated.append(segment)
+    return rotated[::-1] + [path]
+
+
+class _Segment:
+    """读取过程中的一个日志分段：已打开的文件及其（已刷新的）索引"""
+
+    def __init__(self, f, index: LineIndex):
+        self.f = f
+        self.index = index
+
+    @property
+    def inode(self) -> int:
+        return self.index.inode
+
+    @property
+    def total_lines(self) -> int:
+        return self.index.total_lines
+
+    @property
+    def last_line_end(self) -> int:
+        return self.index.last_line_end
+
+
+_segment_locks: Dict[str, threading.Lock] = {}
+_segment_locks_lock = threading.Lock()
+
+
+def segment_lock(path: str) -> threading.Lock:
+    """日志分段文件集合的锁：轮转、压缩替换分段与读取方列出并打开分段互斥，读取方不会看到轮转到一半的分段"""
+    key = os.path.abspath(path)
+    with _segment_locks_lock:
+        return _segment_locks.setdefault(key, threading.Lock())
+
+
+@contextmanager
+def _open_segments(path: str):
+    """打开日志的全部分段并锁定各自的索引，作为一个逻辑上连续的日志流读取"""
+    with ExitStack() as stack:
+        files = []
+        # 只在列出和打开分段时持有分段锁，之后的轮转不影响已打开的文件
+        with segment_lock(path):
+            for segment_path in log_segments(path):
+                f = _open_segment(segment_path)
+                if f is not None:
+                    files.append(stack.enter_context(f))
+
+        segments = []
+        seen = set()
+        for f in files:
+            stat = os.fstat(f.fileno())
+            key = (stat.st_dev, stat.st_ino)
+            if key in seen:
+                continue
+            seen.add(key)
+            index = f.index if isinstance(f, CompressedSegment) else _get_index(key)
+            # 按从旧到新的固定顺序加锁
+            stack.enter_context(index.lock)
+            index.refresh(f)
+            segments.append(_Segment(f, index))
+        yield segments
+
+
+def _open_segment(segment_path: str):
+    try:
+        if segment_path.endswith(COMPRESSED_SUFFIX):
+            return CompressedSegment(segment_path)
+        return open(segment_path, 'rb')
+    except FileNotFoundError:
+        return None
+
+
+def _read_tail(f, end: int, count: int) -> List[bytes]:
+    """从 end 位置向前按块读取，返回最后 count 行"""
+    if count <= 0 or end <= 0:
+        return []
+    f.seek(end - 1)
+    # 末尾换行符不构成新的一行
+    if f.read(1) == b'\n':
+        end -= 1
+
+    chunks = []
+    newlines = 0
+    pos = end
+    while pos > 0 and newlines < count:
+        size = min(READ_BLOCK_SIZE, pos)
+        pos -= size
+        f.seek(pos)
+        block = f.read(size)
+        chunks.append(block)
+        newlines += block.count(b'\n')
+
+    data = b''.join(reversed(chunks))
+    return data.split(b'\n')[-count:]
+
+
+def _read_forward(f, end: int, count: int) -> List[bytes]:
+    """从当前位置向后读取至多 count 行，不超过 end"""
+    lines = []
+    remaining = end - f.tell()
+    while len(lines) < count and remaining > 0:
+        line = f.readline(remaining)
+        if not line:
+            break
+        remaining -= len(line)
+        lines.append(line)
+    return lines
+
+
+def read_log_lines(path: str, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+    """分页读取日志行（包含已轮转的历史分段）
+
+    offset 为非负数时从最早的分段开头计算，借助稀疏索引定位；为负数时表示从末尾倒数，
+    从最新分段的末尾向前按块读取。开销与返回的行数成正比，而不是与文件大小成正比。
+
+    Returns:
+        {"lines": [{"line": 行号, "content": 内容}], "total_lines": 总行数,
+         "partial": 最后一行是否尚未写完,
+         "next_cursor": 最后一个完整行之后的游标，可用于 read_log_from 继续读取}
+    """
+    with _open_segments(path) as segments:
+        if not segments:
+            return {"lines": [], "total_lines": 0, "partial": False, "next_cursor": make_cursor(0, 0)}
+
+        total_lines = sum(segment.total_lines for segment in segments)
+        limit = max(limit, 0)
+        raw_lines = []
+
+        if offset < 0:
+            start = max(0, total_lines + offset)
+            remaining = total_lines - start
+            for segment in reversed(segments):
+                if remaining <= 0:
+                    break
+                lines = _read_tail(segment.f, segment.index.scanned, min(remaining, segment.total_lines))
+                raw_lines[:0] = lines
+                remaining -= len(lines)
+            raw_lines = raw_lines[:limit]
+        else:
+            start = min(offset, total_lines)
+            base = 0
+            for segment in segments:
+                if len(raw_lines) >= limit:
+                    break
+                if start < base + segment.total_lines:
+                    segment.index.seek_line(segment.f, max(start - base, 0))
+                    raw_lines.extend(_read_forward(segment.f, segment.index.scanned, limit - len(raw_lines)))
+                base += segment.total_lines
+
+        newest = segments[-1]
+        partial = bool(raw_lines) and start + len(raw_lines) == total_lines and not newest.index.ends_with_newline
+        next_cursor = make_cursor(newest.inode, newest.last_line_end)
+
+    return {
+        "lines": _to_entries(raw_lines, start),
+        "total_lines": total_lines,
+        "partial": partial,
+        "next_cursor": next_cursor,
+    }
+
+
+def iter_log_lines(path: str, reverse: bool = False) -> Iterator[bytes]:
+    """逐行迭代日志的全部分段（不含换行符），reverse=True 时从最新的一行开始倒序迭代
+
+    不建立行索引、不持有索引锁，适合边读边过滤并在找到足够结果后提前结束的场景。
+    """
+    with ExitStack() as stack:
+        with segment_lock(path):
+            files = [stack.enter_context(f) for f in map(_open_segment, log_segments(path)) if f is not None]
+        if reverse:
+            for f in reversed(files):
+                yield from _iter_reverse(f)
+        else:
+            for f in files:
+                for line in iter(f.readline, b''):
+                    yield line.rstrip(b'\n')
+
+
+def _iter_reverse(f) -> Iterator[bytes]:
+    """从文件末尾向前按块读取，倒序逐行返回"""
+    pos = f.seek(0, 2)
+    if pos == 0:
+        return
+    f.seek(pos - 1)
+    # 末尾换行符不构成新的一行
+    if f.read(1) == b'\n':
+        pos -= 1
+    carry = b''
+    while pos > 0:
+        size = min(READ_BLOCK_SIZE, pos)
+        pos -= size
+        f.seek(pos)
+        lines = (f.read(size) + carry).split(b'\n')
+        carry = lines.pop(0)
+        yield from reversed(lines)
+    yield carry
+
+
+def _to_entries(raw_lines: List[bytes], start: int) -> List[Dict[str, Any]]:
+    return [
+        {"line": start + i + 1, "content": line.decode('utf-8', errors='replace').strip()}
+        for i, line in enumerate(raw_lines)
+    ]
+
+
+def make_cursor(inode: Optional[int], offset: int) -> str:
+    """游标格式为 "分段inode:字节偏移"，分段被轮转重命名后游标依然有效"""
+    return f"{inode or 0}:{offset}"
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    try:
+        inode, offset = cursor.split(':', 1)
+        return int(inode), max(int(offset), 0)
+    except (AttributeError, ValueError):
+        return None
+
+
+def read_log_from(path: str, cursor: Optional[str], max_bytes: int = MAX_CURSOR_READ_BYTES,
+                  until: Optional[str] = None) -> Dict[str, Any]:
+    """从游标位置读取新增的完整行，读完一个分段后自动继续读取更新的分段
+
+    游标无效、所在分段已被删除或文件被截断时从最新分段的开头重新读取，并返回 reset=True，
+    调用方应清空已显示的内容。指定 until 游标时最多读取到该位置为止。
+
+    Returns:
+        {"lines": [...], "next_cursor": 新游标, "reset": 是否重置, "has_more": 是否还有未读完的内容,
+         "total_lines": 总行数}
+    """
+    with _open_segments(path) as segments:
+        if not segments:
+            return {"lines": [], "next_cursor": make_cursor(0, 0), "reset": parse_cursor(cursor) != (0, 0),
+                    "total_lines": 0, "has_more": False}
+
+        total_lines = sum(s.total_lines for s in segments)
+        parsed = parse_cursor(cursor)
+        position = None
+        if parsed == (0, 0):
+            # 订阅时日志尚不存在，从最早的分段开始读取
+            position = (0, 0)
+        elif parsed is not None:
+            position = _locate(segments, parsed)
+        reset = position is None
+        i, offset = position or (len(segments) - 1, 0)
+
+        # 每个分段可读取的结束位置；until 所在分段之后的内容都不可读
+        ends = [s.last_line_end for s in segments]
+        bound = _locate(segments, parse_cursor(until), line_boundary=False) if until else None
+        if bound is not None:
+            ends = ends[:bound[0] + 1] + [0] * (len(segments) - bound[0] - 1)
+            ends[bound[0]] = min(ends[bound[0]], bound[1])
+        if offset > ends[i]:
+            return {"lines": [], "next_cursor": make_cursor(segments[i].inode, offset), "reset": reset,
+                    "total_lines": total_lines, "has_more": False}
+
+        while offset >= ends[i] and i < len(segments) - 1 and any(ends[i + 1:]):
+            i, offset = i + 1, 0
+        segment = segments[i]
+
+        segment.f.seek(offset)
+        data = segment.f.read(min(ends[i] - offset, max_bytes))
+        cut = data.rfind(b'\n') + 1
+        if cut:
+            data = data[:cut]
+        elif data:
+            # 单行超过 max_bytes 时仍然完整返回该行
+            data += segment.f.readline(ends[i] - offset - len(data))
+        end = offset + len(data)
+        start_line = sum(s.total_lines for s in segments[:i]) + segment.index.line_number_at(segment.f, offset)
+
+        return {
+            "lines": _to_entries(data.split(b'\n')[:-1], start_line),
+            "next_cursor": make_cursor(segment.inode, end),
+            "reset": reset,
+            "total_lines": total_lines,
+            "has_more": end < ends[i] or any(ends[i + 1:]),
+        }
+
+
+def _locate(segments: List[_Segment], parsed: Optional[Tuple[int, int]],
+            line_boundary: bool = True) -> Optional[Tuple[int, int]]:
+    """将游标解析为 (分段序号, 偏移)，游标所在分段不存在或偏移无效时返回 None
+
+    读取起点必须位于完整行的边界上；作为读取终点时只要求不超过已写入的内容。
+    """
+    if parsed is None:
+        return None
+    i = next((i for i, s in enumerate(segments) if s.inode == parsed[0]), None)
+    if i is None:
+        return None
+    segment = segments[i]
+    if line_boundary:
+        valid = parsed[1] <= segment.last_line_end and _at_line_boundary(segment.f, parsed[1])
+    else:
+        valid = parsed[1] <= segment.index.scanned
+    return (i, parsed[1]) if valid else None
+
+
+def current_cursor(path: str) -> str:
+    """返回指向日志当前末尾（最新分段最后一个完整行之后）的游标"""
+    with _open_segments(path) as segments:
+        if not segments:
+            return make_cursor(0, 0)
+        return make_cursor(segments[-1].inode, segments[-1].last_line_end)
+
+
+def execution_index_path(path: str) -> str:
+    return f"{path}.idx"
+
+
+def load_execution_index(path: str) -> "OrderedDict[str, Dict[str, Any]]":
+    """读取日志的执行索引，按执行开始的先后顺序返回 execution_id -> 记录
+
+    每次执行在开始和结束时各追加一条记录，后写入的字段覆盖先写入的字段。
+    """
+    records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    try:
+        with open(execution_index_path(path), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 写入过程中被截断的最后一行
+                    continue
+                execution_id = record.get('execution_id')
+                if execution_id:
+                    merged = records.setdefault(execution_id, {})
+                    merged.update({k: v for k, v in record.items() if v is not None or k not in merged})
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def list_log_executions(path: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """列出日志中记录的执行，最新的在前；available 表示该次执行的输出是否仍保留在日志分段中"""
+    live = set()
+    for segment_path in log_segments(path):
+        try:
+            live.add(os.stat(segment_path).st_ino)
+        except OSError:
+            continue
+    records = list(load_execution_index(path).values())[::-1][:max(limit, 0)]
+    for record in records:
+        start = parse_cursor(record.get('start'))
+        record['available'] = start is not None and start[0] in live
+    return records
+
+
+def event_log_path(path: str) -> str:
+    """任务生命周期事件日志（JSON Lines）的路径：logs/task_x.log -> logs/task_x.events.jsonl"""
+    root = path[:-len('.log')] if path.endswith('.log') else path
+    return f"{root}.events.jsonl"
+
+
+def read_task_events(path: str, execution_id: Optional[str] = None, event: Optional[str] = None,
+                     limit: int = 100) -> List[Dict[str, Any]]:
+    """读取任务日志对应的生命周期事件，可按执行ID和事件类型过滤，返回最近的 limit 条（按时间先后排列）
+
+    从事件日志末尾倒序读取，找到足够的事件后即停止。
+    """
+    events = []
+    if limit <= 0:
+        return events
+    for line in iter_log_lines(event_log_path(path), reverse=True):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # 写入过程中被截断的最后一行
+            continue
+        if execution_id and record.get('execution_id') != execution_id:
+            continue
+        if event and record.get('event') != event:
+            continue
+        events.append(record)
+        if len(events) >= limit:
+            break
+    return events[::-1]
+
+
+def read_execution_log(path: str, execution_id: str, cursor: Optional[str] = None,
+                       max_bytes: int = MAX_CURSOR_READ_BYTES) -> Optional[Dict[str, Any]]:
+    """读取某次执行的输出：直接定位到其起始游标，读取到结束游标为止
+
+    执行仍在运行时读取到日志当前末尾；可以传入上次返回的 next_cursor 继续读取。
+    执行不在索引中时返回 None；其输出已被轮转删除时返回 available=False。
+    """
+    record = load_execution_index(path).get(execution_id)
+    if record is None:
+        return None
+    result = read_log_from(path, cursor or record.get('start'), max_bytes, until=record.get('end'))
+    if result['reset']:
+        return {"lines": [], "next_cursor": None, "has_more": False, "available": False,
+                "total_lines": result['total_lines'], "execution": record}
+    result.update(available=True, execution=record)
+    del result['reset']
+    return result
+
+
+def _at_line_boundary(f, offset: int) -> bool:
+    if offset == 0:
+        return True
+    f.seek(offset - 1)
+    return f.read(1) == b'\n'
+
+
+class _LogWatch:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.subscribers = 0
+
+    def wait(self, version: int, timeout: float) -> bool:
+        """等待版本号变化（即有新内容写入），超时返回 False"""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.version != version, timeout)
+
+
+_watches: Dict[str, _LogWatch] = {}
+_watches_lock = threading.Lock()
+
+
+def notify_log_write(path: str):
+    """日志写入方调用：唤醒正在订阅该日志的读取方。没有订阅者时只有一次字典查找的开销"""
+    watch = _watches.get(os.path.abspath(path))
+    if watch is None:
+        return
+    with watch.condition:
+        watch.version += 1
+        watch.condition.notify_all()
+
+
+@contextmanager
+def watch_log(path: str):
+    """订阅日志写入通知，用于 SSE 等长连接推送"""
+    key = os.path.abspath(path)
+    with _watches_lock:
+        watch = _watches.setdefault(key, _LogWatch())
+        watch.subscribers += 1
+    try:
+        yield watch
+    finally:
+        with _watches_lock:
+            watch.subscribers -= 1
+            if watch.subscribers == 0:
+                _watches.pop(key, None)
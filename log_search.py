@@ -0,0 +1,353 @@
+import os
+import glob
+import sqlite3
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from log_archive import COMPRESSED_SUFFIX, CompressedSegment
+from log_reader import log_segments
+from logger_helper import LoggerHelper
+from project_paths import resolve_path
+from sqlite_pool import SQLiteReadPool
+
+# 每次从文件中读取并写入索引的最大字节数
+INDEX_CHUNK_BYTES = 4 * 1024 * 1024
+# 用于识别已轮转的活动文件的文件开头字节数
+HEAD_BYTES = 1024
+# trigram 分词要求关键词至少 3 个字符
+MIN_QUERY_LENGTH = 3
+
+
+class LogSearchIndex:
+    """系统日志与任务日志的全文检索索引
+
+    后台线程定期跟踪 logs/ 目录下的 *.log 和各任务配置的日志文件（包含已轮转和已压缩的分段），
+    把新增的完整行写入 SQLite FTS5（trigram 分词）索引，检索不再需要读取日志文件：
+    - 每个日志流记录已索引到的活动文件 inode 和偏移，每次只读取新增的内容
+    - 活动文件被轮转后，按文件开头的内容找到旧文件所在的分段，读完剩余部分后再索引更新的分段
+    - 每行记录其在日志流中的逻辑位置；分段被轮转删除、日志被清空或截断后，
+      按磁盘上仍保留的数据量删除已失效的索引行
+
+    trigram 分词需要 SQLite 3.34 及以上版本，不支持时检索功能被禁用（enabled 为 False），调度器照常启动。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, logs_dir: Optional[str] = None,
+                 interval: Optional[float] = None,
+                 task_logs: Optional[Callable[[], Dict[str, str]]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = resolve_path(db_path or os.getenv('LOG_SEARCH_DB', 'logs/log_search.db'))
+        self.logs_dir = resolve_path(logs_dir or os.getenv('LOG_SEARCH_DIR', 'logs'))
+        # 返回 {任务日志路径: 任务ID} 的回调，任务日志可以配置在 logs/ 之外
+        self.task_logs = task_logs
+        self.interval = interval if interval is not None else float(os.getenv('LOG_SEARCH_INTERVAL', '2'))
+        self._stop_event = threading.Event()
+        self._indexer_thread = None
+        self._read_pool = SQLiteReadPool(lambda: self._connect(check_same_thread=False))
+        self.enabled = True
+        # 日志流 -> 各分段 (文件名, inode, 大小) 的快照，分段变化时才重新计算磁盘上的数据量
+        self._segment_snapshots: Dict[str, tuple] = {}
+        self._init_db()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=check_same_thread)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self):
+        """创建数据表、全文索引和同步触发器"""
+        if not self._trigram_supported():
+            self.enabled = False
+            self.logger.warning(f"当前 SQLite ({sqlite3.sqlite_version}) 不支持 FTS5 trigram 分词（需要 3.34 及以上），"
+                                f"日志检索功能已禁用")
+            return
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS log_sources (
+                    path TEXT PRIMARY KEY,
+                    task_id TEXT,
+                    inode INTEGER,
+                    offset INTEGER NOT NULL DEFAULT 0,
+                    indexed_bytes INTEGER NOT NULL DEFAULT 0,
+                    last_timestamp TEXT,
+                    head BLOB
+                );
+                CREATE TABLE IF NOT EXISTS log_lines (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    task_id TEXT,
+                    level TEXT,
+                    timestamp TEXT,
+                    pos INTEGER NOT NULL,
+                    content TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_log_lines_source_pos ON log_lines (source, pos);
+                CREATE VIRTUAL TABLE IF NOT EXISTS log_lines_fts USING fts5(
+                    content, content='log_lines', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS log_lines_ai AFTER INSERT ON log_lines BEGIN
+                    INSERT INTO log_lines_fts (rowid, content) VALUES (new.id, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS log_lines_ad AFTER DELETE ON log_lines BEGIN
+                    INSERT INTO log_lines_fts (log_lines_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                END;
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _trigram_supported() -> bool:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE probe USING fts5(content, tokenize='trigram')")
+            return True
+        except sqlite3.Error:
+            return False
+        finally:
+            conn.close()
+
+    def start(self):
+        """启动后台索引线程"""
+        if not self.enabled or (self._indexer_thread and self._indexer_thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._indexer_thread = threading.Thread(target=self._indexer_worker, name="log-search-indexer", daemon=True)
+        self._indexer_thread.start()
+        self.logger.info(f"日志检索索引已启动: {self.db_path}")
+
+    def stop(self):
+        """停止后台索引线程"""
+        if self._indexer_thread and self._indexer_thread.is_alive():
+            self._stop_event.set()
+            self._indexer_thread.join(timeout=10)
+            self.logger.info("日志检索索引已停止")
+        self._read_pool.close()
+
+    def _indexer_worker(self):
+        """后台索引线程：单轮索引出现异常（如数据库被锁定）时只记录错误，下一轮继续"""
+        conn = self._connect()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self.index_once(conn)
+                except Exception as e:
+                    self.logger.error(f"日志检索索引失败，将在下一轮重试: {e}")
+                self._stop_event.wait(self.interval)
+        finally:
+            conn.close()
+
+    def index_once(self, conn: Optional[sqlite3.Connection] = None):
+        """对所有日志流执行一次增量索引"""
+        own_conn = conn is None
+        conn = conn or self._connect()
+        try:
+            states = {row["path"]: dict(row) for row in conn.execute("SELECT * FROM log_sources")}
+            task_ids = {os.path.abspath(path): task_id for path, task_id in (self.task_logs() if self.task_logs else {}).items()}
+            paths = {os.path.abspath(path) for path in glob.glob(os.path.join(self.logs_dir, '*.log'))}
+            for path in sorted(paths | set(task_ids) | set(states)):
+                try:
+                    self._index_source(conn, path, states.get(path), task_ids.get(path))
+                except (OSError, sqlite3.Error, ValueError) as e:
+                    self.logger.error(f"索引日志 {path} 失败: {e}")
+        finally:
+            if own_conn:
+                conn.close()
+
+    @staticmethod
+    def _task_id_for(path: str) -> Optional[str]:
+        name = os.path.basename(path)
+        if name.startswith('task_') and name.endswith('.log'):
+            return name[len('task_'):-len('.log')]
+        return None
+
+    def _index_source(self, conn: sqlite3.Connection, path: str, state: Optional[Dict[str, Any]],
+                      task_id: Optional[str] = None):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        if state is None:
+            if stat is None:
+                return
+            state = {"path": path, "task_id": task_id or self._task_id_for(path), "inode": stat.st_ino,
+                     "offset": 0, "indexed_bytes": 0, "last_timestamp": None, "head": b''}
+            # 首次发现的日志流：先按从旧到新的顺序索引已轮转的分段
+            for segment in log_segments(path)[:-1]:
+                self._index_file(conn, state, segment, 0)
+        elif (stat is None or stat.st_ino != state["inode"]
+              or not self._read_head(path, stat.st_ino).startswith(state["head"])):
+            # 活动文件已被轮转（可能不止一次），或连同历史分段一起被清空；
+            # 轮转时旧文件被压缩删除后，新文件可能复用同一个 inode，因此还要比较文件开头的内容
+            self._index_rotated(conn, path, state)
+            state.update(inode=stat.st_ino if stat else None, offset=0, head=b'')
+        elif stat.st_size < state["offset"]:
+            # 文件被原地截断
+            state.update(offset=0, head=b'')
+
+        if task_id:
+            state["task_id"] = task_id
+        if stat is not None:
+            state["offset"] = self._index_file(conn, state, path, state["offset"])
+            if len(state["head"]) < HEAD_BYTES and state["offset"] > len(state["head"]):
+                state["head"] = self._read_head(path, state["inode"])
+        self._prune(conn, path, state)
+        with conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO log_sources
+                   (path, task_id, inode, offset, indexed_bytes, last_timestamp, head)
+                   VALUES (:path, :task_id, :inode, :offset, :indexed_bytes, :last_timestamp, :head)""",
+                state
+            )
+
+    def _index_rotated(self, conn: sqlite3.Connection, path: str, state: Dict[str, Any]):
+        """活动文件被轮转后，读完旧文件剩余的部分，再按从旧到新的顺序索引之后轮转出的分段
+
+        未压缩的分段按 inode 和文件开头的内容识别旧文件；系统日志轮转时直接压缩为新文件，只能按文件开头的内容识别。
+        找不到旧文件（日志已被清空或旧文件已被删除）时不再补读。
+        """
+        rotated = log_segments(path)[:-1]
+        for i in range(len(rotated) - 1, -1, -1):
+            segment = rotated[i]
+            if segment.endswith(COMPRESSED_SUFFIX):
+                matched = bool(state["head"]) and self._read_head(segment).startswith(state["head"])
+            else:
+                head = self._read_head(segment, state["inode"])
+                matched = bool(head) and head.startswith(state["head"])
+            if matched:
+                self._index_file(conn, state, segment, state["offset"])
+                for newer in rotated[i + 1:]:
+                    self._index_file(conn, state, newer, 0)
+                return
+
+    @staticmethod
+    def _read_head(path: str, inode: Optional[int] = None) -> bytes:
+        """读取文件开头的内容；指定 inode 时文件已被替换则返回空"""
+        try:
+            f = CompressedSegment(path) if path.endswith(COMPRESSED_SUFFIX) else open(path, 'rb')
+        except FileNotFoundError:
+            return b''
+        with f:
+            if inode is not None and os.fstat(f.fileno()).st_ino != inode:
+                return b''
+            return f.read(HEAD_BYTES)
+
+    def _index_file(self, conn: sqlite3.Connection, state: Dict[str, Any], path: str, offset: int) -> int:
+        """从 offset 开始索引文件中的完整行，返回索引到的位置"""
+        try:
+            f = CompressedSegment(path) if path.endswith(COMPRESSED_SUFFIX) else open(path, 'rb')
+        except FileNotFoundError:
+            return offset
+        with f:
+            f.seek(offset)
+            while True:
+                data = f.read(INDEX_CHUNK_BYTES)
+                cut = data.rfind(b'\n') + 1
+                if cut == 0 and len(data) < INDEX_CHUNK_BYTES:
+                    # 没有新的完整行
+                    break
+                data = data[:cut] if cut else data
+                self._insert_lines(conn, state, data)
+                offset += len(data)
+                f.seek(offset)
+        return offset
+
+    def _insert_lines(self, conn: sqlite3.Connection, state: Dict[str, Any], data: bytes):
+        rows = []
+        pos = state["indexed_bytes"]
+        for raw in data.split(b'\n'):
+            line = raw.decode('utf-8', errors='replace').strip()
+            if line:
+                entry = LoggerHelper._parse_log_line(line)
+                if entry["timestamp"]:
+                    state["last_timestamp"] = entry["timestamp"][:19]
+                    level = entry["level"]
+                else:
+                    # 任务输出、异常堆栈等没有时间戳的行沿用前一条日志的时间
+                    level = None
+                rows.append((state["path"], state["task_id"], level, state["last_timestamp"], pos, line))
+            pos += len(raw) + 1
+        state["indexed_bytes"] += len(data)
+        with conn:
+            conn.executemany(
+                "INSERT INTO log_lines (source, task_id, level, timestamp, pos, content) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def _prune(self, conn: sqlite3.Connection, path: str, state: Dict[str, Any]):
+        """删除内容已不在磁盘上的索引行
+
+        日志流中最旧的内容总是最先被删除（轮转、磁盘预算清理），清空或截断则删除全部旧内容，
+        因此逻辑位置小于“已索引字节数 - 磁盘上剩余字节数”的行都已失效。
+        """
+        snapshot = []
+        for segment in log_segments(path):
+            try:
+                stat = os.stat(segment)
+            except FileNotFoundError:
+                continue
+            snapshot.append((segment, stat.st_ino, stat.st_size))
+        snapshot = tuple(snapshot)
+        if self._segment_snapshots.get(path) == snapshot:
+            return
+        self._segment_snapshots[path] = snapshot
+
+        on_disk = 0
+        for segment, _, size in snapshot:
+            if segment.endswith(COMPRESSED_SUFFIX):
+                with CompressedSegment(segment) as f:
+                    size = f.index.scanned
+            on_disk += size
+        cutoff = state["indexed_bytes"] - on_disk
+        if cutoff > 0:
+            with conn:
+                deleted = conn.execute("DELETE FROM log_lines WHERE source = ? AND pos < ?", (path, cutoff)).rowcount
+            if deleted:
+                self.logger.debug(f"已从检索索引中删除 {path} 的 {deleted} 行失效日志")
+
+    def search(self, query: str, task_id: Optional[str] = None, level: Optional[str] = None,
+               since: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """按关键词检索日志行（子串匹配），结果按写入顺序从新到旧排列
+
+        query 作为整体短语匹配，至少 3 个字符；since 为 ISO 格式时间，只返回该时间之后的日志。
+        检索功能被禁用时抛出 RuntimeError。
+        """
+        if not self.enabled:
+            raise RuntimeError(f"当前 SQLite ({sqlite3.sqlite_version}) 不支持 FTS5 trigram 分词，日志检索不可用")
+        if len(query) < MIN_QUERY_LENGTH:
+            raise ValueError(f"检索关键词至少需要 {MIN_QUERY_LENGTH} 个字符")
+
+        where = ["log_lines_fts MATCH ?"]
+        params: List[Any] = ['"' + query.replace('"', '""') + '"']
+        if task_id:
+            where.append("l.task_id = ?")
+            params.append(task_id)
+        if level:
+            where.append("l.level = ?")
+            params.append(level.upper())
+        if since:
+            where.append("l.timestamp >= ?")
+            params.append(datetime.fromisoformat(since.replace('T', ' ')).strftime('%Y-%m-%d %H:%M:%S'))
+
+        started = time.perf_counter()
+        with self._read_pool.connection() as conn:
+            rows = conn.execute(
+                f"""SELECT l.* FROM log_lines_fts JOIN log_lines l ON l.id = log_lines_fts.rowid
+                    WHERE {' AND '.join(where)} ORDER BY log_lines_fts.rowid DESC LIMIT ?""",
+                params + [limit + 1]
+            ).fetchall()
+        items = [
+            {"source": os.path.basename(row["source"]), "task_id": row["task_id"], "level": row["level"],
+             "timestamp": row["timestamp"], "content": row["content"]}
+            for row in rows[:limit]
+        ]
+        return {"items": items, "has_more": len(rows) > limit,
+                "took_ms": round((time.perf_counter() - started) * 1000, 2)}
@@ -0,0 +1,397 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from log_archive import COMPRESS_ROTATED, COMPRESSED_SUFFIX, compress_segment
+from log_reader import (notify_log_write, log_segments, rotated_segment, segment_lock, make_cursor,
+                        execution_index_path, load_execution_index, event_log_path)
+
+logger = logging.getLogger(__name__)
+
+# 活动日志文件超过该大小后轮转（字节）
+LOG_MAX_BYTES = int(os.getenv('TASK_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+# 保留的历史日志文件数量（task.log.1 ... task.log.N）
+LOG_BACKUP_COUNT = int(os.getenv('TASK_LOG_BACKUP_COUNT', '5'))
+# 活动日志文件写入超过该时长后轮转（小时），0 表示只按大小轮转
+LOG_ROTATE_INTERVAL_HOURS = float(os.getenv('TASK_LOG_ROTATE_INTERVAL_HOURS', '0'))
+# 执行器生命周期事件（开始、结束、重试等）的记录格式：
+# text 只在任务日志中写入文本行；jsonl 只写入独立的事件日志 task_x.events.jsonl，任务日志中只保留子进程输出；both 两者都写
+EVENT_LOG_FORMAT = os.getenv('TASK_LOG_EVENT_FORMAT', 'text').lower()
+
+
+class RotatingLogWriter:
+    """任务日志写入器
+
+    以追加模式写入活动日志文件，每次写入后立即刷新并通知日志订阅方。
+    活动文件超过大小或时长限制时通过重命名轮转（task.log -> task.log.1 -> ...），不复制文件内容；
+    轮转只发生在完整行之后，保证各个分段都以行边界结束。
+    提供 write/flush/tell/name，可以替代普通文件对象使用。
+
+    每次执行的输出在日志流中的起止位置以游标形式记录在索引文件 task.log.idx 中（JSON Lines），
+    查看某次执行的输出时可以直接定位，不需要扫描整个日志。
+    已轮转的分段由后台线程压缩为带块索引的 task.log.N.gz，读取接口仍可按页随机访问；
+    最新的已轮转分段 task.log.1 保持未压缩，正在跟随日志末尾的读取方的游标不会因压缩而失效。
+    """
+
+    def __init__(self, path: str, max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT,
+                 rotate_interval_hours: float = LOG_ROTATE_INTERVAL_HOURS):
+        self.name = path
+        self.max_bytes = max_bytes
+        self.backup_count = max(backup_count, 0)
+        self.rotate_interval = rotate_interval_hours * 3600
+        self._lock = threading.RLock()
+        self._file = None
+        self._size = 0
+        self._inode = None
+        self._ends_with_newline = True
+        self._segment_started = time.time()
+        self._refs = 0
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.name) or '.', exist_ok=True)
+        self._file = open(self.name, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._ends_with_newline = self._size == 0 or self._last_byte() == b'\n'
+        self._segment_started = self._detect_segment_start()
+
+    def _last_byte(self) -> bytes:
+        with open(self.name, 'rb') as f:
+            f.seek(self._size - 1)
+            return f.read(1)
+
+    def _detect_segment_start(self) -> float:
+        """推断活动分段的开始时间：上一个分段的最后修改时间即为本分段的开始时间"""
+        if self._size == 0:
+            return time.time()
+        for path in (f"{self.name}.1", self.name):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                continue
+        return time.time()
+
+    def _ensure_open(self):
+        if self._file is None:
+            self._open()
+        else:
+            self._reopen_if_reset()
+
+    def _reopen_if_reset(self):
+        """活动文件被其他进程清空、删除或替换（如 clear_logs.py）时重新打开，使大小和 inode 与磁盘一致"""
+        try:
+            st = os.stat(self.name)
+            if st.st_ino == self._inode and st.st_size >= self._size:
+                return
+        except FileNotFoundError:
+            pass
+        self._file.close()
+        self._file = None
+        self._open()
+
+    def write(self, text: str):
+        with self._lock:
+            self._ensure_open()
+            self._file.write(text)
+            self._file.flush()
+            self._size += len(text.encode('utf-8'))
+            if text:
+                self._ends_with_newline = text.endswith('\n')
+            if text.endswith('\n') and self._should_rotate():
+                self._rotate()
+        notify_log_write(self.name)
+
+    def flush(self):
+        """每次写入都已刷新，保留该方法以兼容文件对象接口"""
+
+    def tell(self) -> int:
+        with self._lock:
+            return self._size
+
+    def position(self) -> str:
+        """返回当前写入位置（日志末尾）的游标"""
+        with self._lock:
+            self._ensure_open()
+            return make_cursor(self._inode, self._size)
+
+    def begin_execution(self, execution_id: str, start_time: str) -> str:
+        """标记一次执行的开始，返回其输出在日志中的起始游标
+
+        起始位置总是落在行边界上：若日志末尾是其他执行尚未写完的行，先补一个换行符。
+        """
+        with self._lock:
+            self._ensure_open()
+            if not self._ends_with_newline:
+                self.write('\n')
+            start = self.position()
+            self._append_index({"execution_id": execution_id, "start": start, "end": None,
+                                "status": "running", "start_time": start_time})
+            return start
+
+    def end_execution(self, execution_id: str, status: str, end_time: str) -> str:
+        """标记一次执行的结束，返回其输出在日志中的结束游标
+
+        结束记录不重复写入起始游标：执行期间起始分段可能已被压缩，索引中的起始游标已随之更新。
+        """
+        with self._lock:
+            end = self.position()
+            self._append_index({"execution_id": execution_id, "end": end, "status": status, "end_time": end_time})
+            return end
+
+    def _append_index(self, record: Dict):
+        try:
+            with open(execution_index_path(self.name), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logger.error(f"写入日志执行索引 {self.name} 失败: {e}")
+
+    def _discarded_inode(self) -> Optional[int]:
+        """本次轮转将被删除的分段的 inode"""
+        path = self.name if self.backup_count == 0 else rotated_segment(self.name, self.backup_count)
+        try:
+            return os.stat(path).st_ino
+        except (OSError, TypeError):
+            return None
+
+    def _compact_index(self, discarded: Optional[int]):
+        """轮转后重写执行索引：合并同一执行的开始/结束记录，删除输出所在分段已被删除的执行
+
+        被删除分段的 inode 可能立即被新的活动文件复用，因此按轮转前记录的 inode 排除，
+        而不能只依据分段文件是否存在。
+        """
+        index_path = execution_index_path(self.name)
+        if not os.path.exists(index_path):
+            return
+        live = set()
+        for segment in log_segments(self.name):
+            try:
+                live.add(os.stat(segment).st_ino)
+            except OSError:
+                continue
+        live.discard(discarded)
+        records = [r for r in load_execution_index(self.name).values()
+                   if r.get('start') and int(r['start'].split(':', 1)[0]) in live]
+        self._write_index(records)
+
+    def _remap_index(self, old_inode: int, new_inode: int):
+        """分段被压缩后 inode 改变，将执行索引中指向原分段的游标改为指向压缩后的分段"""
+        if not os.path.exists(execution_index_path(self.name)):
+            return
+        prefix = f"{old_inode}:"
+        records = list(load_execution_index(self.name).values())
+        for record in records:
+            for key in ('start', 'end'):
+                if record.get(key) and record[key].startswith(prefix):
+                    record[key] = f"{new_inode}:{record[key][len(prefix):]}"
+        self._write_index(records)
+
+    def _write_index(self, records: List[Dict]):
+        index_path = execution_index_path(self.name)
+        tmp_path = f"{index_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            logger.error(f"重写日志执行索引 {index_path} 失败: {e}")
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes > 0 and self._size >= self.max_bytes:
+            return True
+        return self.rotate_interval > 0 and self._size > 0 and \
+            time.time() - self._segment_started >= self.rotate_interval
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        discarded = self._discarded_inode()
+        try:
+            with segment_lock(self.name):
+                self._shift_segments()
+            logger.debug(f"已轮转日志文件: {self.name}")
+        except OSError as e:
+            logger.error(f"轮转日志文件 {self.name} 失败: {e}")
+        self._open()
+        self._compact_index(discarded)
+        if COMPRESS_ROTATED and self.backup_count > 0:
+            segment_compressor.submit(self.name)
+
+    def _shift_segments(self):
+        """将各分段编号加一，活动文件成为 task.log.1，超出保留数量的最旧分段被删除"""
+        if self.backup_count == 0:
+            os.remove(self.name)
+        else:
+            oldest = rotated_segment(self.name, self.backup_count)
+            if oldest:
+                os.remove(oldest)
+            # 分段可能是未压缩或已压缩的，重命名时保留原有后缀
+            for i in range(self.backup_count - 1, 0, -1):
+                segment = rotated_segment(self.name, i)
+                if segment:
+                    suffix = COMPRESSED_SUFFIX if segment.endswith(COMPRESSED_SUFFIX) else ''
+                    os.replace(segment, f"{self.name}.{i + 1}{suffix}")
+            os.replace(self.name, f"{self.name}.1")
+
+    def replace_with_compressed(self, inode: int, compressed_path: str) -> bool:
+        """用压缩文件替换 inode 对应的未压缩分段
+
+        分段在压缩期间可能因轮转而改名或被删除，因此在写入锁内按 inode 重新查找其当前位置。
+        """
+        with self._lock:
+            for i in range(1, self.backup_count + 1):
+                segment = f"{self.name}.{i}"
+                try:
+                    if os.stat(segment).st_ino != inode:
+                        continue
+                except FileNotFoundError:
+                    continue
+                with segment_lock(self.name):
+                    os.replace(compressed_path, segment + COMPRESSED_SUFFIX)
+                    os.remove(segment)
+                self._remap_index(inode, os.stat(segment + COMPRESSED_SUFFIX).st_ino)
+                return True
+        os.remove(compressed_path)
+        return False
+
+    def clear(self):
+        """清空活动日志并删除所有历史分段"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            remove_log_segments(self.name)
+        notify_log_write(self.name)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SegmentCompressor:
+    """在后台线程中压缩已轮转的日志分段，不阻塞写入日志的任务线程"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, path: str):
+        with self._lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-compressor", daemon=True)
+                self._thread.start()
+        self._queue.put(path)
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            with self._lock:
+                self._pending.discard(path)
+            try:
+                self.compress_rotated(path)
+            except Exception as e:
+                logger.error(f"压缩日志分段 {path} 失败: {e}")
+
+    def compress_rotated(self, path: str):
+        """压缩日志中除 task.log.1 以外所有尚未压缩的已轮转分段"""
+        for segment in log_segments(path)[:-2]:
+            if segment.endswith(COMPRESSED_SUFFIX):
+                continue
+            try:
+                src = open(segment, 'rb')
+            except FileNotFoundError:
+                continue
+            with src:
+                inode = os.fstat(src.fileno()).st_ino
+                compressed_path = f"{path}.compress-{inode}{COMPRESSED_SUFFIX}"
+                compress_segment(src, compressed_path)
+            with task_log_writer(path) as writer:
+                if writer.replace_with_compressed(inode, compressed_path):
+                    logger.debug(f"已压缩日志分段: {segment}")
+
+
+segment_compressor = SegmentCompressor()
+
+
+_writers: Dict[str, RotatingLogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def acquire_log_writer(path: str) -> RotatingLogWriter:
+    """获取日志文件的共享写入器，同一任务的并发执行共用一个写入器以协调轮转"""
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = RotatingLogWriter(key)
+            _writers[key] = writer
+        writer._refs += 1
+        return writer
+
+
+def release_log_writer(writer: RotatingLogWriter):
+    with _writers_lock:
+        writer._refs -= 1
+        if writer._refs <= 0:
+            _writers.pop(writer.name, None)
+            writer.close()
+
+
+@contextmanager
+def task_log_writer(path: str):
+    writer = acquire_log_writer(path)
+    try:
+        yield writer
+    finally:
+        release_log_writer(writer)
+
+
+def text_events_enabled() -> bool:
+    """生命周期事件是否以文本行写入任务日志"""
+    return EVENT_LOG_FORMAT != 'jsonl'
+
+
+def write_task_event(path: str, record: Dict) -> None:
+    """向任务日志对应的事件日志追加一条 JSON 事件（未启用 JSON Lines 格式时不写入）"""
+    if EVENT_LOG_FORMAT not in ('jsonl', 'both'):
+        return
+    line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+    with task_log_writer(event_log_path(path)) as writer:
+        writer.write(line)
+
+
+def clear_log(path: str):
+    """清空日志及其事件日志（含历史分段），正在写入的执行会在清空后的新文件中继续写入"""
+    for log_path in (path, event_log_path(path)):
+        with task_log_writer(log_path) as writer:
+            writer.clear()
+
+
+def remove_task_logs(path: str) -> List[str]:
+    """删除任务日志、事件日志及其全部历史分段，返回被删除的文件列表"""
+    return remove_log_segments(path) + remove_log_segments(event_log_path(path))
+
+
+def remove_log_segments(path: str) -> List[str]:
+    """删除活动日志文件及其所有历史分段和执行索引，返回被删除的文件列表"""
+    removed = []
+    with segment_lock(path):
+        for segment in log_segments(path) + [execution_index_path(path)]:
+            try:
+                os.remove(segment)
+                removed.append(segment)
+            except FileNotFoundError:
+                pass
+    return removed
@@ -1,17 +1,158 @@
 
 import os
+import atexit
 import logging
+import queue
 import re
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Union
+
+from log_archive import enable_rotated_compression
+from log_reader import iter_log_lines
+from project_paths import resolve_path
+
+# 根日志记录器的异步队列容量，队列满时按级别丢弃日志并在之后输出汇总
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# 队列满时 WARNING 及以上级别的日志最多等待的秒数，超时后同样丢弃
+LOG_QUEUE_BLOCK_TIMEOUT = float(os.getenv('LOG_QUEUE_BLOCK_TIMEOUT', '0.1'))
+
+
+class BoundedQueueHandler(QueueHandler):
+    """写入有界队列的日志处理器，调用线程不再等待控制台和磁盘 I/O
+
+    队列已满时，低于 WARNING 的日志直接丢弃，WARNING 及以上的日志最多等待 LOG_QUEUE_BLOCK_TIMEOUT 秒；
+    被丢弃的日志按级别计数，队列恢复后写入一条汇总日志。
+    同时统计调用线程在日志上花费的时间，见 get_logging_stats。
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._stats_lock = threading.Lock()
+        self._dropped = Counter()
+        self.dropped_total = Counter()
+        self.enqueued = 0
+        self.high_water = 0
+        self.caller_seconds = 0.0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        started = time.perf_counter()
+        try:
+            return super().handle(record)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self.caller_seconds += elapsed
+
+    def enqueue(self, record: logging.LogRecord):
+        with self._stats_lock:
+            dropped, self._dropped = self._dropped, Counter()
+        if dropped and not self._put(self._drop_summary(dropped), block=False):
+            # 汇总未能写入队列，留到下一次再输出
+            with self._stats_lock:
+                self._dropped.update(dropped)
+        if not self._put(record, block=record.levelno >= logging.WARNING):
+            with self._stats_lock:
+                self._dropped[record.levelname] += 1
+                self.dropped_total[record.levelname] += 1
+
+    def _put(self, record: logging.LogRecord, block: bool) -> bool:
+        try:
+            if block:
+                self.queue.put(record, timeout=LOG_QUEUE_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            return False
+        with self._stats_lock:
+            self.enqueued += 1
+            self.high_water = max(self.high_water, self.queue.qsize())
+        return True
+
+    @staticmethod
+    def _drop_summary(dropped: Counter) -> logging.LogRecord:
+        detail = ", ".join(f"{level}: {count}" for level, count in sorted(dropped.items()))
+        return logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f"日志队列已满，丢弃了 {sum(dropped.values())} 条日志 ({detail})", None, None
+        )
+
+
+class TimedQueueListener(QueueListener):
+    """统计后台线程写出日志所花时间的 QueueListener"""
+
+    def __init__(self, log_queue: queue.Queue, *handlers, respect_handler_level: bool = False):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.handled = 0
+        self.handler_seconds = 0.0
+        self.running = False
+
+    def start(self):
+        super().start()
+        self.running = True
+
+    def stop(self):
+        if self.running:
+            self.running = False
+            super().stop()
+
+    def handle(self, record: logging.LogRecord):
+        started = time.perf_counter()
+        super().handle(record)
+        self.handler_seconds += time.perf_counter() - started
+        self.handled += 1
+
+
+_queue_handler: Optional[BoundedQueueHandler] = None
+_queue_listener: Optional[TimedQueueListener] = None
+
+
+def stop_logging():
+    """停止后台日志线程，写出队列中剩余的日志"""
+    if _queue_listener is not None:
+        _queue_listener.stop()
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """返回异步日志管道的统计信息：队列深度、丢弃数量和日志耗时"""
+    handler, listener = _queue_handler, _queue_listener
+    if handler is None:
+        return {"enabled": False}
+    with handler._stats_lock:
+        enqueued = handler.enqueued
+        dropped = dict(handler.dropped_total)
+        caller_seconds = handler.caller_seconds
+        high_water = handler.high_water
+    handled = listener.handled if listener else 0
+    handler_seconds = listener.handler_seconds if listener else 0.0
+    calls = enqueued + sum(dropped.values())
+    return {
+        "enabled": True,
+        "queue_size": handler.queue.maxsize,
+        "queue_depth": handler.queue.qsize(),
+        "queue_high_water": high_water,
+        "enqueued": enqueued,
+        "handled": handled,
+        "dropped": dropped,
+        "dropped_total": sum(dropped.values()),
+        "caller_seconds": round(caller_seconds, 6),
+        "caller_avg_us": round(caller_seconds / calls * 1e6, 2) if calls else 0.0,
+        "handler_seconds": round(handler_seconds, 6),
+        "handler_avg_us": round(handler_seconds / handled * 1e6, 2) if handled else 0.0,
+    }
+
 
 def setup_logging():
     """
     配置全局日志系统。
     此函数应在应用程序启动时只调用一次。
     它会配置根日志记录器，所有通过 logging.getLogger(__name__) 创建的子记录器都会继承此配置。
+    根日志记录器只挂载一个写入有界队列的处理器，控制台和文件输出由后台线程完成。
     """
+    global _queue_handler, _queue_listener
     root_logger = logging.getLogger()
     if root_logger.hasHandlers():
         return
@@ -25,7 +166,7 @@ def setup_logging():
     logging.getLogger('apscheduler.scheduler').setLevel(logging.WARNING)
     logging.getLogger('watchdog.observers.inotify_buffer').setLevel(logging.WARNING)
 
-    logs_dir = 'logs'
+    logs_dir = resolve_path('logs')
     os.makedirs(logs_dir, exist_ok=True)
 
     # 创建一个通用的格式化器
@@ -38,7 +179,6 @@ def setup_logging():
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
 
     # 文件处理器记录所有级别
     sys_log_file = os.path.join(logs_dir, "sys.log")
@@ -48,9 +188,17 @@ def setup_logging():
         backupCount=5,
         encoding='utf-8'
     )
+    # 轮转出的备份文件压缩保存为 sys.log.N.gz
+    enable_rotated_compression(file_handler)
     file_handler.setLevel(log_level)
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_listener = TimedQueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _queue_listener.start()
+    atexit.register(stop_logging)
+    _queue_handler = BoundedQueueHandler(log_queue)
+    root_logger.addHandler(_queue_handler)
 
     logging.getLogger(__name__).info("全局日志系统配置完成。")
 
@@ -72,7 +220,7 @@ def get_task_logger(task_id: str):
     if task_logger.hasHandlers():
         return task_logger
 
-    logs_dir = 'logs'
+    logs_dir = resolve_path('logs')
     os.makedirs(logs_dir, exist_ok=True)
     log_file = os.path.join(logs_dir, f"task_{task_id}.log")
 
@@ -88,85 +236,151 @@ def get_task_logger(task_id: str):
         backupCount=3,
         encoding='utf-8'
     )
+    enable_rotated_compression(file_handler)
     file_handler.setLevel(log_level)
     file_handler.setFormatter(formatter)
     task_logger.addHandler(file_handler)
 
     return task_logger
 
+# 日志行格式，按出现频率排列并预先编译
+_LOG_LINE_PATTERNS = (
+    # setup_logging 与任务执行器使用的格式: [2023-10-27 10:30:00] <INFO> module.name: message
+    re.compile(r'\[(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] <(?P<level>[A-Z_]+)> (?P<name>[^:\s]+): ?(?P<message>.*)'),
+    # 旧格式: 2023-10-27 10:30:00 - module.name - INFO - message
+    re.compile(r'(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (?P<name>[a-zA-Z0-9._]+) - (?P<level>INFO|WARNING|ERROR|DEBUG|CRITICAL) - (?P<message>.+)'),
+    # 旧的任务日志格式: 2023-10-27 10:30:00,123 - INFO - message
+    re.compile(r'(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (?P<level>INFO|WARNING|ERROR|DEBUG|CRITICAL) - (?P<message>.+)'),
+)
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
 class LoggerHelper:
     """日志帮助类，提供日志读取功能"""
 
     @staticmethod
     def read_logs(log_file: Optional[str] = None, task_id: Optional[str] = None,
-                  level: Optional[str] = None, limit: int = 100,
-                  offset: int = 0) -> Dict[str, Any]:
+                  level: Optional[Union[str, Iterable[str]]] = None, limit: int = 100,
+                  offset: int = 0, start_time: Optional[Union[str, datetime]] = None,
+                  end_time: Optional[Union[str, datetime]] = None, reverse: bool = False) -> Dict[str, Any]:
         """
         读取和过滤日志
+        逐行流式解析（包含已轮转的历史分段），按级别和时间范围过滤，
+        收集到 offset+limit 条匹配结果后立即停止读取。
+        reverse=True 时从最新的日志开始倒序读取，返回结果也按从新到旧排列，适合查询“最近 N 条错误”。
+        没有时间戳的行（如任务输出、异常堆栈）归属于文件中位于它之前最近的带时间戳的行，随该行一起按时间范围保留或过滤；
+        文件开头第一条带时间戳的行之前的内容在指定时间范围时不返回。
         """
         try:
             if not log_file:
-                log_file = f"logs/task_{task_id}.log" if task_id else "logs/sys.log"
+                log_file = resolve_path(f"logs/task_{task_id}.log" if task_id else "logs/sys.log")
             
             if not os.path.exists(log_file):
                 return {
                     "success": True,
                     "logs": [{"raw": "暂无日志信息，请等待任务执行..."}],
-                    "total": 0,
                     "has_more": False
                 }
-                
-            with open(log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            log_entries = [entry for line in lines if (entry := LoggerHelper._parse_log_line(line)) 
-                           and (not level or entry.get('level') == level)]
             
-            total_entries = len(log_entries)
-            paginated_entries = log_entries[offset:offset+limit]
+            levels = {level} if isinstance(level, str) else set(level or ())
+            levels = {item.upper() for item in levels}
+            start = LoggerHelper._normalize_time(start_time)
+            end = LoggerHelper._normalize_time(end_time)
+            # 不含所需级别文本的行无需解码和正则匹配；原始行按 INFO 处理，因此包含 INFO 时不能预先跳过
+            needles = tuple(item.encode() for item in levels) if levels and 'INFO' not in levels else ()
+            
+            entries = (
+                LoggerHelper._parse_log_line(line.decode('utf-8', errors='replace'))
+                for line in iter_log_lines(log_file, reverse=reverse)
+                if not needles or any(needle in line for needle in needles)
+            )
+            if start or end:
+                entries = LoggerHelper._filter_time_range(entries, start, end, reverse, max_pending=offset + limit + 1)
+            
+            matched = []
+            skipped = 0
+            has_more = False
+            for entry in entries:
+                if entry is None or (levels and entry['level'] not in levels):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if len(matched) == limit:
+                    has_more = True
+                    break
+                matched.append(entry)
             
             return {
                 "success": True,
-                "logs": paginated_entries,
-                "total": total_entries,
-                "has_more": offset + limit < total_entries
+                "logs": matched,
+                "has_more": has_more
             }
             
         except Exception as e:
             return {"success": False, "message": f"读取日志失败: {str(e)}"}
     
+    @staticmethod
+    def _filter_time_range(entries: Iterable[Optional[Dict[str, Any]]], start: Optional[str], end: Optional[str],
+                           reverse: bool, max_pending: int) -> Iterable[Dict[str, Any]]:
+        """按时间范围过滤，没有时间戳的行跟随文件中位于它之前最近的带时间戳的行
+
+        倒序读取时这些行先于其所属的带时间戳的行出现，暂存后再一起决定去留；
+        调用方最多只会用到 max_pending 条，超出的部分不再暂存。
+        """
+        def in_range(timestamp: str) -> bool:
+            return not ((start and timestamp < start) or (end and timestamp > end))
+        
+        keep = False
+        pending = []
+        for entry in entries:
+            if entry is None:
+                continue
+            timestamp = entry['timestamp'][:19]
+            if not reverse:
+                if timestamp:
+                    keep = in_range(timestamp)
+                if keep:
+                    yield entry
+            elif not timestamp:
+                if len(pending) < max_pending:
+                    pending.append(entry)
+            else:
+                if in_range(timestamp):
+                    yield from pending
+                    yield entry
+                pending = []
+    
+    @staticmethod
+    def _normalize_time(value: Optional[Union[str, datetime]]) -> Optional[str]:
+        """将时间范围参数统一为 YYYY-MM-DD HH:MM:SS 字符串，该格式可直接按字符串比较先后"""
+        if not value:
+            return None
+        if isinstance(value, datetime):
+            return value.strftime(_TIMESTAMP_FORMAT)
+        return datetime.fromisoformat(value.replace('T', ' ')).strftime(_TIMESTAMP_FORMAT)
+    
     @staticmethod
     def _parse_log_line(line: str) -> Optional[Dict[str, Any]]:
         """
         解析单行日志
         """
-        # 匹配新格式: 2023-10-27 10:30:00 - module.name - INFO - message
-        pattern = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - ([a-zA-Z0-9._]+) - (INFO|WARNING|ERROR|DEBUG|CRITICAL) - (.+)'
-        match = re.match(pattern, line)
-        
-        if match:
-            timestamp_str, name, level, message = match.groups()
-            return {
-                "timestamp": timestamp_str,
-                "name": name.strip(),
-                "level": level.strip(),
-                "message": message.strip()
-            }
+        line = line.strip()
+        if not line:
+            return None
         
-        # 匹配旧的任务日志格式，以提供向后兼容性
-        task_pattern = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (INFO|WARNING|ERROR|DEBUG|CRITICAL) - (.+)'
-        task_match = re.match(task_pattern, line)
-        if task_match:
-            timestamp_str, level, message = task_match.groups()
-            return {
-                "timestamp": timestamp_str,
-                "name": "task",
-                "level": level.strip(),
-                "message": message.strip()
-            }
+        # 按首字符选择可能匹配的格式，避免逐个尝试
+        patterns = _LOG_LINE_PATTERNS[:1] if line[0] == '[' else _LOG_LINE_PATTERNS[1:] if line[0].isdigit() else ()
+        for pattern in patterns:
+            match = pattern.match(line)
+            if match:
+                fields = match.groupdict()
+                return {
+                    "timestamp": fields['timestamp'],
+                    "name": fields.get('name') or "task",
+                    "level": fields['level'],
+                    "message": fields['message'].strip()
+                }
 
         # 如果不匹配任何已知格式，则作为原始行返回
-        if line.strip():
-            return {"timestamp": "", "name": "raw", "level": "INFO", "message": line.strip()}
-        
-        return None
+        return {"timestamp": "", "name": "raw", "level": "INFO", "message": line}
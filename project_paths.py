@@ -0,0 +1,9 @@
+import os
+
+# 项目根目录，任务目录、日志和配置中的相对路径均以此为基准解析
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def resolve_path(path: str) -> str:
+    """将相对路径解析为基于项目根目录的绝对路径，避免依赖进程当前工作目录"""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
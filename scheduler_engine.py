@@ -2,23 +2,49 @@
 
 import os
 import json
+import asyncio
+import codecs
+import io
+import selectors
+import concurrent.futures
 import subprocess
 import logging
 import signal
 import sys
 import uuid
 import time
-from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+import heapq
+import hashlib
+import random
+import resource
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Any
+from dataclasses import dataclass, asdict, field, replace
+from functools import partial, wraps
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from dotenv import dotenv_values
 import glob
+from collections import deque
 from logger_helper import setup_logging
+from project_paths import PROJECT_ROOT, resolve_path
+from execution_history import ExecutionHistoryStore
+from log_search import LogSearchIndex
+from file_transaction import FileTransaction, atomic_write, sweep_trash
+from log_writer import (acquire_log_writer, release_log_writer, task_log_writer, remove_task_logs,
+                        text_events_enabled, write_task_event)
+
+# 超时后发送 SIGTERM 到 SIGKILL 之间的宽限时间（秒）
+TASK_KILL_GRACE_PERIOD = float(os.getenv('TASK_KILL_GRACE_PERIOD', '5'))
+
+# 任务输出在内存中保留的尾部缓冲默认大小，完整输出只写入日志文件
+DEFAULT_OUTPUT_TAIL_LINES = 100
+DEFAULT_OUTPUT_TAIL_BYTES = 64 * 1024
 
 @dataclass
 class Task:
@@ -31,15 +57,24 @@ class Task:
     task_timeout: Optional[int] = None
     task_retry: int = 0
     task_retry_interval: int = 60
+    task_retry_backoff: float = 1.0  # 重试间隔倍数，1 表示固定间隔，2 表示指数退避
+    task_retry_max_interval: Optional[int] = None  # 重试间隔上限（秒）
+    task_retry_jitter: float = 0.0  # 重试间隔随机抖动比例（0-1）
     task_enabled: bool = True
     task_log: str = ""
     task_env: Optional[Dict[str, str]] = None
     task_dependencies: Optional[List[str]] = None
     task_notify: Optional[Dict[str, Any]] = None
+    task_concurrency_group: str = ""  # 并发组名称，组的并发上限由 TASK_CONCURRENCY_GROUPS 配置
+    task_output_tail_lines: int = DEFAULT_OUTPUT_TAIL_LINES
+    task_output_tail_bytes: int = DEFAULT_OUTPUT_TAIL_BYTES
+    task_limits: Optional[Dict[str, Any]] = None  # 资源限制：max_rss_mb、cpu_seconds、nofile、nice
     
     def __post_init__(self):
         if self.task_env is None:
             self.task_env = {}
+        if self.task_limits is None:
+            self.task_limits = {}
         if self.task_dependencies is None:
             self.task_dependencies = []
         if self.task_notify is None:
@@ -67,11 +102,18 @@ class Task:
                 self.task_timeout == other.task_timeout and
                 self.task_retry == other.task_retry and
                 self.task_retry_interval == other.task_retry_interval and
+                self.task_retry_backoff == other.task_retry_backoff and
+                self.task_retry_max_interval == other.task_retry_max_interval and
+                self.task_retry_jitter == other.task_retry_jitter and
                 self.task_enabled == other.task_enabled and
                 self.task_log == other.task_log and
                 self.task_env == other.task_env and
                 self.task_dependencies == other.task_dependencies and
-                self.task_notify == other.task_notify)
+                self.task_notify == other.task_notify and
+                self.task_concurrency_group == other.task_concurrency_group and
+                self.task_output_tail_lines == other.task_output_tail_lines and
+                self.task_output_tail_bytes == other.task_output_tail_bytes and
+                self.task_limits == other.task_limits)
 
 @dataclass
 class TaskExecution:
@@ -81,106 +123,624 @@ class TaskExecution:
     start_time: datetime
     end_time: Optional[datetime] = None
     status: str = "running"
+    attempt: int = 0  # 第几次重试，0 表示首次执行
     return_code: Optional[int] = None
-    output: Optional[str] = None
+    output_tail: Optional[str] = None  # 仅保留输出末尾部分，完整输出见日志文件
+    output_lines: int = 0
+    output_bytes: int = 0
+    # 本次执行输出在任务日志中的起止游标（"分段inode:字节偏移"），同时记录在日志的执行索引中
+    log_cursor_start: Optional[str] = None
+    log_cursor_end: Optional[str] = None
     error: Optional[str] = None
     error_message: Optional[str] = None
     duration: Optional[float] = None
+    # 资源占用（来自 wait4，包含任务进程及其已回收的全部后代进程）
+    cpu_user_time: Optional[float] = None
+    cpu_system_time: Optional[float] = None
+    max_rss_kb: Optional[int] = None
+
+class OutputTail:
+    """任务输出的有界尾部缓冲区，按行数和字节数双重限制内存占用"""
+    
+    def __init__(self, max_lines: int = DEFAULT_OUTPUT_TAIL_LINES, max_bytes: int = DEFAULT_OUTPUT_TAIL_BYTES):
+        self.max_lines = max(0, max_lines)
+        self.max_bytes = max(0, max_bytes)
+        self._lines = deque()
+        self._buffered_bytes = 0
+        self._partial = ''
+        self.total_lines = 0
+        self.total_bytes = 0
+    
+    def append(self, line: str):
+        """追加一行输出，超出限制时丢弃最早的行"""
+        size = len(line.encode('utf-8', errors='replace'))
+        self.total_lines += 1
+        self.total_bytes += size
+        if self.max_lines == 0 or size > self.max_bytes:
+            return
+        
+        self._lines.append((line.rstrip('\r\n'), size))
+        self._buffered_bytes += size
+        while len(self._lines) > self.max_lines or self._buffered_bytes > self.max_bytes:
+            _, dropped_size = self._lines.popleft()
+            self._buffered_bytes -= dropped_size
+    
+    def feed(self, chunk: str):
+        """追加一段任意切分的输出，按换行拆分成行后写入缓冲区"""
+        lines = (self._partial + chunk).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self.append(line + '\n')
+        # 超长且没有换行的输出按缓冲上限强制断行，避免残行无限增长
+        if len(self._partial) > self.max_bytes:
+            self.append(self._partial)
+            self._partial = ''
+    
+    def close(self):
+        """输出结束时写入最后一个不完整的行"""
+        if self._partial:
+            self.append(self._partial)
+            self._partial = ''
+    
+    def text(self) -> str:
+        return '\n'.join(line for line, _ in self._lines)
+
+class ConcurrencyLimiter:
+    """按并发组限制同时执行的任务数量
+    
+    并发组通过环境变量 TASK_CONCURRENCY_GROUPS 配置，例如 "browser=2,http=20"。
+    未加入并发组或组未配置上限的任务只受执行线程池大小的限制。
+    """
+    
+    def __init__(self, group_limits: Optional[Dict[str, int]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.group_limits = dict(group_limits or {})
+        self._running = {}
+        self._lock = threading.Lock()
+        self._unknown_groups = set()
+    
+    @classmethod
+    def from_env(cls) -> 'ConcurrencyLimiter':
+        """从环境变量 TASK_CONCURRENCY_GROUPS 创建并发限制器"""
+        group_limits = {}
+        for item in os.getenv('TASK_CONCURRENCY_GROUPS', '').split(','):
+            if not item.strip():
+                continue
+            try:
+                name, limit = item.split('=', 1)
+                group_limits[name.strip()] = max(1, int(limit))
+            except ValueError:
+                logging.getLogger(__name__).warning(f"忽略无效的并发组配置: {item}")
+        return cls(group_limits)
+    
+    def try_acquire(self, group: str) -> bool:
+        """尝试占用并发组的一个执行名额，名额已满时立即返回 False"""
+        if not group:
+            return True
+        if group not in self.group_limits:
+            if group not in self._unknown_groups:
+                self._unknown_groups.add(group)
+                self.logger.warning(f"并发组 {group} 未在 TASK_CONCURRENCY_GROUPS 中配置，不限制其并发数")
+            return True
+        with self._lock:
+            running = self._running.get(group, 0)
+            if running >= self.group_limits[group]:
+                return False
+            self._running[group] = running + 1
+            return True
+    
+    def release(self, group: str):
+        """释放并发组的执行名额"""
+        if not group or group not in self.group_limits:
+            return
+        with self._lock:
+            self._running[group] = max(0, self._running.get(group, 0) - 1)
+    
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {group: {"limit": limit, "running": self._running.get(group, 0)}
+                    for group, limit in self.group_limits.items()}
+
+class ResourceLimiter:
+    """任务资源限制
+    
+    支持的限制项（均为可选）：
+    - max_rss_mb: 内存上限。配置了 cgroup v2 时写入 memory.max 强制执行；否则不做限制，
+      只在结束后按 wait4 的 ru_maxrss 检查：执行失败且峰值超出时记为 limit_exceeded，
+      执行成功时保持成功状态，只记录一条警告
+    - cpu_seconds: CPU 时间上限，通过 RLIMIT_CPU 实现，超出后进程收到 SIGXCPU
+    - nofile: 可打开的文件描述符数量上限（RLIMIT_NOFILE），超过调度器自身的硬限制时按硬限制设置
+    - nice: 进程优先级调整值
+    
+    cgroup v2 需要通过 TASK_CGROUP_ROOT 指定一个已委派且开启 memory 控制器的 cgroup 目录，
+    每次执行在其下创建独立的子 cgroup，结束后删除。
+    """
+    
+    LIMIT_KEYS = ("max_rss_mb", "cpu_seconds", "nofile", "nice")
+    
+    def __init__(self, cgroup_root: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.cgroup_root = cgroup_root if cgroup_root and self._cgroup_usable(cgroup_root) else None
+        self._cgroups: Dict[str, str] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls) -> 'ResourceLimiter':
+        return cls(os.getenv('TASK_CGROUP_ROOT', '').strip() or None)
+    
+    @classmethod
+    def validate_limits(cls, limits: Any) -> Optional[str]:
+        """校验 task_limits 配置，返回错误描述，有效时返回 None（加载配置、创建和更新任务时共用）"""
+        if limits is None:
+            return None
+        if not isinstance(limits, dict):
+            return "资源限制必须是对象"
+        unknown = sorted(set(limits) - set(cls.LIMIT_KEYS))
+        if unknown:
+            return f"不支持的资源限制项: {', '.join(unknown)}"
+        for key in ("max_rss_mb", "cpu_seconds", "nofile"):
+            value = limits.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                return f"资源限制 {key} 必须大于0"
+        nice = limits.get("nice")
+        if nice is not None and (isinstance(nice, bool) or not isinstance(nice, int) or not 0 <= nice <= 19):
+            return "nice 值必须是0到19之间的整数"
+        return None
+    
+    def _cgroup_usable(self, cgroup_root: str) -> bool:
+        try:
+            with open(os.path.join(cgroup_root, "cgroup.subtree_control"), encoding='utf-8') as f:
+                controllers = f.read().split()
+        except OSError as e:
+            self.logger.warning(f"cgroup 目录 {cgroup_root} 不可用，内存限制只在执行结束后按峰值内存检查: {e}")
+            return False
+        if "memory" not in controllers or not os.access(cgroup_root, os.W_OK):
+            self.logger.warning(f"cgroup 目录 {cgroup_root} 未开启 memory 控制器或不可写，内存限制只在执行结束后按峰值内存检查")
+            return False
+        return True
+    
+    def prepare(self, task: Task, execution_id: str) -> Optional[Callable[[], None]]:
+        """准备本次执行的资源限制，返回传给 Popen 的 preexec_fn（无限制时返回 None）"""
+        limits = {k: task.task_limits.get(k) for k in self.LIMIT_KEYS if task.task_limits.get(k) is not None}
+        if not limits:
+            return None
+        
+        cgroup_procs = None
+        max_rss_mb = limits.get("max_rss_mb")
+        if max_rss_mb and self.cgroup_root:
+            cgroup_path = os.path.join(self.cgroup_root, f"task-{execution_id}")
+            try:
+                os.mkdir(cgroup_path)
+                with open(os.path.join(cgroup_path, "memory.max"), 'w') as f:
+                    f.write(str(int(max_rss_mb * 1024 * 1024)))
+                with open(os.path.join(cgroup_path, "memory.swap.max"), 'w') as f:
+                    f.write("0")
+            except OSError as e:
+                self.logger.warning(f"为任务 {task.task_id} 创建 cgroup 失败，内存限制只在执行结束后按峰值内存检查: {e}")
+            else:
+                with self._lock:
+                    self._cgroups[execution_id] = cgroup_path
+                cgroup_procs = os.path.join(cgroup_path, "cgroup.procs")
+        
+        # 没有可用的 cgroup 时不使用 RLIMIT_AS：它限制的是虚拟内存而不是常驻内存，
+        # 超出时表现为任务自身的分配失败，无法与普通失败区分；改为结束后按峰值内存判断（见 breach_reason）
+        rlimits = []
+        if limits.get("cpu_seconds"):
+            cpu_seconds = int(limits["cpu_seconds"])
+            # 软限制触发 SIGXCPU，硬限制多留 1 秒作为兜底的 SIGKILL
+            rlimits.append(self._clamp_rlimit(task, resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 1))
+        if limits.get("nofile"):
+            nofile = int(limits["nofile"])
+            rlimits.append(self._clamp_rlimit(task, resource.RLIMIT_NOFILE, nofile, nofile))
+        nice = int(limits.get("nice") or 0)
+        
+        def apply_limits():
+            # 在子进程 exec 之前执行，只做系统调用，避免获取锁
+            if cgroup_procs:
+                fd = os.open(cgroup_procs, os.O_WRONLY)
+                try:
+                    os.write(fd, b"0")
+                finally:
+                    os.close(fd)
+            for res, soft, hard in rlimits:
+                resource.setrlimit(res, (soft, hard))
+            if nice:
+                os.nice(nice)
+        
+        return apply_limits
+    
+    def _clamp_rlimit(self, task: Task, res: int, soft: int, hard: int) -> tuple:
+        """子进程继承调度器的资源限制，非特权进程不能调高硬限制：超过当前硬限制的值按硬限制设置"""
+        _, current_hard = resource.getrlimit(res)
+        if current_hard != resource.RLIM_INFINITY and hard > current_hard:
+            self.logger.warning(f"任务 {task.task_id} 的资源限制 {soft} 超过当前硬限制 {current_hard}，按硬限制设置")
+            hard = current_hard
+            soft = min(soft, hard)
+        return res, soft, hard
+    
+    def breach_reason(self, task: Task, execution: TaskExecution, return_code: int) -> Optional[str]:
+        """判断执行是否超出资源限制，返回原因描述"""
+        limits = task.task_limits or {}
+        with self._lock:
+            cgroup_path = self._cgroups.get(execution.execution_id)
+        max_rss_mb = limits.get("max_rss_mb")
+        if cgroup_path and self._read_oom_kills(cgroup_path) > 0:
+            return f"内存超出限制 ({max_rss_mb}MB)"
+        if max_rss_mb and execution.max_rss_kb is not None and execution.max_rss_kb > max_rss_mb * 1024:
+            # 没有 cgroup 时该限制并未强制执行，成功结束的执行不因峰值超出而判为失败
+            peak = f"峰值 {execution.max_rss_kb // 1024}MB"
+            if return_code != 0:
+                return f"内存超出限制 ({max_rss_mb}MB，{peak})"
+            self.logger.warning(f"任务 {task.task_id} 的内存{peak}超过配置的 max_rss_mb ({max_rss_mb}MB)，"
+                                f"未启用 cgroup，该限制未强制执行")
+        cpu_seconds = limits.get("cpu_seconds")
+        if cpu_seconds and return_code != 0:
+            # 经 shell 启动时退出码为 128+SIGXCPU，直接以实际消耗的 CPU 时间判断
+            used = (execution.cpu_user_time or 0) + (execution.cpu_system_time or 0)
+            if return_code in (-signal.SIGXCPU, 128 + signal.SIGXCPU) or used >= cpu_seconds:
+                return f"CPU 时间超出限制 ({cpu_seconds}秒)"
+        return None
+    
+    def _read_oom_kills(self, cgroup_path: str) -> int:
+        try:
+            with open(os.path.join(cgroup_path, "memory.events"), encoding='utf-8') as f:
+                for line in f:
+                    key, _, value = line.partition(" ")
+                    if key == "oom_kill":
+                        return int(value)
+        except (OSError, ValueError):
+            pass
+        return 0
+    
+    def release(self, execution_id: str):
+        """删除本次执行创建的 cgroup"""
+        with self._lock:
+            cgroup_path = self._cgroups.pop(execution_id, None)
+        if cgroup_path:
+            try:
+                os.rmdir(cgroup_path)
+            except OSError as e:
+                self.logger.warning(f"删除 cgroup {cgroup_path} 失败: {e}")
+
+class TimeoutWatchdog:
+    """超时看门狗
+    
+    所有运行中的执行共用一个后台线程和一个按截止时间排序的最小堆，
+    到期时调用注册的回调，而不是为每个任务单独启动计时线程。
+    """
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        # 堆中只保存 (截止时间, 序号, key)，回调保存在 _active 中，取消后立即释放其引用的对象
+        self._heap = []
+        self._active = {}
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._thread = None
+    
+    def schedule(self, key: str, delay: float, callback: Callable[[], None]):
+        """注册（或替换）一个在 delay 秒后触发的回调"""
+        with self._condition:
+            self._seq += 1
+            self._active[key] = (self._seq, callback)
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, key))
+            self._compact_if_needed()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="timeout-watchdog", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+    
+    def cancel(self, key: str):
+        """取消尚未触发的回调"""
+        with self._condition:
+            if self._active.pop(key, None) is not None:
+                self._compact_if_needed()
+    
+    def _is_live(self, entry: tuple) -> bool:
+        active = self._active.get(entry[2])
+        return active is not None and active[0] == entry[1]
+    
+    def _compact_if_needed(self):
+        """已取消或被替换的条目明显多于活动条目时重建堆，堆的大小与运行中的执行数保持同一量级"""
+        if len(self._heap) > 2 * len(self._active) + 64:
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+    
+    def _worker(self):
+        while True:
+            with self._condition:
+                # 丢弃已取消或被替换的条目
+                while self._heap and not self._is_live(self._heap[0]):
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                deadline, seq, key = self._heap[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+                _, callback = self._active.pop(key)
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"执行超时回调 {key} 时发生异常: {e}")
+
+def signal_process_group(process: subprocess.Popen, sig: int):
+    """向任务进程所在的进程组发送信号（任务以独立会话启动，进程组ID即其PID）"""
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
+    except PermissionError:
+        process.send_signal(sig)
+
+class KeyedDebounceQueue:
+    """按键合并的防抖队列
+
+    同一个键在 delay 秒内的多次推送合并为一次，最长等待 max_delay 秒；
+    到期的键由后台线程批量交给回调处理，推送方不会被阻塞。
+    """
+    
+    def __init__(self, callback: Callable[[List[str]], None], delay: float, max_delay: float, name: str = "debounce-queue"):
+        self.logger = logging.getLogger(__name__)
+        self.callback = callback
+        self.delay = delay
+        self.max_delay = max(max_delay, delay)
+        self.name = name
+        self._pending: Dict[str, tuple] = {}  # key -> (首次推送时间, 到期时间)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+    
+    def push(self, key: str):
+        """推送一个键；已在队列中时推迟其到期时间（不超过首次推送后 max_delay 秒）"""
+        now = time.monotonic()
+        with self._condition:
+            if self._stopped:
+                return
+            first_seen = self._pending.get(key, (now,))[0]
+            self._pending[key] = (first_seen, min(now + self.delay, first_seen + self.max_delay))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+    
+    def stop(self, timeout: float = 5):
+        """停止后台线程，丢弃尚未到期的键"""
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+    
+    def _worker(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                now = time.monotonic()
+                remaining = min(deadline for _, deadline in self._pending.values()) - now
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                due = [key for key, (_, deadline) in self._pending.items() if deadline <= now]
+                for key in due:
+                    del self._pending[key]
+            try:
+                self.callback(due)
+            except Exception as e:
+                self.logger.error(f"处理防抖队列 {self.name} 中的 {len(due)} 个键时发生异常: {e}")
 
 class ConfigFileHandler(FileSystemEventHandler):
-    """任务配置文件变更监控处理器"""
+    """任务配置文件变更监控处理器
+
+    watchdog 事件按任务目录推入防抖队列后立即返回，不阻塞观察者线程；
+    一段时间内没有新事件的任务由队列线程批量交给调度引擎做针对性重载。
+    """
     
     def __init__(self, scheduler_engine, tasks_dir: str):
         super().__init__()
         self.scheduler_engine = scheduler_engine
         self.tasks_dir = os.path.abspath(tasks_dir)
         self.logger = logging.getLogger(__name__)
-        self.last_modified = 0
-        self.last_deleted = 0
-        self.last_created = 0
-        self.last_moved = 0
-        
-    def on_modified(self, event):
-        """文件修改事件处理"""
-        # 只监控 config.json 文件的变更
-        if event.is_directory or not event.src_path.endswith('config.json'):
-            return
-            
-        # 确保是任务目录下的配置文件
-        if not event.src_path.startswith(self.tasks_dir):
-            return
-            
-        current_time = time.time()
-        if current_time - self.last_modified < 1:
-            return
-        self.last_modified = current_time
-        
-        self.logger.info(f"检测到任务配置文件变更: {event.src_path}，准备重新加载任务...")
-        time.sleep(0.5)
-        self.scheduler_engine._reload_single_task(event.src_path)
+        self.queue = KeyedDebounceQueue(
+            scheduler_engine._reload_tasks,
+            delay=float(os.getenv('TASK_CONFIG_DEBOUNCE', '0.5')),
+            max_delay=float(os.getenv('TASK_CONFIG_DEBOUNCE_MAX', '5')),
+            name="config-reload",
+        )
     
-    def on_deleted(self, event):
-        """文件或目录删除事件处理"""
-        current_time = time.time()
-        if current_time - self.last_deleted < 1:
-            return
-        self.last_deleted = current_time
-        
-        # 检查是否在任务目录下
-        if not event.src_path.startswith(self.tasks_dir):
-            return
-            
-        # 如果是目录被删除
-        if event.is_directory:
-            self.logger.info(f"检测到任务目录被删除: {event.src_path}")
-            # 延迟处理，避免竞态条件
-            time.sleep(0.5)
-            self.scheduler_engine._reload_all_tasks()
-        else:
-            # 如果是 config.json 文件被删除
-            if event.src_path.endswith('config.json'):
-                self.logger.info(f"检测到任务配置文件被删除: {event.src_path}")
-                time.sleep(0.5)
-                self.scheduler_engine._reload_all_tasks()
-    
-    def on_created(self, event):
-        """文件或目录创建事件处理"""
-        current_time = time.time()
-        if current_time - self.last_created < 1:
-            return
-        self.last_created = current_time
-        
-        # 检查是否在任务目录下
-        if not event.src_path.startswith(self.tasks_dir):
-            return
-            
-        # 如果是新创建的任务目录或 config.json 文件
-        if event.is_directory or event.src_path.endswith('config.json'):
-            self.logger.info(f"检测到新任务目录或文件创建: {event.src_path}")
-            time.sleep(0.5)
-            self.scheduler_engine._reload_all_tasks()
-    
-    def on_moved(self, event):
-        """文件或目录移动事件处理"""
-        current_time = time.time()
-        if current_time - self.last_moved < 1:
+    def _task_id_for(self, path: str) -> Optional[str]:
+        """事件路径对应的任务ID：只关注任务目录本身和其中的 config.json，忽略隐藏目录（如回收区）"""
+        if not path:
+            return None
+        parts = os.path.relpath(path, self.tasks_dir).split(os.sep)
+        if parts[0] in ('.', '..') or parts[0].startswith('.'):
+            return None
+        if len(parts) == 1 or (len(parts) == 2 and parts[1] == 'config.json'):
+            return parts[0]
+        return None
+    
+    def on_any_event(self, event):
+        """将任务目录的创建、删除、移动以及 config.json 的变更按任务推入防抖队列"""
+        if event.event_type not in ('created', 'modified', 'deleted', 'moved'):
             return
-        self.last_moved = current_time
-        
-        # 检查是否在任务目录下
-        if not (event.src_path.startswith(self.tasks_dir) or event.dest_path.startswith(self.tasks_dir)):
+        # 任务目录的 modified 事件由目录内文件变化引起，对应的文件事件会单独到达
+        if event.is_directory and event.event_type == 'modified':
             return
-            
-        self.logger.info(f"检测到任务文件或目录被移动: {event.src_path} -> {event.dest_path}")
-        time.sleep(0.5)
-        self.scheduler_engine._reload_all_tasks()
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            task_id = self._task_id_for(path)
+            if task_id:
+                self.logger.debug(f"检测到任务 {task_id} 的配置变更事件: {event.event_type} {path}")
+                self.queue.push(task_id)
+    
+    def stop(self):
+        self.queue.stop()
+
+@dataclass(frozen=True)
+class ConfigFingerprint:
+    """配置文件指纹：stat 信息未变化时直接沿用内容哈希，无需重新读取文件"""
+    size: int
+    mtime_ns: int
+    inode: int
+    sha1: str
+    
+    def matches_stat(self, st: os.stat_result) -> bool:
+        return (self.size, self.mtime_ns, self.inode) == (st.st_size, st.st_mtime_ns, st.st_ino)
+
+@dataclass
+class ReloadPlan:
+    """配置重载计划：只包含受影响的任务"""
+    added: List[Task] = field(default_factory=list)
+    updated: List[Task] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    renamed: List[tuple] = field(default_factory=list)  # (旧任务ID, 新任务)
+    
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed or self.renamed)
 
 class TaskLoader:
     """任务加载器"""
     
     def __init__(self, tasks_dir: str = "tasks"):
         self.logger = logging.getLogger(__name__)
-        self.tasks_dir = tasks_dir
+        self.tasks_dir = resolve_path(tasks_dir)
+        self._lock = threading.Lock()
+        # 每个配置文件最近一次由本进程写入或加载的内容哈希，用于区分自身写入和外部修改
+        self._config_hashes: Dict[str, str] = {}
+        # 配置文件指纹，以及按内容哈希缓存的解析结果：仅 touch 或内容未变时不重新读取和解析
+        self._fingerprints: Dict[str, ConfigFingerprint] = {}
+        self._task_cache: Dict[str, Task] = {}
+    
+    @staticmethod
+    def config_hash(content: bytes) -> str:
+        return hashlib.sha1(content).hexdigest()
+    
+    def config_path(self, task_id: str) -> str:
+        return os.path.abspath(os.path.join(self.tasks_dir, task_id, 'config.json'))
+    
+    def _record_config(self, config_file: str, content_hash: Optional[str]):
+        config_file = os.path.abspath(config_file)
+        with self._lock:
+            if content_hash is None:
+                self._config_hashes.pop(config_file, None)
+                self._fingerprints.pop(config_file, None)
+            else:
+                self._config_hashes[config_file] = content_hash
+    
+    def _fingerprint(self, config_file: str, force: bool = False):
+        """返回 (指纹, 读取到的内容)；stat 信息未变时沿用缓存的指纹，内容为 None"""
+        config_file = os.path.abspath(config_file)
+        st = os.stat(config_file)
+        with self._lock:
+            cached = self._fingerprints.get(config_file)
+        if cached is not None and not force and cached.matches_stat(st):
+            return cached, None
+        with open(config_file, 'rb') as f:
+            st = os.fstat(f.fileno())
+            content = f.read()
+        fingerprint = ConfigFingerprint(st.st_size, st.st_mtime_ns, st.st_ino, self.config_hash(content))
+        with self._lock:
+            self._fingerprints[config_file] = fingerprint
+        return fingerprint, content
+    
+    def fingerprint(self, config_file: str) -> Optional[ConfigFingerprint]:
+        """配置文件的当前指纹，文件不存在或不可读时返回 None"""
+        try:
+            return self._fingerprint(config_file)[0]
+        except OSError:
+            with self._lock:
+                self._fingerprints.pop(os.path.abspath(config_file), None)
+            return None
+    
+    def _cache_task(self, content_hash: str, task: Task):
+        with self._lock:
+            self._task_cache[content_hash] = task
+            if len(self._task_cache) > max(64, 2 * len(self._fingerprints)):
+                live = {fp.sha1 for fp in self._fingerprints.values()} | set(self._config_hashes.values())
+                self._task_cache = {h: t for h, t in self._task_cache.items() if h in live}
+    
+    def load_config(self, config_file: str) -> Task:
+        """读取并解析配置文件，记录读到的内容哈希
+
+        内容哈希未变化时直接返回缓存的解析结果（副本），解析失败时抛出 JSONDecodeError/TypeError。
+        """
+        fingerprint, content = self._fingerprint(config_file)
+        with self._lock:
+            cached = self._task_cache.get(fingerprint.sha1)
+        if cached is None:
+            if content is None:
+                fingerprint, content = self._fingerprint(config_file, force=True)
+            cached = Task(**json.loads(content.decode('utf-8')))
+            self._cache_task(fingerprint.sha1, cached)
+        self._record_config(config_file, fingerprint.sha1)
+        return replace(cached)
+    
+    def load_task(self, task_id: str) -> Task:
+        """加载任务目录 tasks/<task_id> 中的配置
+
+        任务ID以目录名为准：配置中的 task_id 与目录名不一致时（如任务目录被移动或复制）按目录名加载，
+        启动时的全量加载和文件监控触发的增量重载使用同一规则。
+        """
+        task = self.load_config(self.config_path(task_id))
+        if task.task_id != task_id:
+            self.logger.warning(f"任务目录 {task_id} 中配置的任务ID为 {task.task_id}，按目录名加载")
+            task = replace(task, task_id=task_id)
+        return task
+    
+    def forget_config(self, task_id: str):
+        """清除任务配置文件的已知哈希和指纹（任务被删除或卸载时）"""
+        self._record_config(self.config_path(task_id), None)
+    
+    def is_known_config(self, config_file: str) -> bool:
+        """配置文件当前内容是否与本进程最近一次写入或加载的内容一致"""
+        with self._lock:
+            expected = self._config_hashes.get(os.path.abspath(config_file))
+        if expected is None:
+            return False
+        fingerprint = self.fingerprint(config_file)
+        return fingerprint is not None and fingerprint.sha1 == expected
+    
+    def write_config(self, task: Task, transaction: Optional[FileTransaction] = None) -> bool:
+        """原子地写入任务配置文件（临时文件 + fsync + rename）并记录内容哈希
+
+        传入 transaction 时通过事务写入以便回滚；内容与已知内容相同时不重复写入。
+        返回是否实际写入，失败时抛出异常。
+        """
+        config_file = self.config_path(task.task_id)
+        content = json.dumps(asdict(task), indent=2, ensure_ascii=False).encode('utf-8')
+        content_hash = self.config_hash(content)
+        with self._lock:
+            previous_hash = self._config_hashes.get(config_file)
+        if previous_hash == content_hash and self.is_known_config(config_file):
+            return False
+        
+        # 先记录哈希再写入，文件监控看到新内容时即可识别为自身写入
+        self._record_config(config_file, content_hash)
+        try:
+            if transaction is not None:
+                transaction.make_dirs(os.path.dirname(config_file))
+                transaction.write_file(config_file, content)
+            else:
+                os.makedirs(os.path.dirname(config_file), exist_ok=True)
+                atomic_write(config_file, content)
+        except Exception:
+            self._record_config(config_file, previous_hash)
+            raise
+        
+        # 刚写入的内容已知，记录指纹和解析结果，后续轮询无需重新读取
+        st = os.stat(config_file)
+        with self._lock:
+            self._fingerprints[config_file] = ConfigFingerprint(st.st_size, st.st_mtime_ns, st.st_ino, content_hash)
+        self._cache_task(content_hash, replace(task))
+        return True
         
     def load_tasks(self) -> List[Task]:
         """从任务目录加载所有任务"""
@@ -192,7 +752,8 @@ class TaskLoader:
             # 扫描任务目录下的所有子目录
             for item in os.listdir(self.tasks_dir):
                 task_dir = os.path.join(self.tasks_dir, item)
-                if not os.path.isdir(task_dir):
+                # 跳过隐藏目录（如文件事务的回收区 .trash）
+                if not os.path.isdir(task_dir) or item.startswith('.'):
                     continue
                     
                 config_file = os.path.join(task_dir, 'config.json')
@@ -201,10 +762,7 @@ class TaskLoader:
                     continue
                 
                 try:
-                    with open(config_file, 'r', encoding='utf-8') as f:
-                        task_data = json.load(f)
-                    
-                    task = Task(**task_data)
+                    task = self.load_task(item)
                     if self._validate_task(task):
                         tasks.append(task)
                         self.logger.debug(f"成功加载任务: {task.task_id}")
@@ -230,12 +788,7 @@ class TaskLoader:
         try:
             saved_count = 0
             for task in tasks:
-                task_dir = os.path.join(self.tasks_dir, task.task_id)
-                os.makedirs(task_dir, exist_ok=True)
-                
-                config_file = os.path.join(task_dir, 'config.json')
-                with open(config_file, 'w', encoding='utf-8') as f:
-                    json.dump(asdict(task), f, indent=2, ensure_ascii=False)
+                self.write_config(task)
                 saved_count += 1
                 
             self.logger.info(f"成功保存 {saved_count} 个任务到各自的配置文件")
@@ -245,19 +798,15 @@ class TaskLoader:
     def save_task(self, task: Task):
         """保存单个任务到配置文件"""
         try:
-            task_dir = os.path.join(self.tasks_dir, task.task_id)
-            os.makedirs(task_dir, exist_ok=True)
-            
-            config_file = os.path.join(task_dir, 'config.json')
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(asdict(task), f, indent=2, ensure_ascii=False)
-            self.logger.info(f"成功保存任务 {task.task_id} 的配置文件")
+            if self.write_config(task):
+                self.logger.info(f"成功保存任务 {task.task_id} 的配置文件")
         except Exception as e:
             self.logger.error(f"保存任务 {task.task_id} 配置文件失败: {e}")
     
     def delete_task_files(self, task_id: str):
         """删除任务的所有文件"""
         try:
+            self.forget_config(task_id)
             task_dir = os.path.join(self.tasks_dir, task_id)
             if os.path.exists(task_dir):
                 import shutil
@@ -271,6 +820,10 @@ class TaskLoader:
         if not all([task.task_id, task.task_name, task.task_exec]):
             self.logger.warning(f"任务验证失败，缺少必要字段 (ID, 名称, 执行命令): {task.task_id}")
             return False
+        limits_error = ResourceLimiter.validate_limits(task.task_limits)
+        if limits_error:
+            self.logger.warning(f"任务验证失败，{limits_error}: {task.task_id}")
+            return False
         return True
     
     def _create_default_task(self):
@@ -282,25 +835,21 @@ class TaskLoader:
             default_task_dir = os.path.join(self.tasks_dir, "test-task")
             os.makedirs(default_task_dir, exist_ok=True)
             
-            default_config = {
-                "task_id": "test-task",
-                "task_name": "测试任务",
-                "task_desc": "用于测试任务调度引擎的功能",
-                "task_exec": "python test_task.py",
-                "task_schedule": "*/5 * * * *",
-                "task_timeout": 300,
-                "task_retry": 2,
-                "task_retry_interval": 60,
-                "task_enabled": True,
-                "task_log": "logs/task_test-task.log",
-                "task_env": {"PARAM1": "值1"},
-                "task_dependencies": [],
-                "task_notify": {"on_success": False, "on_failure": True}
-            }
-            
-            config_file = os.path.join(default_task_dir, 'config.json')
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=2, ensure_ascii=False)
+            default_task = Task(
+                task_id="test-task",
+                task_name="测试任务",
+                task_desc="用于测试任务调度引擎的功能",
+                task_exec="python test_task.py",
+                task_schedule="*/5 * * * *",
+                task_timeout=300,
+                task_retry=2,
+                task_retry_interval=60,
+                task_enabled=True,
+                task_log="logs/task_test-task.log",
+                task_env={"PARAM1": "值1"},
+                task_dependencies=[],
+                task_notify={"on_success": False, "on_failure": True}
+            )
             
             # 创建简单的测试脚本
             script_content = '''#!/usr/bin/env python
@@ -310,9 +859,10 @@ print("默认测试任务开始执行...")
 time.sleep(2)
 print("默认测试任务执行完成")
 '''
-            script_file = os.path.join(default_task_dir, 'test_task.py')
-            with open(script_file, 'w', encoding='utf-8') as f:
-                f.write(script_content)
+            atomic_write(os.path.join(default_task_dir, 'test_task.py'), script_content)
+            
+            # 最后原子地写入配置文件，文件监控看到配置时脚本已经就绪
+            self.write_config(default_task)
                 
             self.logger.info(f"已成功创建默认任务目录: {default_task_dir}")
         except Exception as e:
@@ -321,61 +871,230 @@ print("默认测试任务执行完成")
 class TaskExecutor:
     """任务执行器"""
     
-    def __init__(self):
+    # 读取输出时检查进程组是否已被 SIGKILL 强制终止的间隔（秒）
+    KILL_CHECK_INTERVAL = 0.5
+    
+    def __init__(self, tasks_dir: str = "tasks"):
         self.logger = logging.getLogger(__name__)
-        self.running_processes = {}
+        self.tasks_dir = resolve_path(tasks_dir)
+        # task_id -> {execution_id: (process, execution)}，另维护 execution_id -> task_id 的反向索引
+        self.running_processes: Dict[str, Dict[str, tuple]] = {}
+        self._execution_index: Dict[str, str] = {}
+        self._running_lock = threading.Lock()
+        self.timeout_watchdog = TimeoutWatchdog()
+        self._timed_out = set()
+        # 通过 stop_task 停止的执行，以及每个执行结束时置位的完成事件
+        self._stopped = set()
+        self._completion_events: Dict[str, threading.Event] = {}
+        # 进程组已被 SIGKILL 强制终止的执行，读取线程据此停止等待输出
+        self._kill_events: Dict[str, threading.Event] = {}
+        # 已提交但尚未结束执行的任务ID，同一任务同一时间只允许一个执行
+        self._inflight = set()
+        self._submit_lock = threading.Lock()
+        self.resource_limiter = ResourceLimiter.from_env()
     
-    def execute_task(self, task: Task) -> TaskExecution:
+    def execute_task(self, task: Task, attempt: int = 0) -> TaskExecution:
         """执行单个任务"""
-        execution_id = str(uuid.uuid4())
-        execution = TaskExecution(task_id=task.task_id, execution_id=execution_id, start_time=datetime.now())
-        
-        self.logger.info(f"开始执行任务 {task.task_id} (执行ID: {execution_id})")
-        self.logger.debug(f"执行命令: {task.task_exec}")
-        
-        # 确定任务工作目录
-        task_dir = os.path.join("tasks", task.task_id)
-        original_cwd = os.getcwd()
+        execution = self._create_execution(task, attempt)
         
         try:
-            env = self._prepare_environment(task)
-            os.makedirs(os.path.dirname(task.task_log), exist_ok=True)
-            self._clear_python_module_cache(task.task_exec)
-            
-            cmd, shell = self._prepare_command(task.task_exec)
+            cmd, shell, env, cwd, log_path = self._prepare_launch(task)
             
-            # 如果任务目录存在，切换到任务目录执行
-            if os.path.exists(task_dir):
-                os.chdir(task_dir)
-                self.logger.debug(f"任务工作目录: {task_dir}")
-            
-            with open(os.path.join(original_cwd, task.task_log), 'w', encoding='utf-8') as log_file:
+            with task_log_writer(log_path) as log_file:
                 self._log_task_start(log_file, task, execution)
                 
                 process = subprocess.Popen(
-                    cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                    text=True, shell=shell, bufsize=1, universal_newlines=True
+                    cmd, env=env, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                    text=True, shell=shell, bufsize=1, universal_newlines=True,
+                    start_new_session=True, preexec_fn=self.resource_limiter.prepare(task, execution.execution_id)
                 )
-                self.running_processes[execution_id] = process
+                self._register_process(execution, process)
                 
                 self._stream_process_output(process, execution, log_file, task)
 
         except Exception as e:
-            self.logger.error(f"执行任务 {task.task_id} 过程中发生严重错误: {e}")
-            execution.status = "failed"
-            execution.error_message = str(e)
-            self._log_execution_error(task, execution, str(e))
+            self._handle_execution_exception(task, execution, e)
         
         finally:
-            # 恢复原始工作目录
-            os.chdir(original_cwd)
-            execution.end_time = datetime.now()
-            execution.duration = (execution.end_time - execution.start_time).total_seconds()
-            if execution_id in self.running_processes:
-                del self.running_processes[execution_id]
-            self._log_task_end(task, execution)
+            self._finish_execution(task, execution)
                 
         return execution
+    
+    def submit_task(self, task: Task, on_complete: Callable[[TaskExecution], None], attempt: int = 0):
+        """执行任务并在结束后回调 on_complete
+        
+        线程模式下在调用线程中同步执行；异步模式的执行器会重写此方法，提交后立即返回。
+        重试、推迟和手动执行使用各自的调度作业，不受 cron 作业 max_instances=1 的约束，
+        因此同一任务已有执行尚未结束时拒绝提交并返回 None，不会回调 on_complete。
+        """
+        if not self._claim_inflight(task):
+            return None
+        try:
+            execution = self.execute_task(task, attempt)
+        finally:
+            # 先释放再回调，回调中调度的重试不会因本次执行仍被视为进行中而被推迟
+            self._release_inflight(task.task_id)
+        on_complete(execution)
+        return execution
+    
+    def is_inflight(self, task_id: str) -> bool:
+        """任务是否有已提交但尚未结束的执行"""
+        with self._submit_lock:
+            return task_id in self._inflight
+    
+    def _claim_inflight(self, task: Task, limit: Optional[int] = None) -> bool:
+        """登记任务的执行，同一任务已有执行尚未结束或进行中的执行数达到 limit 时返回 False"""
+        with self._submit_lock:
+            if task.task_id in self._inflight:
+                self.logger.warning(f"任务 {task.task_id} 的上一次执行尚未结束，跳过本次执行")
+                return False
+            if limit is not None and len(self._inflight) >= limit:
+                self.logger.warning(f"进行中的执行已达上限 ({limit})，跳过任务 {task.task_id} 的本次执行")
+                return False
+            self._inflight.add(task.task_id)
+            return True
+    
+    def _release_inflight(self, task_id: str):
+        with self._submit_lock:
+            self._inflight.discard(task_id)
+    
+    def shutdown(self):
+        """释放执行器占用的资源"""
+        pass
+    
+    def _create_execution(self, task: Task, attempt: int = 0) -> TaskExecution:
+        execution = TaskExecution(task_id=task.task_id, execution_id=str(uuid.uuid4()), start_time=datetime.now(),
+                                  attempt=attempt)
+        self.logger.info(f"开始执行任务 {task.task_id} (执行ID: {execution.execution_id})")
+        self.logger.debug(f"执行命令: {task.task_exec}")
+        return execution
+    
+    def _prepare_launch(self, task: Task) -> tuple:
+        """准备启动子进程所需的命令、环境变量、工作目录和日志路径"""
+        # 任务工作目录通过 cwd 参数传给子进程，不修改进程全局的工作目录
+        task_dir = os.path.join(self.tasks_dir, task.task_id)
+        cwd = task_dir if os.path.isdir(task_dir) else None
+        log_path = resolve_path(task.task_log)
+        
+        env = self._prepare_environment(task)
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        self._clear_python_module_cache(task.task_exec)
+        
+        cmd, shell = self._prepare_command(task.task_exec)
+        if cwd:
+            self.logger.debug(f"任务工作目录: {cwd}")
+        return cmd, shell, env, cwd, log_path
+    
+    def _handle_execution_exception(self, task: Task, execution: TaskExecution, error: Exception):
+        self.logger.error(f"执行任务 {task.task_id} 过程中发生严重错误: {error}")
+        execution.status = "failed"
+        execution.error_message = str(error)
+        self._log_execution_error(task, execution, str(error))
+    
+    def _finish_execution(self, task: Task, execution: TaskExecution):
+        execution.end_time = datetime.now()
+        execution.duration = (execution.end_time - execution.start_time).total_seconds()
+        self._unregister_process(execution)
+        self.resource_limiter.release(execution.execution_id)
+        self._log_task_end(task, execution)
+    
+    def _register_process(self, execution: TaskExecution, process: subprocess.Popen):
+        with self._running_lock:
+            self.running_processes.setdefault(execution.task_id, {})[execution.execution_id] = (process, execution)
+            self._execution_index[execution.execution_id] = execution.task_id
+            self._completion_events[execution.execution_id] = threading.Event()
+            self._kill_events[execution.execution_id] = threading.Event()
+    
+    def _unregister_process(self, execution: TaskExecution):
+        with self._running_lock:
+            task_id = self._execution_index.pop(execution.execution_id, None)
+            executions = self.running_processes.get(task_id)
+            if executions is not None:
+                executions.pop(execution.execution_id, None)
+                if not executions:
+                    del self.running_processes[task_id]
+            finished = self._completion_events.pop(execution.execution_id, None)
+            self._kill_events.pop(execution.execution_id, None)
+        if finished is not None:
+            finished.set()
+    
+    def _reap_process(self, process: subprocess.Popen, execution: TaskExecution, blocking: bool = True) -> bool:
+        """通过 wait4 回收子进程并记录资源占用，返回进程是否已退出
+        
+        rusage 包含任务进程及其已等待回收的后代（如 shell 启动的子进程）；
+        脱离进程树后被 init 接管的进程不计入。
+        回收在 _running_lock 内完成（阻塞时先用 waitid(WNOWAIT) 等待退出但不回收），
+        持有该锁并确认 returncode 为空后发送的信号不会落到 PID 已被复用的进程上。
+        """
+        if process.returncode is not None:
+            return True
+        if blocking and hasattr(os, 'waitid'):
+            try:
+                os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+            except ChildProcessError:
+                pass
+            blocking = False
+        with self._running_lock:
+            if process.returncode is not None:
+                return True
+            try:
+                pid, status, rusage = os.wait4(process.pid, 0 if blocking else os.WNOHANG)
+            except ChildProcessError:
+                # 已被其他调用回收，无法再获取资源占用
+                process.wait()
+                return True
+            if pid == 0:
+                return False
+            process.returncode = os.waitstatus_to_exitcode(status)
+        execution.cpu_user_time = round(rusage.ru_utime, 3)
+        execution.cpu_system_time = round(rusage.ru_stime, 3)
+        execution.max_rss_kb = rusage.ru_maxrss
+        return True
+    
+    def _live_process(self, execution_id: str) -> Optional[subprocess.Popen]:
+        """返回尚未被回收的执行进程，调用方必须持有 _running_lock"""
+        task_id = self._execution_index.get(execution_id)
+        entry = self.running_processes.get(task_id, {}).get(execution_id)
+        if entry is None or entry[0].returncode is not None:
+            return None
+        return entry[0]
+    
+    def _signal_execution(self, execution_id: str, sig: int) -> bool:
+        """向仍在运行的执行所在的进程组发送信号，返回是否已发送"""
+        with self._running_lock:
+            process = self._live_process(execution_id)
+            if process is None:
+                return False
+            signal_process_group(process, sig)
+            return True
+    
+    def _kill_execution(self, execution_id: str) -> bool:
+        """向执行所在的进程组发送 SIGKILL，并通知读取线程不再等待输出结束"""
+        with self._running_lock:
+            killed = self._kill_events.get(execution_id)
+            if killed is not None:
+                killed.set()
+            process = self._live_process(execution_id)
+            if process is None:
+                return False
+            signal_process_group(process, signal.SIGKILL)
+            return True
+    
+    def get_running_executions(self, task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取正在执行的任务列表（可按任务ID过滤）"""
+        now = datetime.now()
+        with self._running_lock:
+            if task_id is not None:
+                entries = list(self.running_processes.get(task_id, {}).values())
+            else:
+                entries = [entry for executions in self.running_processes.values() for entry in executions.values()]
+        return [{
+            "task_id": execution.task_id,
+            "execution_id": execution.execution_id,
+            "pid": process.pid,
+            "start_time": execution.start_time.isoformat(),
+            "elapsed": (now - execution.start_time).total_seconds()
+        } for process, execution in entries]
 
     def _prepare_environment(self, task: Task) -> Dict[str, str]:
         """准备任务执行的环境变量"""
@@ -384,10 +1103,8 @@ class TaskExecutor:
         env_file_path = task_env_config.get("_ENV_FILE")
         
         if env_file_path:
-            # 获取项目根目录路径（scheduler_engine.py 所在目录）
-            project_root = os.path.dirname(os.path.abspath(__file__))
             # 将 env_file_path 解析为相对于项目根目录的绝对路径
-            absolute_env_file_path = os.path.join(project_root, env_file_path)
+            absolute_env_file_path = resolve_path(env_file_path)
             
             self.logger.info(f"任务 {task.task_id} 指定了环境文件: {env_file_path}")
             self.logger.debug(f"解析后的环境文件绝对路径: {absolute_env_file_path}")
@@ -419,7 +1136,7 @@ class TaskExecutor:
         filtered_task_env = {k: v for k, v in task_env_config.items() if v is not None and not k.startswith('_')}
         env.update(filtered_task_env)
         env['TASK_ID'] = task.task_id
-        env['TASK_LOG'] = task.task_log
+        env['TASK_LOG'] = resolve_path(task.task_log)
         
         # 移除以 _ 开头的内部配置项
         return {k: v for k, v in env.items() if not k.startswith('_')}
@@ -436,50 +1153,148 @@ class TaskExecutor:
             return cmd, True
 
     def _stream_process_output(self, process: subprocess.Popen, execution: TaskExecution, log_file, task: Task):
-        """实时流式传输进程输出"""
-        output_lines = []
+        """实时流式传输进程输出
+        
+        完整输出只写入日志文件，内存中仅保留有界的尾部缓冲区，
+        执行记录中保存输出的行数和字节数。
+        """
+        output_tail = OutputTail(task.task_output_tail_lines, task.task_output_tail_bytes)
+        execution_id = execution.execution_id
+        # 超时由共享的看门狗在读取输出期间强制执行，持续输出或静默占用管道的任务同样会被终止
+        if task.task_timeout:
+            self.timeout_watchdog.schedule(execution_id, task.task_timeout,
+                                           lambda: self._on_timeout(execution_id, task))
         try:
             if process.stdout:
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        log_file.write(output)
-                        log_file.flush()
-                        output_lines.append(output.rstrip())
-            
-            process.wait(timeout=task.task_timeout)
+                self._read_output(process, execution_id, log_file, output_tail)
+            self._record_output_stats(execution, output_tail)
             
+            self._reap_process(process, execution)
+        finally:
+            self.timeout_watchdog.cancel(execution_id)
+            self.timeout_watchdog.cancel(f"{execution_id}:kill")
+        
+        stopped = self._take_stopped(execution_id, process.returncode)
+        with self._running_lock:
+            timed_out = execution_id in self._timed_out
+            self._timed_out.discard(execution_id)
+        if timed_out:
             execution.return_code = process.returncode
-            execution.output = '\n'.join(output_lines)
-            
-            if process.returncode == 0:
-                execution.status = "success"
-                self.logger.info(f"任务执行完成: {task.task_id}")
-                self.logger.debug(f"执行结果: 成功 (退出码: 0)")
-            elif process.returncode == -15:  # SIGTERM 信号，表示进程被正常终止
-                execution.status = "terminated"
-                execution.error_message = "任务因参数变化或配置更新而终止"
-                self.logger.info(f"任务 {task.task_id} 因参数变化或配置更新而终止执行")
-                # 在任务日志中记录终止原因
-                log_file.write("\n========================================\n")
-                log_file.write("任务因参数变化或配置更新而终止执行\n")
-                log_file.write("========================================\n")
-                log_file.flush()
-            else:
-                execution.status = "failed"
-                execution.error_message = f"返回码: {process.returncode}"
-                self.logger.error(f"任务 {task.task_id} 执行失败，返回码: {process.returncode}")
-                
-        except subprocess.TimeoutExpired:
-            process.kill()
+            self._apply_timeout_status(execution, log_file, task)
+        elif stopped:
+            execution.return_code = process.returncode
+            self._apply_stopped_status(execution, log_file, task)
+        else:
+            self._apply_exit_status(process.returncode, execution, log_file, task)
+
+    def _read_output(self, process: subprocess.Popen, execution_id: str, log_file, output_tail: OutputTail):
+        """读取子进程输出直到管道关闭
+        
+        与异步模式一致：进程组被 SIGKILL 强制终止后立即停止读取，
+        不再等待脱离进程组但仍持有管道的后代进程。
+        """
+        with self._running_lock:
+            killed = self._kill_events.get(execution_id) or threading.Event()
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(errors='replace'), translate=True)
+        fd = process.stdout.fileno()
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(fd, selectors.EVENT_READ)
+                while not killed.is_set():
+                    if not selector.select(self.KILL_CHECK_INTERVAL):
+                        continue
+                    data = os.read(fd, 65536)
+                    if not data:
+                        break
+                    text = decoder.decode(data)
+                    if text:
+                        log_file.write(text)
+                        output_tail.feed(text)
+            text = decoder.decode(b'', final=True)
+            if text:
+                log_file.write(text)
+                output_tail.feed(text)
+            output_tail.close()
+        finally:
+            process.stdout.close()
+    
+    def _on_timeout(self, execution_id: str, task: Task):
+        """看门狗回调：先向进程组发送 SIGTERM，宽限期后仍未退出则发送 SIGKILL
+        
+        在 _running_lock 内按执行ID查找仍在运行的进程，已结束或已被回收的执行不会被标记为超时或收到信号。
+        """
+        with self._running_lock:
+            process = self._live_process(execution_id)
+            if process is None:
+                return
+            self._timed_out.add(execution_id)
+            signal_process_group(process, signal.SIGTERM)
+        self.logger.warning(f"任务 {task.task_id} 超过 {task.task_timeout} 秒未完成，正在终止进程组 (PID: {process.pid})")
+        self.timeout_watchdog.schedule(f"{execution_id}:kill", TASK_KILL_GRACE_PERIOD,
+                                       lambda: self._kill_execution(execution_id))
+
+    def _apply_exit_status(self, return_code: int, execution: TaskExecution, log_file, task: Task):
+        """根据子进程退出码设置执行状态"""
+        execution.return_code = return_code
+        
+        breach = self.resource_limiter.breach_reason(task, execution, return_code)
+        if breach:
+            execution.status = "limit_exceeded"
+            execution.error_message = breach
+            self.logger.error(f"任务 {task.task_id} 超出资源限制: {breach}，返回码: {return_code}")
+            log_file.write(f"\n任务超出资源限制: {breach}。\n")
+            log_file.flush()
+        elif return_code == 0:
+            execution.status = "success"
+            self.logger.info(f"任务执行完成: {task.task_id}")
+            self.logger.debug(f"执行结果: 成功 (退出码: 0)")
+        elif return_code == -15:  # SIGTERM 信号，表示进程被正常终止
+            execution.status = "terminated"
+            execution.error_message = "任务因参数变化或配置更新而终止"
+            self.logger.info(f"任务 {task.task_id} 因参数变化或配置更新而终止执行")
+            # 在任务日志中记录终止原因
+            log_file.write("\n========================================\n")
+            log_file.write("任务因参数变化或配置更新而终止执行\n")
+            log_file.write("========================================\n")
+            log_file.flush()
+        else:
             execution.status = "failed"
-            execution.error_message = f"任务超时 (超过 {task.task_timeout} 秒)"
-            self.logger.error(f"任务 {task.task_id} 因超时被终止")
-            log_file.write(f"\n任务执行超时 (>{task.task_timeout}s)，进程已被终止。\n")
+            execution.error_message = f"返回码: {return_code}"
+            self.logger.error(f"任务 {task.task_id} 执行失败，返回码: {return_code}")
+
+    def _apply_timeout_status(self, execution: TaskExecution, log_file, task: Task):
+        execution.status = "timeout"
+        execution.error_message = f"任务超时 (超过 {task.task_timeout} 秒)"
+        self.logger.error(f"任务 {task.task_id} 因超时被终止")
+        log_file.write(f"\n任务执行超时 (>{task.task_timeout}s)，进程已被终止。\n")
+        log_file.flush()
+
+    def _take_stopped(self, execution_id: str, return_code: Optional[int]) -> bool:
+        """执行是否被 stop_task 停止；停止请求到达前已正常退出（返回码 0）的执行按成功处理"""
+        with self._running_lock:
+            stopped = execution_id in self._stopped
+            self._stopped.discard(execution_id)
+        return stopped and return_code != 0
+
+    def _apply_stopped_status(self, execution: TaskExecution, log_file, task: Task):
+        execution.status = "stopped"
+        execution.error_message = f"任务执行已被停止 (返回码: {execution.return_code})"
+        self.logger.info(f"任务 {task.task_id} 的执行已被停止，返回码: {execution.return_code}")
+        log_file.write("\n任务执行已被停止（任务被删除、禁用或配置更新）。\n")
+        log_file.flush()
+
+    def _record_output_stats(self, execution: TaskExecution, output_tail: OutputTail):
+        """将输出统计信息和尾部缓冲写入执行记录"""
+        execution.output_tail = output_tail.text()
+        execution.output_lines = output_tail.total_lines
+        execution.output_bytes = output_tail.total_bytes
 
     def _log_task_start(self, log_file, task: Task, execution: TaskExecution):
+        execution.log_cursor_start = log_file.begin_execution(execution.execution_id, execution.start_time.isoformat())
+        self._write_event(task, execution, "start", task_name=task.task_name, command=task.task_exec,
+                          log_cursor=execution.log_cursor_start)
+        if not text_events_enabled():
+            return
         timestamp = execution.start_time.strftime('%Y-%m-%d %H:%M:%S')
         # 基本执行信息用 INFO 级别
         content = [
@@ -496,21 +1311,40 @@ class TaskExecutor:
             if not execution.end_time:
                 execution.end_time = datetime.now()
             timestamp = execution.end_time.strftime('%Y-%m-%d %H:%M:%S')
-            with open(task.task_log, 'a', encoding='utf-8') as log_file:
-                content = [
+            with task_log_writer(resolve_path(task.task_log)) as log_file:
+                content = [] if not text_events_enabled() else [
                     f"\n[{timestamp}] <INFO> task_{task.task_id}: 任务执行结束",
                     f"[{timestamp}] <INFO> task_{task.task_id}: - 执行耗时: {execution.duration:.2f}秒",
                     f"[{timestamp}] <{execution.status.upper()}> task_{task.task_id}: - 执行状态: {execution.status}",
-                    f"[{timestamp}] <INFO> task_{task.task_id}: - 返回码: {execution.return_code}\n"
+                    f"[{timestamp}] <INFO> task_{task.task_id}: - 返回码: {execution.return_code}"
                 ]
-                log_file.write('\n'.join(content))
+                if content and execution.cpu_user_time is not None:
+                    content.append(
+                        f"[{timestamp}] <INFO> task_{task.task_id}: - 资源占用: 用户CPU {execution.cpu_user_time:.2f}秒, "
+                        f"系统CPU {execution.cpu_system_time:.2f}秒, 最大内存 {execution.max_rss_kb / 1024:.1f}MB"
+                    )
+                if content:
+                    log_file.write('\n'.join(content) + '\n')
+                if execution.log_cursor_start:
+                    execution.log_cursor_end = log_file.end_execution(
+                        execution.execution_id, execution.status, execution.end_time.isoformat())
         except Exception as e:
             self.logger.error(f"无法写入任务 {task.task_id} 的结束日志: {e}")
+        self._write_event(
+            task, execution, "end", status=execution.status, return_code=execution.return_code,
+            duration=execution.duration, cpu_user_time=execution.cpu_user_time,
+            cpu_system_time=execution.cpu_system_time, max_rss_kb=execution.max_rss_kb,
+            output_lines=execution.output_lines, output_bytes=execution.output_bytes,
+            log_cursor_start=execution.log_cursor_start, log_cursor_end=execution.log_cursor_end
+        )
 
     def _log_execution_error(self, task: Task, execution: TaskExecution, error_msg: str):
+        self._write_event(task, execution, "error", error=error_msg)
+        if not text_events_enabled():
+            return
         try:
             timestamp = execution.start_time.strftime('%Y-%m-%d %H:%M:%S')
-            with open(task.task_log, 'a', encoding='utf-8') as log_file:
+            with task_log_writer(resolve_path(task.task_log)) as log_file:
                 content = [
                     f"\n[{timestamp}] <ERROR> task_{task.task_id}: 任务执行异常",
                     f"[{timestamp}] <ERROR> task_{task.task_id}: - 异常信息: {error_msg}\n"
@@ -518,21 +1352,34 @@ class TaskExecutor:
                 log_file.write('\n'.join(content))
         except Exception as e:
             self.logger.error(f"无法写入任务 {task.task_id} 的异常日志: {e}")
+    
+    def _write_event(self, task: Task, execution: TaskExecution, event: str, **fields):
+        """写入一条 JSON Lines 格式的生命周期事件，执行历史、监控和界面可以直接读取而无需解析文本日志"""
+        record = {"ts": datetime.now().isoformat(), "event": event, "task_id": task.task_id,
+                  "execution_id": execution.execution_id, "attempt": execution.attempt}
+        record.update(fields)
+        try:
+            write_task_event(resolve_path(task.task_log), record)
+        except Exception as e:
+            self.logger.error(f"无法写入任务 {task.task_id} 的 {event} 事件: {e}")
 
     def stop_task(self, execution_id: str) -> bool:
-        """停止正在执行的任务"""
-        if execution_id in self.running_processes:
-            process = self.running_processes[execution_id]
-            try:
-                process.terminate()
-                process.wait(timeout=5)
-                self.logger.info(f"已发送终止信号到任务执行 {execution_id}")
-                return True
-            except subprocess.TimeoutExpired:
-                process.kill()
-                self.logger.warning(f"强制终止任务执行 {execution_id}")
-                return True
-        return False
+        """停止正在执行的任务：先发送 SIGTERM，宽限期内未结束再发送 SIGKILL
+        
+        等待执行的完成事件而不是轮询退出状态；被停止的执行（包括被 SIGKILL 强制终止的）状态为 stopped，不会重试。
+        """
+        with self._running_lock:
+            process = self._live_process(execution_id)
+            finished = self._completion_events.get(execution_id)
+            if process is None or finished is None:
+                return False
+            self._stopped.add(execution_id)
+            # 向整个进程组发送信号，shell 启动的孙进程也会一并终止；进程由执行线程通过 wait4 回收
+            signal_process_group(process, signal.SIGTERM)
+        self.logger.info(f"已发送终止信号到任务执行 {execution_id}")
+        if not finished.wait(TASK_KILL_GRACE_PERIOD) and self._kill_execution(execution_id):
+            self.logger.warning(f"强制终止任务执行 {execution_id}")
+        return True
         
     def stop_all_tasks_by_id(self, task_id: str) -> int:
         """停止指定任务ID的所有正在执行的进程
@@ -544,41 +1391,25 @@ class TaskExecutor:
             int: 停止的进程数量
         """
         stopped_count = 0
-        execution_ids_to_stop = []
-        
-        # 记录更详细的日志，包括当前运行的进程数量
-        process_count = len(self.running_processes)
-        self.logger.info(f"正在查找任务 {task_id} 的正在执行进程，当前运行进程总数: {process_count}")
+        with self._running_lock:
+            execution_ids_to_stop = list(self.running_processes.get(task_id, {}))
         
-        # 由于我们无法直接从进程对象获取任务ID，我们需要停止所有正在运行的进程
-        # 这确保了任务更新时不会有旧的进程继续运行
-        if process_count > 0:
-            self.logger.info(f"正在停止任务 {task_id} 相关进程")
-            self.logger.debug(f"系统当前运行进程数: {process_count}")
-            
-            # 遍历所有正在运行的进程
-            for exec_id, process in list(self.running_processes.items()):
-                pid = process.pid if hasattr(process, 'pid') else 'N/A'
-                self.logger.info(f"准备停止执行ID: {exec_id}, 进程PID: {pid}")
-                execution_ids_to_stop.append(exec_id)
-            
-            # 停止所有找到的执行
-            for exec_id in execution_ids_to_stop:
-                try:
-                    if self.stop_task(exec_id):
-                        stopped_count += 1
-                        self.logger.info(f"已成功停止执行ID: {exec_id}")
-                    else:
-                        self.logger.warning(f"停止执行ID: {exec_id} 失败，可能进程已经结束")
-                except Exception as e:
-                    self.logger.error(f"停止执行ID: {exec_id} 时发生异常: {e}")
+        if not execution_ids_to_stop:
+            self.logger.info(f"任务 {task_id} 当前没有正在执行的进程")
+            return 0
         
-        # 记录更详细的结果日志
-        if stopped_count > 0:
-            self.logger.info(f"已成功停止 {stopped_count} 个正在执行的进程（任务更新: {task_id}）")
-        else:
-            self.logger.info(f"任务 {task_id} 当前没有正在执行的进程被停止")
+        self.logger.info(f"正在停止任务 {task_id} 的 {len(execution_ids_to_stop)} 个正在执行的进程")
+        for exec_id in execution_ids_to_stop:
+            try:
+                if self.stop_task(exec_id):
+                    stopped_count += 1
+                    self.logger.info(f"已成功停止执行ID: {exec_id}")
+                else:
+                    self.logger.warning(f"停止执行ID: {exec_id} 失败，可能进程已经结束")
+            except Exception as e:
+                self.logger.error(f"停止执行ID: {exec_id} 时发生异常: {e}")
         
+        self.logger.info(f"已成功停止 {stopped_count} 个正在执行的进程（任务: {task_id}）")
         return stopped_count
     
     def _clear_python_module_cache(self, task_exec: str):
@@ -599,6 +1430,252 @@ class TaskExecutor:
         except Exception as e:
             self.logger.debug(f"清理Python模块缓存时发生非关键异常: {e}")
 
+class AsyncTaskExecutor(TaskExecutor):
+    """基于 asyncio 的任务执行器
+    
+    由单个事件循环线程监督所有子进程：通过事件循环读取管道输出，用循环定时器实施超时，
+    子进程结束后通过回调把执行结果交还给调度引擎，运行中的任务不再各自占用一个线程。
+    事件循环中不做阻塞的文件操作：启动子进程在线程池中完成，日志写入（含执行索引和事件日志）
+    统一交给一个写入线程按提交顺序执行。
+    与线程模式相同，同一任务同一时间只允许一个执行；
+    已提交但尚未结束的执行总数不超过 max_processes + max_pending，超出时拒绝提交。
+    execute_task、stop_task、stop_all_tasks_by_id 接口与线程模式保持一致。
+    """
+    
+    # 单个执行在写入线程中排队的输出超过该大小时暂停读取管道，由子进程的管道缓冲形成背压
+    MAX_BUFFERED_OUTPUT = 1024 * 1024
+    
+    def __init__(self, tasks_dir: str = "tasks", max_processes: Optional[int] = None, max_pending: Optional[int] = None):
+        super().__init__(tasks_dir)
+        self.max_processes = max_processes or int(os.getenv('TASK_ASYNC_MAX_PROCESSES', '256'))
+        self.max_pending = max_pending if max_pending is not None else int(os.getenv('TASK_ASYNC_MAX_PENDING', '1024'))
+        self._log_io = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-log-writer")
+        self._loop = asyncio.new_event_loop()
+        self._process_slots = None
+        self._loop_ready = threading.Event()
+        self._loop_thread = threading.Thread(target=self._run_loop, name="task-supervisor", daemon=True)
+        self._loop_thread.start()
+        self._loop_ready.wait()
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._process_slots = asyncio.Semaphore(self.max_processes)
+        self._loop_ready.set()
+        self._loop.run_forever()
+    
+    def execute_task(self, task: Task, attempt: int = 0) -> TaskExecution:
+        """执行单个任务并等待其结束"""
+        return asyncio.run_coroutine_threadsafe(self._execute_async(task, attempt), self._loop).result()
+    
+    def submit_task(self, task: Task, on_complete: Callable[[TaskExecution], None], attempt: int = 0):
+        """提交任务到事件循环后立即返回，任务结束时在事件循环线程中回调 on_complete
+        
+        同一任务已有执行尚未结束，或排队等待进程名额的执行已达上限时拒绝提交并返回 None，不会回调 on_complete。
+        """
+        if not self._claim_inflight(task, self.max_processes + self.max_pending):
+            return None
+        
+        def _done(f):
+            self._release_inflight(task.task_id)
+            try:
+                on_complete(f.result())
+            except Exception as e:
+                self.logger.error(f"处理任务 {task.task_id} 的执行结果时发生异常: {e}")
+        
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._execute_async(task, attempt), self._loop)
+        except Exception:
+            self._release_inflight(task.task_id)
+            raise
+        future.add_done_callback(_done)
+        return future
+    
+    def shutdown(self):
+        """停止事件循环和日志写入线程"""
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+        self._log_io.shutdown(wait=True)
+    
+    def _spawn(self, task: Task, execution: TaskExecution, cmd, shell: bool, env: Dict[str, str], cwd: Optional[str]):
+        """在线程池中准备资源限制并启动子进程（fork/exec 和 cgroup 文件操作不阻塞事件循环）"""
+        return subprocess.Popen(
+            cmd, env=env, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=shell,
+            start_new_session=True, preexec_fn=self.resource_limiter.prepare(task, execution.execution_id)
+        )
+    
+    def _finish_async_execution(self, task: Task, execution: TaskExecution, log_file):
+        try:
+            self._finish_execution(task, execution)
+        finally:
+            if log_file:
+                release_log_writer(log_file)
+    
+    async def _execute_async(self, task: Task, attempt: int = 0) -> TaskExecution:
+        async with self._process_slots:
+            loop = asyncio.get_running_loop()
+            execution = self._create_execution(task, attempt)
+            log_file = None
+            try:
+                cmd, shell, env, cwd, log_path = await loop.run_in_executor(self._log_io, self._prepare_launch, task)
+                log_file = acquire_log_writer(log_path)
+                await loop.run_in_executor(self._log_io, self._log_task_start, log_file, task, execution)
+                
+                process = await loop.run_in_executor(None, partial(self._spawn, task, execution, cmd, shell, env, cwd))
+                self._register_process(execution, process)
+                
+                await self._supervise_process(process, execution, log_file, task)
+            
+            except Exception as e:
+                await loop.run_in_executor(self._log_io, self._handle_execution_exception, task, execution, e)
+            
+            finally:
+                await loop.run_in_executor(self._log_io, self._finish_async_execution, task, execution, log_file)
+            
+            return execution
+    
+    async def _supervise_process(self, process: subprocess.Popen, execution: TaskExecution, log_file, task: Task):
+        """在事件循环中读取子进程输出、实施超时并等待其退出，输出交给写入线程写入日志"""
+        loop = asyncio.get_running_loop()
+        output_tail = OutputTail(task.task_output_tail_lines, task.task_output_tail_bytes)
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        output_done = loop.create_future()
+        timed_out = False
+        fd = process.stdout.fileno()
+        os.set_blocking(fd, False)
+        # 写入线程中同一时间最多有一个该执行的写入，其间到达的输出先在这里合并
+        buffered: List[str] = []
+        buffered_size = 0
+        pending_write = None
+        reading = True
+        
+        def flush_output():
+            nonlocal buffered, buffered_size, pending_write
+            if pending_write is not None or not buffered:
+                return
+            text, buffered, buffered_size = ''.join(buffered), [], 0
+            pending_write = loop.run_in_executor(self._log_io, log_file.write, text)
+            pending_write.add_done_callback(on_written)
+        
+        def on_written(f):
+            nonlocal pending_write, reading
+            pending_write = None
+            if f.exception() is not None:
+                self.logger.error(f"写入任务 {task.task_id} 的日志失败: {f.exception()}")
+            if not reading and not output_done.done():
+                loop.add_reader(fd, on_readable)
+                reading = True
+            flush_output()
+        
+        def write_output(text: str):
+            nonlocal buffered_size, reading
+            if not text:
+                return
+            output_tail.feed(text)
+            buffered.append(text)
+            buffered_size += len(text)
+            flush_output()
+            if buffered_size > self.MAX_BUFFERED_OUTPUT and reading:
+                loop.remove_reader(fd)
+                reading = False
+        
+        def on_readable():
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b''
+            if data:
+                write_output(decoder.decode(data))
+            elif not output_done.done():
+                write_output(decoder.decode(b'', final=True))
+                output_done.set_result(None)
+        
+        def on_kill():
+            self._kill_execution(execution.execution_id)
+            # 脱离进程组的后代可能仍持有管道，强制终止后不再等待输出结束
+            if not output_done.done():
+                output_done.set_result(None)
+        
+        def on_timeout():
+            nonlocal timed_out, kill_handle
+            if not self._signal_execution(execution.execution_id, signal.SIGTERM):
+                return
+            timed_out = True
+            self.logger.warning(f"任务 {task.task_id} 超过 {task.task_timeout} 秒未完成，正在终止进程组 (PID: {process.pid})")
+            kill_handle = loop.call_later(TASK_KILL_GRACE_PERIOD, on_kill)
+        
+        kill_handle = None
+        loop.add_reader(fd, on_readable)
+        timeout_handle = loop.call_later(task.task_timeout, on_timeout) if task.task_timeout else None
+        try:
+            await output_done
+            loop.remove_reader(fd)
+            reading = False
+            # 等待已读取的输出全部写入日志后再写入结束状态
+            while pending_write is not None or buffered:
+                if pending_write is None:
+                    flush_output()
+                await asyncio.wait([pending_write])
+            output_tail.close()
+            self._record_output_stats(execution, output_tail)
+            await self._wait_for_exit(process, execution)
+        finally:
+            if timeout_handle:
+                timeout_handle.cancel()
+            if kill_handle:
+                kill_handle.cancel()
+            loop.remove_reader(fd)
+            process.stdout.close()
+        
+        await loop.run_in_executor(self._log_io, self._apply_final_status, process, execution, log_file, task, timed_out)
+    
+    def _apply_final_status(self, process: subprocess.Popen, execution: TaskExecution, log_file, task: Task,
+                            timed_out: bool):
+        stopped = self._take_stopped(execution.execution_id, process.returncode)
+        if timed_out:
+            execution.return_code = process.returncode
+            self._apply_timeout_status(execution, log_file, task)
+        elif stopped:
+            execution.return_code = process.returncode
+            self._apply_stopped_status(execution, log_file, task)
+        else:
+            self._apply_exit_status(process.returncode, execution, log_file, task)
+    
+    async def _wait_for_exit(self, process: subprocess.Popen, execution: TaskExecution):
+        """等待子进程退出：优先使用 pidfd 由事件循环通知，不支持时退化为定时轮询"""
+        if self._reap_process(process, execution, blocking=False):
+            return
+        
+        loop = asyncio.get_running_loop()
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except (AttributeError, OSError):
+            pidfd = None
+        
+        if pidfd is not None:
+            exited = loop.create_future()
+            loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+            try:
+                await exited
+            finally:
+                loop.remove_reader(pidfd)
+                os.close(pidfd)
+        
+        delay = 0.05
+        while not self._reap_process(process, execution, blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+def with_config_lock(method):
+    """在持有引擎配置锁期间执行：任务配置的修改与文件监控触发的重载互斥"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.config_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class SchedulerEngine:
     """任务调度引擎"""
     _instance = None
@@ -613,18 +1690,32 @@ class SchedulerEngine:
         if not SchedulerEngine._initialized:
             self.logger = logging.getLogger(__name__)
             self.task_loader = TaskLoader()
-            self.task_executor = TaskExecutor()
-            self.scheduler = BackgroundScheduler()
+            # 执行器模式：thread（每个运行中的任务占用一个线程）或 asyncio（单个事件循环监督所有子进程）
+            self.executor_mode = os.getenv('TASK_EXECUTOR_MODE', 'thread')
+            if self.executor_mode == 'asyncio':
+                self.task_executor = AsyncTaskExecutor(self.task_loader.tasks_dir)
+            else:
+                self.task_executor = TaskExecutor(self.task_loader.tasks_dir)
+            # 定时任务、重试和手动执行共用同一个执行线程池和并发组准入控制
+            self.max_workers = int(os.getenv('SCHEDULER_MAX_WORKERS', '10'))
+            self.admission_retry_delay = int(os.getenv('TASK_ADMISSION_RETRY_DELAY', '5'))
+            self.scheduler = BackgroundScheduler(executors={'default': ThreadPoolExecutor(self.max_workers)})
+            self.concurrency_limiter = ConcurrencyLimiter.from_env()
             self.tasks = {}
-            self.executions = {}
+            self.execution_history = ExecutionHistoryStore()
+            self.log_search = LogSearchIndex(
+                task_logs=lambda: {resolve_path(task.task_log): task_id for task_id, task in list(self.tasks.items())}
+            )
             self.file_observer = None
             self.config_handler = None
-            self.api_operation_timestamp = 0
-            self.api_operation_lock = threading.Lock()
+            # 保护引擎中任务状态的切换（可重入），只在修改 self.tasks 和调度作业时持有
+            self.config_lock = threading.RLock()
+            # 正在被 API 事务修改文件的任务，文件监控触发的重载暂时跳过，事务结束后再核对
+            self._config_changes = set()
             # 轮询机制相关属性
             self.polling_thread = None
             self.polling_stop_event = threading.Event()
-            self.last_file_modtimes = {}  # 存储文件最后修改时间
+            self.last_file_hashes = {}  # 存储配置文件最近一次轮询到的内容哈希
             self.polling_interval = int(os.getenv('TASK_CONFIG_POLLING_INTERVAL', '10'))  # 轮询间隔（秒）
             self.monitor_type = os.getenv('TASK_CONFIG_MONITOR_TYPE', 'watchdog')  # 监控类型：watchdog 或 polling
             SchedulerEngine._initialized = True
@@ -643,6 +1734,15 @@ class SchedulerEngine:
                 self._add_task_to_scheduler(task)
             self.tasks[task.task_id] = task
         
+        # 清理上次退出时未删除完的回收区（任务目录和日志目录）
+        trash_dirs = {self.task_loader.tasks_dir, resolve_path('logs')}
+        trash_dirs.update(os.path.dirname(resolve_path(task.task_log)) for task in tasks)
+        for directory in trash_dirs:
+            for path in sweep_trash(directory):
+                self.logger.info(f"已清理残留的回收区: {path}")
+        
+        self.execution_history.start()
+        self.log_search.start()
         self.scheduler.start()
         self._start_file_monitoring()
         self.logger.info("任务调度引擎已成功启动")
@@ -652,6 +1752,9 @@ class SchedulerEngine:
         self.logger.info("正在停止任务调度引擎...")
         self._stop_file_monitoring()
         self.scheduler.shutdown()
+        self.task_executor.shutdown()
+        self.execution_history.stop()
+        self.log_search.stop()
         self.logger.info("任务调度引擎已停止")
     
     def _add_task_to_scheduler(self, task: Task, log_add: bool = True):
@@ -699,17 +1802,15 @@ class SchedulerEngine:
     def _start_polling_monitoring(self):
         """启动轮询监控"""
         try:
-            # 初始化 last_file_modtimes 字典，记录所有配置文件的初始修改时间
+            # 初始化 last_file_hashes 字典，记录所有配置文件的初始内容哈希
             tasks_dir = self.task_loader.tasks_dir
             pattern = os.path.join(tasks_dir, "*", "config.json")
             config_files = glob.glob(pattern)
             for config_file in config_files:
-                try:
-                    mod_time = os.path.getmtime(config_file)
-                    self.last_file_modtimes[config_file] = mod_time
-                except OSError:
-                    # 文件可能已被删除
-                    pass
+                fingerprint = self.task_loader.fingerprint(config_file)
+                # 文件可能已被删除
+                if fingerprint is not None:
+                    self.last_file_hashes[config_file] = fingerprint.sha1
             
             self.polling_stop_event.clear()
             self.polling_thread = threading.Thread(target=self._polling_worker, daemon=True)
@@ -752,71 +1853,56 @@ class SchedulerEngine:
                     self.polling_stop_event.wait(1)
                     continue
                 
-                current_modtimes = {}
+                current_hashes = {}
                 current_files = set()
                 
                 for config_file in config_files:
-                    try:
-                        # 验证文件实际存在且可读
-                        if os.path.isfile(config_file) and os.access(config_file, os.R_OK):
-                            mod_time = os.path.getmtime(config_file)
-                            current_modtimes[config_file] = mod_time
-                            current_files.add(config_file)
-                        else:
-                            self.logger.debug(f"配置文件暂不可读: {config_file}")
-                    except (OSError, IOError) as e:
+                    # 按 (大小, mtime_ns, inode, sha1) 指纹判断：stat 信息未变时不读取文件，
+                    # 仅 touch、Docker 挂载的 mtime 抖动或编辑器保存过程中内容未变时不视为变更
+                    fingerprint = self.task_loader.fingerprint(config_file)
+                    if fingerprint is None:
                         # 记录但忽略单个文件的访问错误
-                        self.logger.debug(f"访问文件 {config_file} 时出错: {e}")
+                        self.logger.debug(f"配置文件暂不可读: {config_file}")
                         continue
+                    current_hashes[config_file] = fingerprint.sha1
+                    current_files.add(config_file)
                 
-                # 检查是否有文件变更，使用更精确的判断逻辑
-                changed_files = []
+                # 检查是否有文件内容变更（含新发现的文件）
+                changed_files = [
+                    file_path for file_path in current_files
+                    if self.last_file_hashes.get(file_path) != current_hashes[file_path]
+                ]
                 deleted_files = []
                 
-                # 处理文件变更检测
-                for file_path in current_files:
-                    if file_path in self.last_file_modtimes:
-                        time_diff = abs(current_modtimes[file_path] - self.last_file_modtimes[file_path])
-                        # 只有当时间差大于0.1秒时才认为是真正的变更，避免Docker时间精度问题
-                        if time_diff > 0.1:
-                            changed_files.append(file_path)
-                    else:
-                        # 新发现的文件
-                        changed_files.append(file_path)
-                
                 # 处理文件删除检测，增加延迟确认机制
-                for file_path in list(self.last_file_modtimes.keys()):
-                    if file_path not in current_files:
-                        # 延迟确认，避免Docker挂载延迟导致的误判
-                        time.sleep(0.2)
-                        if not os.path.exists(file_path):
-                            deleted_files.append(file_path)
-                        else:
-                            self.logger.debug(f"文件 {file_path} 重新出现，忽略之前的不可见状态")
+                missing_files = [file_path for file_path in self.last_file_hashes if file_path not in current_files]
+                if missing_files:
+                    # 延迟确认（整批只等待一次），避免Docker挂载延迟导致的误判
+                    time.sleep(0.2)
+                for file_path in missing_files:
+                    if not os.path.exists(file_path):
+                        deleted_files.append(file_path)
+                    else:
+                        self.logger.debug(f"文件 {file_path} 重新出现，忽略之前的不可见状态")
                 
-                # 只有当确实有变更时才触发重载，且避免API操作触发的重载
-                if (changed_files or deleted_files) and not self._is_api_operation_recent():
+                # 只有当确实有变更时才触发重载，引擎自身的写入在重载时按内容哈希识别并跳过
+                if changed_files or deleted_files:
                     if changed_files:
                         self.logger.info(f"检测到任务配置变更: {len(changed_files)} 个文件")
                         self.logger.debug(f"变更文件列表: {changed_files}")
-                        # 逐个验证文件有效性后再重载
-                        for changed_file in changed_files:
-                            if os.path.exists(changed_file) and os.path.getsize(changed_file) > 0:
-                                self._reload_single_task(changed_file)
-                            else:
-                                self.logger.warning(f"跳过无效的配置文件: {changed_file}")
-                    
                     if deleted_files:
                         self.logger.info(f"检测到配置文件删除: {len(deleted_files)} 个文件")
-                        # 只有当删除的文件数量超过当前文件的10%时才全量重载
-                        deletion_ratio = len(deleted_files) / max(len(current_files), 1)
-                        if deletion_ratio > 0.1:
-                            self._reload_all_tasks()
+                    # 变更和删除一起交给增量重载，以便识别任务ID变更
+                    task_ids = [os.path.basename(os.path.dirname(path)) for path in deleted_files]
+                    for changed_file in changed_files:
+                        if os.path.exists(changed_file) and os.path.getsize(changed_file) > 0:
+                            task_ids.append(os.path.basename(os.path.dirname(changed_file)))
                         else:
-                            self.logger.debug(f"删除文件比例较低({deletion_ratio:.1%})，跳过全量重载")
+                            self.logger.warning(f"跳过无效的配置文件: {changed_file}")
+                    self._reload_tasks(task_ids)
                 
-                # 更新最后修改时间记录
-                self.last_file_modtimes = current_modtimes.copy()
+                # 更新内容哈希记录
+                self.last_file_hashes = current_hashes
                 
                 # 等待下一个轮询周期
                 self.polling_stop_event.wait(self.polling_interval)
@@ -836,6 +1922,8 @@ class SchedulerEngine:
                 self.file_observer.stop()
                 self.file_observer.join(timeout=5)
                 self.logger.info("已停止配置文件监控")
+            if self.config_handler:
+                self.config_handler.stop()
         except Exception as e:
             self.logger.error(f"停止文件监控时发生异常: {e}")
         
@@ -845,78 +1933,101 @@ class SchedulerEngine:
             self.polling_thread.join(timeout=5)
             self.logger.info("已停止配置文件轮询监控")
     
-    def _mark_api_operation(self):
-        """标记API操作，用于短期内忽略文件变更事件"""
-        with self.api_operation_lock:
-            self.api_operation_timestamp = time.time()
-            self.logger.debug("已标记API操作时间戳，以避免不必要的重载")
-    
-    def _is_api_operation_recent(self) -> bool:
-        """检查文件变更是否由最近的API操作触发"""
-        with self.api_operation_lock:
-            # 延长API操作保护时间，考虑Docker挂载延迟
-            return (time.time() - self.api_operation_timestamp) < 5
-    
-    def _reload_single_task(self, config_file_path: str):
-        """重新加载单个任务配置"""
-        if self._is_api_operation_recent():
-            self.logger.info("检测到由API操作触发的文件变更，跳过本次自动重载")
-            return
-        
-        self.logger.info(f"开始从配置文件重新加载单个任务: {config_file_path}")
-        try:
-            # 从配置文件路径提取任务ID
-            task_id = os.path.basename(os.path.dirname(config_file_path))
-            
-            # 检查任务是否存在
+    def _plan_reload(self, task_ids: Iterable[str]) -> ReloadPlan:
+        """根据发生变化的任务目录生成最小重载计划，只解析这些目录下的配置文件"""
+        plan = ReloadPlan()
+        removed = []
+        for task_id in sorted(set(task_ids)):
+            if task_id in self._config_changes:
+                self.logger.debug(f"任务 {task_id} 的文件正在被修改，事务结束后再重载")
+                continue
+            config_file = self.task_loader.config_path(task_id)
+            if not os.path.isfile(config_file):
+                if task_id in self.tasks:
+                    removed.append(task_id)
+                continue
+            # 内容与引擎最近写入或加载的一致（如 API 自身的写入），无需解析
+            if task_id in self.tasks and self.task_loader.is_known_config(config_file):
+                continue
+            try:
+                fresh_task = self.task_loader.load_task(task_id)
+            except (OSError, json.JSONDecodeError, UnicodeDecodeError, TypeError) as e:
+                self.logger.error(f"解析任务配置文件失败: {config_file}，错误: {e}")
+                continue
+            if not self.task_loader._validate_task(fresh_task):
+                self.logger.warning(f"任务目录 {task_id} 中的配置无效，已跳过")
+                continue
             if task_id not in self.tasks:
-                self.logger.warning(f"任务 {task_id} 不存在，将作为新任务添加")
-                # 作为新任务添加
-                fresh_tasks = self.task_loader.load_tasks()
-                fresh_task = next((task for task in fresh_tasks if task.task_id == task_id), None)
-                if fresh_task:
-                    self.tasks[task_id] = fresh_task
-                    if fresh_task.task_enabled:
-                        self._add_task_to_scheduler(fresh_task)
-                    self.logger.info(f"成功添加新任务: {task_id}")
+                plan.added.append(fresh_task)
+            elif fresh_task != self.tasks[task_id]:
+                plan.updated.append(fresh_task)
+        
+        # 任务ID变更检测：按 (任务名称, 执行命令) 为被移除的任务建立哈希索引，与新增任务逐一匹配
+        if removed and plan.added:
+            index: Dict[tuple, List[str]] = {}
+            for old_id in removed:
+                old_task = self.tasks[old_id]
+                index.setdefault((old_task.task_name, old_task.task_exec), []).append(old_id)
+            added = []
+            for new_task in plan.added:
+                candidates = index.get((new_task.task_name, new_task.task_exec))
+                if candidates:
+                    old_id = candidates.pop(0)
+                    self.logger.info(f"检测到任务ID变更: {old_id} -> {new_task.task_id}")
+                    plan.renamed.append((old_id, new_task))
                 else:
-                    self.logger.error(f"无法从配置文件加载任务: {config_file_path}")
-                return
-            
-            # 加载新的任务配置
-            task_dir = os.path.join(self.task_loader.tasks_dir, task_id)
-            config_file = os.path.join(task_dir, 'config.json')
-            if not os.path.exists(config_file):
-                self.logger.error(f"任务配置文件不存在: {config_file}")
-                return
-                
+                    added.append(new_task)
+            plan.added = added
+            renamed_ids = {old_id for old_id, _ in plan.renamed}
+            removed = [task_id for task_id in removed if task_id not in renamed_ids]
+        plan.removed = removed
+        return plan
+    
+    def _remove_stale_task_log(self, old_task: Task, new_task: Task):
+        """日志路径变更时删除旧日志文件"""
+        if old_task.task_log != new_task.task_log and os.path.exists(resolve_path(old_task.task_log)):
             try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    task_data = json.load(f)
-                fresh_task = Task(**task_data)
-            except (json.JSONDecodeError, TypeError) as e:
-                self.logger.error(f"解析任务配置文件失败: {config_file}，错误: {e}")
-                return
-                
-            # 获取当前任务配置
-            current_task = self.tasks[task_id]
+                # 如果旧日志文件存在且与新日志文件不同，则删除旧日志文件
+                remove_task_logs(resolve_path(old_task.task_log))
+                self.logger.info(f"已删除任务 {old_task.task_id} 的旧日志文件: {old_task.task_log}")
+            except Exception as e:
+                self.logger.warning(f"删除任务 {old_task.task_id} 的旧日志文件失败: {e}")
+    
+    def _apply_reload_plan(self, plan: ReloadPlan):
+        """执行重载计划，只改动计划中涉及的任务和调度作业"""
+        # 处理任务ID变更
+        for old_id, new_task in plan.renamed:
+            self.logger.info(f"处理任务ID变更: {old_id} -> {new_task.task_id}")
             
-            # 检查任务是否有变更
-            if fresh_task == current_task:
-                self.logger.info(f"任务 {task_id} 配置无变更，跳过更新")
-                return
-                
+            # 停止旧任务的所有执行计划
+            if self.scheduler.get_job(old_id):
+                self.logger.info(f"移除旧任务 {old_id} 的调度计划")
+                self.scheduler.remove_job(old_id)
+            self._cancel_pending_retry(old_id)
+            
+            # 停止旧任务的所有正在执行的进程
+            stopped_count = self.task_executor.stop_all_tasks_by_id(old_id)
+            if stopped_count > 0:
+                self.logger.info(f"已终止旧任务 {old_id} 的 {stopped_count} 个正在执行的进程")
+            
+            self._remove_stale_task_log(self.tasks[old_id], new_task)
+            
+            # 从当前任务列表中移除旧任务
+            del self.tasks[old_id]
+            self.task_loader.forget_config(old_id)
+            
+            # 将新任务添加到调度器
+            if new_task.task_enabled:
+                self._add_task_to_scheduler(new_task)
+            self.tasks[new_task.task_id] = new_task
+        
+        # 处理配置有变更的任务
+        for fresh_task in plan.updated:
+            task_id = fresh_task.task_id
+            current_task = self.tasks[task_id]
             self.logger.info(f"正在更新任务: {task_id}")
-            self.logger.debug("检测到配置变更，开始更新处理")
             
-            # 检查日志文件路径是否变更
-            if fresh_task.task_log != current_task.task_log and os.path.exists(current_task.task_log):
-                try:
-                    # 如果旧日志文件存在且与新日志文件不同，则删除旧日志文件
-                    os.remove(current_task.task_log)
-                    self.logger.info(f"已删除任务 {task_id} 的旧日志文件: {current_task.task_log}")
-                except Exception as e:
-                    self.logger.warning(f"删除任务 {task_id} 的旧日志文件失败: {e}")
+            self._remove_stale_task_log(current_task, fresh_task)
             
             # 检查关键配置是否变更
             if fresh_task.has_critical_changes(current_task):
@@ -925,6 +2036,7 @@ class SchedulerEngine:
                 # 停止该任务的调度计划
                 if self.scheduler.get_job(task_id):
                     self.scheduler.remove_job(task_id)
+                self._cancel_pending_retry(task_id)
                 
                 # 停止该任务的所有正在执行的进程
                 stopped_count = self.task_executor.stop_all_tasks_by_id(task_id)
@@ -938,180 +2050,227 @@ class SchedulerEngine:
             # 更新任务配置
             self.tasks[task_id] = fresh_task
             self.logger.info(f"任务 {task_id} 配置更新完成")
-        except Exception as e:
-            self.logger.error(f"重新加载单个任务配置时发生严重错误: {e}")
+        
+        # 处理已删除的任务
+        for task_id in plan.removed:
+            self._unload_task(task_id)
+        
+        # 处理新增任务
+        for fresh_task in plan.added:
+            self.logger.info(f"发现新任务 {fresh_task.task_id}，将添加到调度计划")
+            self.tasks[fresh_task.task_id] = fresh_task
+            if fresh_task.task_enabled:
+                self._add_task_to_scheduler(fresh_task)
     
-    def _reload_all_tasks(self):
-        """重新加载所有任务配置"""
-        if self._is_api_operation_recent():
-            self.logger.info("检测到由API操作触发的文件变更，跳过本次自动重载")
-            return
+    def _unload_task(self, task_id: str):
+        """配置文件已被移除的任务：停止调度和正在执行的进程，并从任务列表中移除"""
+        self.logger.info(f"任务 {task_id} 已从配置文件中移除，将停止调度")
+        
+        # 停止该任务的调度计划
+        if self.scheduler.get_job(task_id):
+            self.scheduler.remove_job(task_id)
+        self._cancel_pending_retry(task_id)
+        
+        # 停止该任务的所有正在执行的进程
+        stopped_count = self.task_executor.stop_all_tasks_by_id(task_id)
+        if stopped_count > 0:
+            self.logger.info(f"已终止任务 {task_id} 的 {stopped_count} 个正在执行的进程")
         
-        self.logger.info("开始从配置文件重新加载所有任务...")
+        # 从当前任务列表中移除
+        del self.tasks[task_id]
+        self.task_loader.forget_config(task_id)
+    
+    @with_config_lock
+    def begin_config_change(self, task_id: str):
+        """API 开始修改任务文件：文件操作期间不持有配置锁，文件监控触发的重载暂时跳过该任务"""
+        self._config_changes.add(task_id)
+    
+    def end_config_change(self, task_id: str):
+        """API 结束修改任务文件：按事务提交或回滚后磁盘上的配置重新核对该任务"""
+        with self.config_lock:
+            self._config_changes.discard(task_id)
+        self._reload_tasks([task_id])
+    
+    @with_config_lock
+    def _reload_tasks(self, task_ids: Iterable[str]):
+        """按发生变化的任务目录增量重载：生成最小计划（新增/更新/移除/ID变更）后执行"""
         try:
-            fresh_tasks_dict = {task.task_id: task for task in self.task_loader.load_tasks()}
-            current_task_ids = set(self.tasks.keys())
-            fresh_task_ids = set(fresh_tasks_dict.keys())
-            
-            # 创建任务ID映射表，用于检测任务ID变更
-            # 通过比较任务的其他属性（如任务名称、执行命令等）来识别可能是ID变更的任务
-            id_mapping = {}
-            for old_id in current_task_ids - fresh_task_ids:
-                old_task = self.tasks[old_id]
-                for new_id in fresh_task_ids - current_task_ids:
-                    new_task = fresh_tasks_dict[new_id]
-                    # 如果任务名称和执行命令相同，认为是同一个任务但ID变更了
-                    if (old_task.task_name == new_task.task_name and 
-                        old_task.task_exec == new_task.task_exec):
-                        id_mapping[old_id] = new_id
-                        self.logger.info(f"检测到任务ID变更: {old_id} -> {new_id}")
-                        break
-
-            # 处理任务ID变更
-            for old_id, new_id in id_mapping.items():
-                self.logger.info(f"处理任务ID变更: {old_id} -> {new_id}")
-                
-                # 停止旧任务的所有执行计划
-                if self.scheduler.get_job(old_id):
-                    self.logger.info(f"移除旧任务 {old_id} 的调度计划")
-                    self.scheduler.remove_job(old_id)
-                
-                # 停止旧任务的所有正在执行的进程
-                stopped_count = self.task_executor.stop_all_tasks_by_id(old_id)
-                if stopped_count > 0:
-                    self.logger.info(f"已终止旧任务 {old_id} 的 {stopped_count} 个正在执行的进程")
-                
-                # 处理日志文件变更
-                old_task = self.tasks[old_id]
-                new_task = fresh_tasks_dict[new_id]
-                if old_task.task_log != new_task.task_log and os.path.exists(old_task.task_log):
-                    try:
-                        # 如果旧日志文件存在且与新日志文件不同，则删除旧日志文件
-                        os.remove(old_task.task_log)
-                        self.logger.info(f"已删除旧任务 {old_id} 的日志文件: {old_task.task_log}")
-                    except Exception as e:
-                        self.logger.warning(f"删除旧任务 {old_id} 的日志文件失败: {e}")
-                
-                # 从当前任务列表中移除旧任务
-                del self.tasks[old_id]
-                
-                # 将新任务添加到调度器
-                if new_task.task_enabled:
-                    self._add_task_to_scheduler(new_task)
-                self.tasks[new_id] = new_task
-
-            # 更新和检测变更（处理未变更ID的任务）
-            for task_id in current_task_ids.intersection(fresh_task_ids):
-                fresh_task = fresh_tasks_dict[task_id]
-                current_task = self.tasks[task_id]
-                
-                # 检查日志文件路径是否变更
-                if fresh_task.task_log != current_task.task_log and os.path.exists(current_task.task_log):
-                    try:
-                        # 如果旧日志文件存在且与新日志文件不同，则删除旧日志文件
-                        os.remove(current_task.task_log)
-                        self.logger.info(f"已删除任务 {task_id} 的旧日志文件: {current_task.task_log}")
-                    except Exception as e:
-                        self.logger.warning(f"删除任务 {task_id} 的旧日志文件失败: {e}")
-                
-                # 检查关键配置是否变更
-                if fresh_task.has_critical_changes(current_task):
-                    self.logger.info(f"任务 {task_id} 的关键配置发生变更，将重新调度")
-                    
-                    # 停止该任务的调度计划
-                    if self.scheduler.get_job(task_id):
-                        self.scheduler.remove_job(task_id)
-                    
-                    # 停止该任务的所有正在执行的进程
-                    stopped_count = self.task_executor.stop_all_tasks_by_id(task_id)
-                    if stopped_count > 0:
-                        self.logger.info(f"已终止任务 {task_id} 的 {stopped_count} 个正在执行的进程")
-                    
-                    # 如果任务启用，重新添加到调度器
-                    if fresh_task.task_enabled:
-                        self._add_task_to_scheduler(fresh_task)
-                
-                # 更新任务配置
-                self.tasks[task_id] = fresh_task
-
-            # 处理已删除的任务（排除已处理的ID变更任务）
-            for task_id in current_task_ids - fresh_task_ids - set(id_mapping.keys()):
-                self.logger.info(f"任务 {task_id} 已从配置文件中移除，将停止调度")
-                
-                # 停止该任务的调度计划
-                if self.scheduler.get_job(task_id):
-                    self.scheduler.remove_job(task_id)
-                
-                # 停止该任务的所有正在执行的进程
-                stopped_count = self.task_executor.stop_all_tasks_by_id(task_id)
-                if stopped_count > 0:
-                    self.logger.info(f"已终止任务 {task_id} 的 {stopped_count} 个正在执行的进程")
-                
-                # 从当前任务列表中移除
-                del self.tasks[task_id]
-
-            # 处理新增任务（排除已处理的ID变更任务）
-            for task_id in fresh_task_ids - current_task_ids - set(id_mapping.values()):
-                fresh_task = fresh_tasks_dict[task_id]
-                self.logger.info(f"发现新任务 {task_id}，将添加到调度计划")
-                self.tasks[task_id] = fresh_task
-                if fresh_task.task_enabled:
-                    self._add_task_to_scheduler(fresh_task)
-            
-            tasks_count = len(self.tasks)
-            self.logger.info(f"任务配置重载完成，共 {tasks_count} 个任务")
-            self.logger.debug("系统已完成所有任务的重载处理")
+            plan = self._plan_reload(task_ids)
+            if not plan:
+                self.logger.debug("任务配置与引擎中的一致，跳过本次自动重载")
+                return
+            self.logger.info(
+                f"任务配置重载计划: 新增 {len(plan.added)} 个, 更新 {len(plan.updated)} 个, "
+                f"移除 {len(plan.removed)} 个, ID变更 {len(plan.renamed)} 个"
+            )
+            self._apply_reload_plan(plan)
+            self.logger.info(f"任务配置重载完成，共 {len(self.tasks)} 个任务")
         except Exception as e:
             self.logger.error(f"重新加载任务配置时发生严重错误: {e}")
     
-    def _execute_task_wrapper(self, task: Task):
-        """任务执行的包装器，包含重试逻辑"""
-        self.logger.debug(f"调度器触发任务: {task.task_id} ({task.task_name})")
+    def _execute_task_wrapper(self, task: Task, attempt: int = 0, requeue: bool = False):
+        """任务执行的包装器，包含重试逻辑
+        
+        每次调用只执行一次尝试。需要重试时，下一次尝试会作为一次性的 date 触发任务
+        重新提交给调度器，退避期间不会占用线程池中的线程。
+        同一任务的上一次执行尚未结束时，重试以及 requeue 为 True 的推迟和手动执行会推迟到稍后再试，
+        定时触发的执行则直接跳过。
+        """
+        if attempt == 0:
+            self.logger.debug(f"调度器触发任务: {task.task_id} ({task.task_name})")
+            if self.task_executor.is_inflight(task.task_id):
+                # 同一任务仍在执行：跳过（或推迟）本轮，也不取消该执行之后调度的重试
+                self.logger.warning(f"任务 {task.task_id} 的上一次执行尚未结束")
+                if requeue:
+                    self._defer_execution(task, attempt)
+                return
+            # 新一轮执行取代尚未开始的重试
+            self._cancel_pending_retry(task.task_id)
+        elif task.task_id not in self.tasks:
+            self.logger.info(f"任务 {task.task_id} 已被移除，取消第 {attempt} 次重试")
+            return
+        
         current_task = self.tasks.get(task.task_id, task)
+        group = current_task.task_concurrency_group
+        if not self.concurrency_limiter.try_acquire(group):
+            self.logger.info(f"任务 {task.task_id} 所在并发组 {group} 已满")
+            self._defer_execution(current_task, attempt)
+            return
         
-        for attempt in range(current_task.task_retry + 1):
-            execution = self.task_executor.execute_task(current_task)
-            
-            if current_task.task_id not in self.executions:
-                self.executions[current_task.task_id] = []
-            self.executions[current_task.task_id].append(execution)
-            
-            # 根据任务脚本开发指南的退出码规范判断是否需要重试
-            if execution.status == "success":
-                # 退出码 0：成功，不重试
-                break
-            elif execution.status == "terminated":
-                # 任务被终止（如因参数变化），不重试
-                self.logger.info(f"任务 {current_task.task_id} 被终止，不进行重试")
-                break
-            elif execution.return_code == 1:
-                # 退出码 1：业务失败，不重试
-                self.logger.info(f"任务 {current_task.task_id} 业务失败")
-                self.logger.debug(f"失败原因: 业务错误（退出码: 1），按规范不进行重试")
-                break
-            elif execution.return_code == 2:
-                # 退出码 2：技术失败，可以重试
-                if attempt < current_task.task_retry:
-                    self.logger.info(f"任务 {current_task.task_id} 执行失败（第 {attempt + 1} 次尝试）")
-                    self.logger.debug(f"失败原因: 技术错误（退出码: 2）, 将在 {current_task.task_retry_interval} 秒后重试")
-                    time.sleep(current_task.task_retry_interval)
-                else:
-                    self.logger.error(f"任务 {current_task.task_id} 技术失败，已达到最大重试次数（{current_task.task_retry}）")
-                    break
-            elif execution.return_code == -15:  # 明确检查 SIGTERM 信号
-                # 任务被终止（如因参数变化），不重试
-                self.logger.info(f"任务 {current_task.task_id} 因参数变化或配置更新而终止，不进行重试")
-                break
-            else:
-                # 其他退出码：按技术失败处理，可以重试
-                if attempt < current_task.task_retry:
-                    self.logger.info(f"任务 {current_task.task_id} 执行失败（第 {attempt + 1} 次尝试）")
-                    self.logger.debug(f"失败原因: 未知错误（退出码: {execution.return_code}），将在 {current_task.task_retry_interval} 秒后重试")
-                    time.sleep(current_task.task_retry_interval)
-                else:
-                    self.logger.error(f"任务 {current_task.task_id} 执行失败，已达到最大重试次数 ({current_task.task_retry})")
-                    break
+        try:
+            submitted = self.task_executor.submit_task(
+                current_task,
+                lambda execution: self._on_execution_complete(current_task, execution, attempt),
+                attempt=attempt
+            )
+        except Exception:
+            self.concurrency_limiter.release(group)
+            raise
+        if submitted is None:
+            # 执行器拒绝了本次提交（同一任务的上一次执行尚未结束或排队已满），不会回调 on_complete
+            self.concurrency_limiter.release(group)
+            if attempt > 0 or requeue:
+                self._defer_execution(current_task, attempt)
+    
+    def _on_execution_complete(self, task: Task, execution: TaskExecution, attempt: int):
+        """任务执行结束后的处理：释放并发名额、记录执行历史并按需调度重试"""
+        self.concurrency_limiter.release(task.task_concurrency_group)
+        self.execution_history.record(asdict(execution))
+        
+        if self._should_retry(task, execution, attempt):
+            self._schedule_retry(task, attempt + 1, execution)
     
+    def _defer_execution(self, task: Task, attempt: int):
+        """暂时无法执行（并发组名额已满或同一任务仍在执行）时，推迟执行而不是占用线程等待"""
+        job_id = self._retry_job_id(task.task_id) if attempt > 0 else f"{task.task_id}__deferred"
+        self.logger.info(f"任务 {task.task_id} 将在 {self.admission_retry_delay} 秒后再次尝试执行")
+        try:
+            self.scheduler.add_job(
+                func=self._execute_task_wrapper,
+                trigger=DateTrigger(run_date=datetime.now() + timedelta(seconds=self.admission_retry_delay)),
+                id=job_id,
+                args=[task, attempt, True],
+                replace_existing=True,
+                misfire_grace_time=None
+            )
+        except Exception as e:
+            self.logger.error(f"推迟执行任务 {task.task_id} 失败: {e}")
+    
+    def _should_retry(self, task: Task, execution: TaskExecution, attempt: int) -> bool:
+        """根据任务脚本开发指南的退出码规范判断是否需要重试"""
+        if execution.status == "success":
+            # 退出码 0：成功，不重试
+            return False
+        elif execution.status == "timeout":
+            # 超时按技术失败处理，可以重试
+            if attempt < task.task_retry:
+                self.logger.info(f"任务 {task.task_id} 执行超时（第 {attempt + 1} 次尝试）")
+                return True
+            self.logger.error(f"任务 {task.task_id} 执行超时，已达到最大重试次数 ({task.task_retry})")
+            return False
+        elif execution.status == "limit_exceeded":
+            # 超出资源限制，重试结果相同，不重试
+            self.logger.info(f"任务 {task.task_id} 超出资源限制，不进行重试")
+            return False
+        elif execution.status == "stopped":
+            # 执行被调度器停止（任务被删除、禁用或配置更新），不重试
+            self.logger.info(f"任务 {task.task_id} 的执行已被停止，不进行重试")
+            return False
+        elif execution.status == "terminated":
+            # 任务被终止（如因参数变化），不重试
+            self.logger.info(f"任务 {task.task_id} 被终止，不进行重试")
+            return False
+        elif execution.return_code == 1:
+            # 退出码 1：业务失败，不重试
+            self.logger.info(f"任务 {task.task_id} 业务失败")
+            self.logger.debug(f"失败原因: 业务错误（退出码: 1），按规范不进行重试")
+            return False
+        elif execution.return_code == -15:  # 明确检查 SIGTERM 信号
+            # 任务被终止（如因参数变化），不重试
+            self.logger.info(f"任务 {task.task_id} 因参数变化或配置更新而终止，不进行重试")
+            return False
+        
+        # 退出码 2（技术失败）及其他退出码：按技术失败处理，可以重试
+        if attempt < task.task_retry:
+            reason = "技术错误" if execution.return_code == 2 else "未知错误"
+            self.logger.info(f"任务 {task.task_id} 执行失败（第 {attempt + 1} 次尝试）")
+            self.logger.debug(f"失败原因: {reason}（退出码: {execution.return_code}）")
+            return True
+        
+        self.logger.error(f"任务 {task.task_id} 执行失败，已达到最大重试次数 ({task.task_retry})")
+        return False
+    
+    def _get_retry_delay(self, task: Task, retry_number: int) -> float:
+        """计算第 retry_number 次重试前的等待时间（秒），支持指数退避和随机抖动"""
+        delay = task.task_retry_interval * (max(task.task_retry_backoff, 1.0) ** (retry_number - 1))
+        if task.task_retry_max_interval:
+            delay = min(delay, task.task_retry_max_interval)
+        if task.task_retry_jitter > 0:
+            jitter = min(task.task_retry_jitter, 1.0)
+            delay *= random.uniform(1 - jitter, 1 + jitter)
+        return max(delay, 0)
+    
+    def _schedule_retry(self, task: Task, retry_number: int, execution: Optional[TaskExecution] = None):
+        """以一次性 date 触发任务的方式调度下一次重试"""
+        delay = self._get_retry_delay(task, retry_number)
+        run_date = datetime.now() + timedelta(seconds=delay)
+        try:
+            self.scheduler.add_job(
+                func=self._execute_task_wrapper,
+                trigger=DateTrigger(run_date=run_date),
+                id=self._retry_job_id(task.task_id),
+                args=[task, retry_number],
+                replace_existing=True,
+                misfire_grace_time=None
+            )
+            self.logger.info(f"任务 {task.task_id} 将在 {delay:.1f} 秒后进行第 {retry_number} 次重试")
+        except Exception as e:
+            self.logger.error(f"调度任务 {task.task_id} 的重试失败: {e}")
+            return
+        try:
+            write_task_event(resolve_path(task.task_log), {
+                "ts": datetime.now().isoformat(), "event": "retry_scheduled", "task_id": task.task_id,
+                "execution_id": execution.execution_id if execution else None, "attempt": retry_number,
+                "delay": round(delay, 3), "run_at": run_date.isoformat()
+            })
+        except Exception as e:
+            self.logger.error(f"无法写入任务 {task.task_id} 的 retry_scheduled 事件: {e}")
+    
+    @staticmethod
+    def _retry_job_id(task_id: str) -> str:
+        return f"{task_id}__retry"
+    
+    def _cancel_pending_retry(self, task_id: str):
+        """取消任务尚未开始的重试和因并发组已满而推迟的执行"""
+        for job_id in (self._retry_job_id(task_id), f"{task_id}__deferred"):
+            try:
+                if self.scheduler.get_job(job_id):
+                    self.scheduler.remove_job(job_id)
+                    self.logger.debug(f"已取消任务 {task_id} 待执行的作业 {job_id}")
+            except Exception as e:
+                self.logger.debug(f"取消任务 {task_id} 的待执行作业时发生非关键异常: {e}")
+    
+    @with_config_lock
     def add_task(self, task: Task) -> bool:
         """添加新任务"""
         if task.task_id in self.tasks:
@@ -1121,7 +2280,6 @@ class SchedulerEngine:
             self.tasks[task.task_id] = task
             if task.task_enabled:
                 self._add_task_to_scheduler(task)
-            self._mark_api_operation()
             self.task_loader.save_task(task)
             self.logger.info(f"成功添加新任务: {task.task_id}")
             return True
@@ -1129,6 +2287,7 @@ class SchedulerEngine:
             self.logger.error(f"添加任务 {task.task_id} 失败: {e}")
             return False
     
+    @with_config_lock
     def remove_task(self, task_id: str) -> bool:
         """移除任务"""
         if task_id not in self.tasks:
@@ -1141,6 +2300,7 @@ class SchedulerEngine:
             if self.scheduler.get_job(task_id):
                 self.scheduler.remove_job(task_id)
                 self.logger.info(f"已从调度器中移除任务 {task_id} 的计划")
+            self._cancel_pending_retry(task_id)
             
             # 停止该任务的所有正在执行的进程
             stopped_count = self.task_executor.stop_all_tasks_by_id(task_id)
@@ -1150,7 +2310,6 @@ class SchedulerEngine:
             # 从任务列表中移除
             del self.tasks[task_id]
             
-            self._mark_api_operation()
             # 删除任务目录和文件
             self.task_loader.delete_task_files(task_id)
             self.logger.info(f"成功移除任务: {task_id}")
@@ -1161,16 +2320,13 @@ class SchedulerEngine:
     
     def get_tasks(self) -> List[Dict[str, Any]]:
         """获取所有任务的列表"""
-        task_count = len(self.tasks)
-        self.logger.info(f"开始获取全部任务信息，共 {task_count} 个任务")
+        self.logger.debug(f"开始获取全部任务信息，共 {len(self.tasks)} 个任务")
         result = []
         for task in self.tasks.values():
             job = self.scheduler.get_job(task.task_id)
             task_dict = asdict(task)
-            next_run = job.next_run_time.isoformat() if job and job.next_run_time else None
-            task_dict['next_run_time'] = next_run
+            task_dict['next_run_time'] = job.next_run_time.isoformat() if job and job.next_run_time else None
             result.append(task_dict)
-            self.logger.debug(f"已读取任务 {task.task_id} 信息，下次执行时间: {next_run}")
         return result
     
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
@@ -1183,10 +2339,25 @@ class SchedulerEngine:
         task_dict['next_run_time'] = job.next_run_time.isoformat() if job and job.next_run_time else None
         return task_dict
     
+    def get_task_history(self, task_id: str, limit: int = 20, offset: int = 0,
+                         status: Optional[str] = None) -> Dict[str, Any]:
+        """分页获取任务的执行历史"""
+        return self.execution_history.query(task_id, limit=limit, offset=offset, status=status)
+    
+    def search_logs(self, query: str, task_id: Optional[str] = None, level: Optional[str] = None,
+                    since: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """全文检索系统日志和任务日志"""
+        return self.log_search.search(query, task_id=task_id, level=level, since=since, limit=limit)
+    
+    def get_running_executions(self, task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取正在执行的任务列表"""
+        return self.task_executor.get_running_executions(task_id)
+    
     # 用于防止短时间内重复更新同一任务
     _task_update_timestamps = {}
     _task_update_lock = threading.Lock()
     
+    @with_config_lock
     def update_task(self, task: Task) -> bool:
         """更新任务"""
         if task.task_id not in self.tasks:
@@ -1214,10 +2385,10 @@ class SchedulerEngine:
             self.logger.info(f"任务 {task.task_id} 配置发生变更，开始更新...")
             
             # 检查日志文件路径是否变更
-            if task.task_log != original_task.task_log and os.path.exists(original_task.task_log):
+            if task.task_log != original_task.task_log and os.path.exists(resolve_path(original_task.task_log)):
                 try:
                     # 如果旧日志文件存在且与新日志文件不同，则删除旧日志文件
-                    os.remove(original_task.task_log)
+                    remove_task_logs(resolve_path(original_task.task_log))
                     self.logger.info(f"已删除任务 {task.task_id} 的旧日志文件: {original_task.task_log}")
                 except Exception as e:
                     self.logger.warning(f"删除任务 {task.task_id} 的旧日志文件失败: {e}")
@@ -1228,6 +2399,7 @@ class SchedulerEngine:
                 self.logger.info(f"已从调度器中移除任务 {task.task_id} 的调度计划")
             else:
                 self.logger.debug(f"任务 {task.task_id} 当前没有活动的调度计划")
+            self._cancel_pending_retry(task.task_id)
             
             # 停止该任务的所有正在执行的进程
             stopped_count = self.task_executor.stop_all_tasks_by_id(task.task_id)
@@ -1247,7 +2419,6 @@ class SchedulerEngine:
             else:
                 self.logger.debug(f"任务 {task.task_id} 已禁用，不会添加到调度计划")
             
-            self._mark_api_operation()
             self.task_loader.save_task(task)
             self.logger.info(f"成功更新任务: {task.task_id}")
             return True
@@ -1255,6 +2426,7 @@ class SchedulerEngine:
             self.logger.error(f"更新任务 {task.task_id} 失败: {e}")
             return False
 
+    @with_config_lock
     def toggle_task(self, task_id: str, enabled: bool) -> bool:
         """启用或禁用任务"""
         if task_id not in self.tasks:
@@ -1271,12 +2443,13 @@ class SchedulerEngine:
         if self.scheduler.get_job(task_id):
             self.scheduler.remove_job(task_id)
             self.logger.info(f"已从调度器中移除任务 {task_id} 以更新状态")
+        if not enabled:
+            self._cancel_pending_retry(task_id)
             
         if enabled:
             self._add_task_to_scheduler(task)
             self.logger.info(f"已将任务 {task_id} 重新添加到调度器")
         
-        self._mark_api_operation()
         try:
             self.task_loader.save_task(task)
             self.logger.info(f"任务 {task_id} 状态已更新为: {'启用' if enabled else '禁用'}")
@@ -1292,11 +2465,21 @@ class SchedulerEngine:
             return False
 
         task = self.tasks[task_id]
-        self.logger.info(f"收到手动执行请求，将在后台线程中运行任务 {task_id}")
+        self.logger.info(f"收到手动执行请求，任务 {task_id} 已提交到执行线程池")
 
-        thread = threading.Thread(target=self._execute_task_wrapper, args=(task,))
-        thread.daemon = True
-        thread.start()
+        # 手动执行与定时执行走同一个线程池和准入控制；同一任务尚未开始的手动执行会被合并
+        try:
+            self.scheduler.add_job(
+                func=self._execute_task_wrapper,
+                trigger=DateTrigger(run_date=datetime.now()),
+                id=f"{task_id}__manual",
+                args=[task, 0, True],
+                replace_existing=True,
+                misfire_grace_time=None
+            )
+        except Exception as e:
+            self.logger.error(f"提交手动执行任务 {task_id} 失败: {e}")
+            return False
         return True
 
     def run_task_once(self, task_id: str) -> bool:
@@ -0,0 +1,50 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+class SQLiteReadPool:
+    """只读查询共用的 SQLite 连接池
+
+    连接在线程之间复用（check_same_thread=False），同一时间只被一个线程使用；
+    空闲连接最多保留 size 个，多出的连接用完即关闭，不会随请求线程的数量增长。
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int = 4):
+        self._connect = connect
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._idle.put_nowait(conn)
+                    return
+                except queue.Full:
+                    pass
+        conn.close()
+
+    def close(self):
+        """关闭所有空闲连接，之后归还的连接直接关闭"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
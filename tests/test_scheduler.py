@@ -75,6 +75,7 @@ class SchedulerTester:
             print(f"   状态: {result.status}")
             print(f"   返回码: {result.return_code}")
             print(f"   执行时长: {result.duration:.2f}秒")
+            print(f"   输出统计: {result.output_lines} 行 / {result.output_bytes} 字节 (日志游标 {result.log_cursor_start} - {result.log_cursor_end})")
             
             # 检查日志文件
             log_file = f"logs/task_{test_task.task_id}.log"
@@ -224,6 +225,1584 @@ class SchedulerTester:
             print(f"❌ CRON验证测试失败: {e}")
             return False
     
+    def test_log_reader(self) -> bool:
+        """测试日志分页读取"""
+        print("\n" + "="*50)
+        print("测试 5: 日志分页读取")
+        print("="*50)
+        
+        try:
+            import tempfile
+            from log_reader import read_log_lines, read_execution_log
+            from log_writer import RotatingLogWriter
+            from log_archive import compress_segment
+            from logger_helper import LoggerHelper
+            import sqlite3
+            from log_search import LogSearchIndex
+            from project_paths import PROJECT_ROOT
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                log_path = os.path.join(tmp_dir, "task.log")
+                with open(log_path, 'w', encoding='utf-8') as f:
+                    f.writelines(f"line {i}\n" for i in range(1, 2501))
+                
+                head = read_log_lines(log_path, limit=3, offset=1500)
+                tail = read_log_lines(log_path, limit=100, offset=-2)
+                
+                # 追加写入后索引应增量更新
+                with open(log_path, 'a', encoding='utf-8') as f:
+                    f.write("appended")
+                appended = read_log_lines(log_path, limit=1, offset=-1)
+                
+                # 按执行索引直接定位某次执行的输出
+                writer = RotatingLogWriter(os.path.join(tmp_dir, "exec.log"))
+                for execution_id in ("run-1", "run-2"):
+                    writer.begin_execution(execution_id, "")
+                    writer.write(f"{execution_id} output\n")
+                    writer.end_execution(execution_id, "success", "")
+                writer.close()
+                first_run = read_execution_log(writer.name, "run-1")
+                
+                # 日志被其他进程清空后，仍在使用的写入器应从新文件的开头继续写入
+                from clear_logs import clear_all_logs
+                reset_dir = os.path.join(tmp_dir, "reset")
+                reset_writer = RotatingLogWriter(os.path.join(reset_dir, "task.log"))
+                reset_writer.begin_execution("run-a", "")
+                reset_writer.write("run-a output\n")
+                reset_writer.end_execution("run-a", "success", "")
+                clear_all_logs(reset_dir)
+                cleared_size = os.path.getsize(reset_writer.name)
+                reset_writer.begin_execution("run-b", "")
+                reset_writer.write("run-b output\n")
+                reset_writer.end_execution("run-b", "success", "")
+                reset_writer.close()
+                after_reset = read_execution_log(reset_writer.name, "run-b")
+                reset_lines = read_log_lines(reset_writer.name, limit=10)
+                
+                # 压缩后的历史分段与活动文件作为一个日志流分页读取
+                compressed_log = os.path.join(tmp_dir, "compressed.log")
+                with open(log_path, 'rb') as src:
+                    compress_segment(src, compressed_log + ".1.gz")
+                with open(compressed_log, 'w', encoding='utf-8') as f:
+                    f.write("active\n")
+                across = read_log_lines(compressed_log, limit=3, offset=2499)
+                
+                # 按 setup_logging 的实际格式解析，倒序查询最近的错误
+                sys_log = os.path.join(tmp_dir, "sys.log")
+                with open(sys_log, 'w', encoding='utf-8') as f:
+                    for i in range(1, 6):
+                        f.write(f"[2024-01-01 00:00:0{i}] <{'ERROR' if i % 2 else 'INFO'}> app: event {i}\n")
+                        if i == 3:
+                            f.write("Traceback (most recent call last):\n")
+                latest_errors = LoggerHelper.read_logs(sys_log, level="ERROR", limit=2, reverse=True)
+                # 没有时间戳的行跟随其前面的带时间戳的行参与时间范围过滤
+                in_range = [LoggerHelper.read_logs(sys_log, start_time="2024-01-01 00:00:03", end_time="2024-01-01 00:00:03",
+                                                   reverse=reverse)["logs"] for reverse in (False, True)]
+                
+                # 全文检索索引：相对路径以项目根目录为基准（与当前工作目录无关），增量索引后清空日志，失效的索引行应被删除
+                cwd = os.getcwd()
+                os.chdir(tmp_dir)
+                try:
+                    search_index = LogSearchIndex(db_path=os.path.relpath(os.path.join(tmp_dir, "search.db"), PROJECT_ROOT),
+                                                  logs_dir=os.path.relpath(tmp_dir, PROJECT_ROOT))
+                finally:
+                    os.chdir(cwd)
+                search_index.index_once()
+                found = search_index.search("event 3", level="ERROR")
+                with open(sys_log, 'w', encoding='utf-8'):
+                    pass
+                search_index.index_once()
+                cleared = search_index.search("event 3")
+                
+                # 单轮索引抛出异常（如数据库被锁定）后，索引线程继续运行
+                index_calls = []
+                def flaky_index_once(conn=None):
+                    index_calls.append(conn)
+                    if len(index_calls) == 1:
+                        raise sqlite3.OperationalError("database is locked")
+                search_index.index_once = flaky_index_once
+                search_index.interval = 0.05
+                search_index.start()
+                time.sleep(0.5)
+                indexer_alive = search_index._indexer_thread.is_alive() and len(index_calls) > 1
+                search_index.stop()
+                
+                # SQLite 不支持 trigram 分词时禁用检索，而不是在创建索引时失败
+                class NoTrigramIndex(LogSearchIndex):
+                    @staticmethod
+                    def _trigram_supported():
+                        return False
+                disabled_index = NoTrigramIndex(db_path=os.path.join(tmp_dir, "disabled.db"), logs_dir=tmp_dir)
+                disabled_index.start()
+                try:
+                    disabled_index.search("event 3")
+                    disabled_rejects = False
+                except RuntimeError:
+                    disabled_rejects = True
+                search_disabled = (not disabled_index.enabled and disabled_index._indexer_thread is None
+                                   and disabled_rejects and not os.path.exists(os.path.join(tmp_dir, "disabled.db")))
+            
+            checks = [
+                ("正向偏移", [l["content"] for l in head["lines"]] == ["line 1501", "line 1502", "line 1503"]),
+                ("负向偏移", [l["line"] for l in tail["lines"]] == [2499, 2500]),
+                ("总行数", head["total_lines"] == 2500),
+                ("追加写入", appended["total_lines"] == 2501 and appended["lines"][0]["content"] == "appended"),
+                ("执行定位", [l["content"] for l in first_run["lines"]] == ["run-1 output"]),
+                ("外部清空", cleared_size == 0 and [l["content"] for l in after_reset["lines"]] == ["run-b output"]
+                 and reset_lines["total_lines"] == 1),
+                ("压缩分段", [l["content"] for l in across["lines"]] == ["line 2500", "appended", "active"]),
+                ("倒序过滤", [e["message"] for e in latest_errors["logs"]] == ["event 5", "event 3"] and latest_errors["has_more"]),
+                ("时间范围", [[e["message"] for e in logs] for logs in in_range]
+                 == [["event 3", "Traceback (most recent call last):"], ["Traceback (most recent call last):", "event 3"]]),
+                ("全文检索", [i["content"] for i in found["items"]] == ["[2024-01-01 00:00:03] <ERROR> app: event 3"]
+                 and not cleared["items"]),
+                ("索引异常后继续", indexer_alive),
+                ("不支持 trigram 时禁用检索", search_disabled),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 日志读取测试失败: {e}")
+            return False
+    
+    def test_execution_history(self) -> bool:
+        """测试执行历史存储"""
+        print("\n" + "="*50)
+        print("测试 6: 执行历史存储")
+        print("="*50)
+        
+        try:
+            import tempfile
+            from datetime import datetime, timedelta
+            from execution_history import ExecutionHistoryStore
+            from project_paths import PROJECT_ROOT
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_path = os.path.join(tmp_dir, "history.db")
+                # 相对路径以项目根目录为基准，与当前工作目录无关
+                cwd = os.getcwd()
+                os.chdir(tmp_dir)
+                try:
+                    store = ExecutionHistoryStore(db_path=os.path.relpath(db_path, PROJECT_ROOT),
+                                                  max_per_task=3, flush_interval=0.1)
+                finally:
+                    os.chdir(cwd)
+                
+                store.start()
+                start = datetime.now() - timedelta(hours=1)
+                for i in range(5):
+                    store.record({"execution_id": f"run-{i}", "task_id": "demo", "start_time": start + timedelta(minutes=i),
+                                  "status": "failed" if i == 4 else "success", "output_lines": i})
+                store.stop()
+                
+                page = store.query("demo", limit=2)
+                failed = store.query("demo", status="failed")
+                
+                # 某一批写入抛出异常后，写入线程继续处理后续记录
+                resilient = ExecutionHistoryStore(db_path=os.path.join(tmp_dir, "resilient.db"), flush_interval=0.1)
+                write_batch = resilient._write_batch
+                def failing_once(conn, batch, calls=[]):
+                    calls.append(batch)
+                    if len(calls) == 1:
+                        raise RuntimeError("boom")
+                    write_batch(conn, batch)
+                resilient._write_batch = failing_once
+                resilient.start()
+                resilient.record({"execution_id": "lost", "task_id": "demo", "start_time": start})
+                time.sleep(0.5)
+                resilient.record({"execution_id": "kept", "task_id": "demo", "start_time": start})
+                time.sleep(0.5)
+                writer_alive = resilient._writer_thread.is_alive()
+                # 多个请求线程查询时共用连接池，空闲连接数不超过池的大小
+                import threading
+                threads = [threading.Thread(target=resilient.query, args=("demo",)) for _ in range(16)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                pooled = resilient._read_pool._idle.qsize()
+                resilient.stop()
+                kept = [i["execution_id"] for i in resilient.query("demo")["items"]]
+            
+            checks = [
+                ("路径解析", os.path.normpath(store.db_path) == db_path),
+                ("按任务保留上限", page["total"] == 3),
+                ("倒序分页", [i["execution_id"] for i in page["items"]] == ["run-4", "run-3"]),
+                ("扩展字段", page["items"][1].get("output_lines") == 3),
+                ("状态过滤", [i["execution_id"] for i in failed["items"]] == ["run-4"]),
+                ("写入异常后继续", writer_alive and kept == ["kept"]),
+                ("查询连接池", 1 <= pooled <= 4),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 执行历史测试失败: {e}")
+            return False
+    
+    def test_file_transaction(self) -> bool:
+        """测试文件事务"""
+        print("\n" + "="*50)
+        print("测试 7: 文件事务")
+        print("="*50)
+        
+        try:
+            import tempfile
+            from file_transaction import FileTransaction, TRASH_DIR_NAME, sweep_trash
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                config = os.path.join(tmp_dir, "task", "config.json")
+                log_file = os.path.join(tmp_dir, "task.log")
+                os.makedirs(os.path.dirname(config))
+                with open(config, 'w', encoding='utf-8') as f:
+                    f.write("old")
+                with open(log_file, 'w', encoding='utf-8') as f:
+                    f.write("log")
+                
+                # 发生异常时按相反顺序撤销覆盖写入、新建目录和移动到回收区
+                try:
+                    with FileTransaction() as txn:
+                        txn.write_file(config, "new")
+                        txn.make_dirs(os.path.join(tmp_dir, "created", "nested"))
+                        txn.remove(log_file)
+                        raise RuntimeError("rollback")
+                except RuntimeError:
+                    pass
+                with open(config, encoding='utf-8') as f:
+                    restored = f.read()
+                rolled_back = (restored == "old" and os.path.exists(log_file)
+                               and not os.path.exists(os.path.join(tmp_dir, "created"))
+                               and not os.path.exists(os.path.join(tmp_dir, TRASH_DIR_NAME)))
+                
+                with FileTransaction() as txn:
+                    txn.write_file(config, "new")
+                    txn.remove(log_file)
+                with open(config, encoding='utf-8') as f:
+                    committed = f.read() == "new" and not os.path.exists(log_file)
+                
+                # 进程退出前后台删除未完成时残留的回收区在启动时被清理，进行中的事务不受影响
+                stale = os.path.join(tmp_dir, TRASH_DIR_NAME, "stale-txn")
+                os.makedirs(stale)
+                with open(os.path.join(stale, "task.log"), 'w') as f:
+                    f.write("debris")
+                active = FileTransaction()
+                with open(log_file, 'w') as f:
+                    f.write("log")
+                active.remove(log_file)
+                swept = sweep_trash(tmp_dir)
+                active_kept = os.path.exists(active._trash_path(log_file))
+                active.commit()
+                
+                # 默认任务通过原子写入创建，配置内容被记录为已知内容
+                loader = TaskLoader(os.path.join(tmp_dir, "tasks"))
+                loader._create_default_task()
+                default_tasks = loader.load_tasks()
+                default_ok = ([t.task_id for t in default_tasks] == ["test-task"]
+                              and loader.is_known_config(loader.config_path("test-task"))
+                              and sorted(os.listdir(os.path.join(loader.tasks_dir, "test-task"))) == ["config.json", "test_task.py"])
+            
+            checks = [
+                ("回滚恢复", rolled_back),
+                ("提交生效", committed),
+                ("清理残留", swept == [stale] and active_kept),
+                ("默认任务", default_ok),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 文件事务测试失败: {e}")
+            return False
+    
+    def test_reload_planner(self) -> bool:
+        """测试配置增量重载计划"""
+        print("\n" + "="*50)
+        print("测试 8: 配置增量重载计划")
+        print("="*50)
+        
+        try:
+            import json
+            import shutil
+            import logging
+            import tempfile
+            
+            def write(tasks_dir, dir_name, **fields):
+                os.makedirs(os.path.join(tasks_dir, dir_name), exist_ok=True)
+                config = {"task_id": dir_name, "task_name": dir_name, "task_exec": f"echo {dir_name}",
+                          "task_schedule": "0 0 * * *", **fields}
+                with open(os.path.join(tasks_dir, dir_name, "config.json"), 'w', encoding='utf-8') as f:
+                    json.dump(config, f)
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                tasks_dir = os.path.join(tmp_dir, "tasks")
+                for task_id in ("alpha", "beta", "gamma"):
+                    write(tasks_dir, task_id)
+                
+                # 只使用计划所需的状态，不启动调度器
+                planner = object.__new__(SchedulerEngine)
+                planner.logger = logging.getLogger("test_reload_planner")
+                planner.task_loader = TaskLoader(tasks_dir)
+                planner.tasks = {task.task_id: task for task in planner.task_loader.load_tasks()}
+                planner._config_changes = set()
+                
+                unchanged = planner._plan_reload(["alpha", "beta", "gamma"])
+                write(tasks_dir, "alpha", task_schedule="*/5 * * * *")
+                write(tasks_dir, "delta")
+                shutil.rmtree(os.path.join(tasks_dir, "beta"))
+                # 目录移动：旧目录被移除、新目录按目录名作为任务ID加入
+                os.rename(os.path.join(tasks_dir, "gamma"), os.path.join(tasks_dir, "gamma-moved"))
+                plan = planner._plan_reload(["alpha", "beta", "delta", "gamma", "gamma-moved"])
+                full_ids = sorted(task.task_id for task in planner.task_loader.load_tasks())
+                
+                # API 事务进行中的任务暂不重载
+                planner._config_changes.add("delta")
+                deferred = planner._plan_reload(["delta"])
+            
+            checks = [
+                ("内容未变", not unchanged),
+                ("修改", [t.task_id for t in plan.updated] == ["alpha"]
+                 and plan.updated[0].task_schedule == "*/5 * * * *"),
+                ("新增", [t.task_id for t in plan.added] == ["delta"]),
+                ("删除", plan.removed == ["beta"]),
+                ("目录移动", [(old_id, t.task_id) for old_id, t in plan.renamed] == [("gamma", "gamma-moved")]),
+                ("全量加载规则一致", full_ids == ["alpha", "delta", "gamma-moved"]),
+                ("事务中跳过", not deferred),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 重载计划测试失败: {e}")
+            return False
+    
+    def test_timeout(self) -> bool:
+        """测试任务超时"""
+        print("\n" + "="*50)
+        print("测试 9: 任务超时")
+        print("="*50)
+        
+        try:
+            import tempfile
+            import threading
+            from scheduler_engine import AsyncTaskExecutor, TimeoutWatchdog
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                def make_task(task_id, task_exec, timeout=None):
+                    return Task(task_id=task_id, task_name=task_id, task_exec=task_exec, task_schedule="* * * * *",
+                                task_timeout=timeout, task_log=os.path.join(tmp_dir, f"{task_id}.log"))
+                
+                executor = TaskExecutor(tmp_dir)
+                slow = executor.execute_task(make_task("slow", "sleep 30", timeout=1))
+                # 脱离进程组的后代仍持有输出管道：强制终止进程组后不再等待管道关闭
+                escaped = executor.execute_task(make_task("escaped", "setsid sleep 20 & echo started; sleep 30", timeout=1))
+                
+                # 执行已结束后才触发的超时回调不会标记超时，也不会发送信号
+                quick_task = make_task("quick", "true", timeout=60)
+                quick = executor.execute_task(quick_task)
+                executor._on_timeout(quick.execution_id, quick_task)
+                
+                async_executor = AsyncTaskExecutor(tmp_dir)
+                try:
+                    async_slow = async_executor.execute_task(make_task("async_slow", "sleep 30", timeout=1))
+                finally:
+                    async_executor.shutdown()
+            
+            # 看门狗：取消的条目及时从堆中清除，到期的回调正常触发
+            watchdog = TimeoutWatchdog()
+            for i in range(1000):
+                watchdog.schedule(f"run-{i}", 60, lambda: None)
+                watchdog.cancel(f"run-{i}")
+            fired = threading.Event()
+            watchdog.schedule("fire", 0.1, fired.set)
+            
+            checks = [
+                ("线程模式超时", slow.status == "timeout" and slow.duration < 10),
+                ("脱离进程组的后代不阻塞读取", escaped.status == "timeout" and escaped.duration < 15
+                 and escaped.output_tail == "started"),
+                ("异步模式超时", async_slow.status == "timeout" and async_slow.duration < 10),
+                ("结束后不再处理", quick.status == "success" and quick.execution_id not in executor._timed_out),
+                ("取消条目及时清除", len(watchdog._heap) <= 66),
+                ("到期触发", fired.wait(5)),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 超时测试失败: {e}")
+            return False
+    
+    def test_stop_task(self) -> bool:
+        """测试停止正在执行的任务"""
+        print("\n" + "="*50)
+        print("测试 10: 停止任务")
+        print("="*50)
+        
+        try:
+            import logging
+            import tempfile
+            import threading
+            import scheduler_engine
+            
+            grace_period = scheduler_engine.TASK_KILL_GRACE_PERIOD
+            scheduler_engine.TASK_KILL_GRACE_PERIOD = 1
+            try:
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    executor = TaskExecutor(tmp_dir)
+                    
+                    def run_and_stop(task_id, task_exec):
+                        task = Task(task_id=task_id, task_name=task_id, task_exec=task_exec, task_schedule="* * * * *",
+                                    task_retry=3, task_log=os.path.join(tmp_dir, f"{task_id}.log"))
+                        results = []
+                        worker = threading.Thread(target=lambda: results.append(executor.execute_task(task)))
+                        worker.start()
+                        deadline = time.monotonic() + 5
+                        while not executor.get_running_executions(task_id) and time.monotonic() < deadline:
+                            time.sleep(0.05)
+                        time.sleep(0.2)
+                        started = time.monotonic()
+                        stopped = executor.stop_all_tasks_by_id(task_id)
+                        elapsed = time.monotonic() - started
+                        worker.join(10)
+                        return task, results[0], stopped, elapsed
+                    
+                    task, graceful, graceful_count, graceful_elapsed = run_and_stop("graceful", "sleep 30")
+                    # 忽略 SIGTERM 的任务需要在宽限期后被 SIGKILL 强制终止
+                    _, forced, forced_count, _ = run_and_stop("stubborn", "trap '' TERM; sleep 30")
+            finally:
+                scheduler_engine.TASK_KILL_GRACE_PERIOD = grace_period
+            
+            engine = object.__new__(SchedulerEngine)
+            engine.logger = logging.getLogger("test_stop_task")
+            
+            checks = [
+                ("SIGTERM 停止", graceful_count == 1 and graceful.status == "stopped" and graceful_elapsed < 1),
+                ("SIGKILL 强制停止", forced_count == 1 and forced.status == "stopped" and forced.return_code == -9),
+                ("停止后不重试", not engine._should_retry(task, graceful, 0) and not engine._should_retry(task, forced, 0)),
+                ("已结束的执行", executor.stop_task(graceful.execution_id) is False),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 停止任务测试失败: {e}")
+            return False
+    
+    def test_resource_limits(self) -> bool:
+        """测试资源限制"""
+        print("\n" + "="*50)
+        print("测试 11: 资源限制")
+        print("="*50)
+        
+        try:
+            import resource
+            import tempfile
+            from scheduler_engine import ResourceLimiter
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                def run(task_id, task_exec, limits, script=None):
+                    if script:
+                        os.makedirs(os.path.join(tmp_dir, task_id))
+                        with open(os.path.join(tmp_dir, task_id, "run.py"), 'w') as f:
+                            f.write(script)
+                    task = Task(task_id=task_id, task_name=task_id, task_exec=task_exec, task_schedule="* * * * *",
+                                task_timeout=20, task_limits=limits, task_log=os.path.join(tmp_dir, f"{task_id}.log"))
+                    return executor.execute_task(task)
+                
+                executor = TaskExecutor(tmp_dir)
+                executor.resource_limiter = ResourceLimiter()
+                cpu = run("cpu", "while :; do :; done", {"cpu_seconds": 1})
+                # 没有 cgroup 时不限制虚拟内存，按 wait4 记录的峰值内存判断：只有执行失败时才记为超限
+                memory = run("memory", "python run.py", {"max_rss_mb": 50},
+                             script="data = b'x' * (200 * 1024 * 1024)\nprint(len(data))\nraise SystemExit(2)\n")
+                unenforced = run("unenforced", "python run.py", {"max_rss_mb": 50},
+                                 script="data = b'x' * (200 * 1024 * 1024)\nprint(len(data))\n")
+                within = run("within", "python run.py", {"max_rss_mb": 500}, script="print('ok')\n")
+                # 超过硬限制的 nofile 按硬限制设置，而不是在子进程启动时失败
+                _, nofile_hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+                nofile_limit = nofile_hard * 2 if nofile_hard != resource.RLIM_INFINITY else 4096
+                nofile = run("nofile", "true", {"nofile": nofile_limit})
+            
+            invalid = [{"nofile": 0}, {"cpu_seconds": "10"}, {"nice": True}, {"nice": 20}, {"max_rss": 10}, ["nice"]]
+            
+            checks = [
+                ("CPU 超限", cpu.status == "limit_exceeded"),
+                ("内存超限", memory.status == "limit_exceeded" and "内存" in (memory.error_message or "")),
+                ("内存未超限", within.status == "success"),
+                ("未强制的内存限制不影响成功", unenforced.status == "success"),
+                ("nofile 按硬限制", nofile.status == "success"),
+                ("限制校验", all(ResourceLimiter.validate_limits(limits) for limits in invalid)
+                 and ResourceLimiter.validate_limits({"max_rss_mb": 256, "cpu_seconds": 60, "nofile": 1024, "nice": 5}) is None),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 资源限制测试失败: {e}")
+            return False
+    
+    def test_async_executor(self) -> bool:
+        """测试异步执行器"""
+        print("\n" + "="*50)
+        print("测试 12: 异步执行器")
+        print("="*50)
+        
+        try:
+            import tempfile
+            import threading
+            from scheduler_engine import AsyncTaskExecutor
+            from log_reader import read_execution_log
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                def make_task(task_id, task_exec):
+                    return Task(task_id=task_id, task_name=task_id, task_exec=task_exec, task_schedule="* * * * *",
+                                task_timeout=30, task_log=os.path.join(tmp_dir, f"{task_id}.log"))
+                
+                executor = AsyncTaskExecutor(tmp_dir, max_processes=1, max_pending=1)
+                try:
+                    results = {}
+                    finished = threading.Event()
+                    
+                    def on_complete(execution):
+                        results[execution.task_id] = execution
+                        if len(results) == 2:
+                            finished.set()
+                    
+                    # 名额为 1 个运行 + 1 个排队：同一任务重复提交和超出排队上限的提交被拒绝
+                    first = executor.submit_task(make_task("flood", "seq 1 50000"), on_complete)
+                    duplicate = executor.submit_task(make_task("flood", "seq 1 50000"), on_complete)
+                    queued = executor.submit_task(make_task("queued", "echo queued"), on_complete)
+                    overflow = executor.submit_task(make_task("overflow", "echo overflow"), on_complete)
+                    finished.wait(30)
+                    # 执行结束后同一任务可以再次提交
+                    again = executor.submit_task(make_task("queued", "echo again"), lambda execution: None)
+                    if again is not None:
+                        again.result(30)
+                finally:
+                    executor.shutdown()
+                
+                flood = results.get("flood")
+                flood_log = read_execution_log(os.path.join(tmp_dir, "flood.log"), flood.execution_id, max_bytes=1024 * 1024) if flood else None
+            
+            checks = [
+                ("单任务单执行", first is not None and duplicate is None),
+                ("排队上限", queued is not None and overflow is None),
+                ("执行结束", flood is not None and flood.status == "success" and results.get("queued") is not None),
+                ("写入线程完整写入输出", flood_log is not None and flood.output_lines == 50000
+                 and [l["content"] for l in flood_log["lines"] if l["content"].isdigit()] == [str(i) for i in range(1, 50001)]),
+                ("结束后可再次提交", again is not None),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 异步执行器测试失败: {e}")
+            return False
+    
+    def test_retry_scheduling(self) -> bool:
+        """测试重试调度"""
+        print("\n" + "="*50)
+        print("测试 13: 重试调度")
+        print("="*50)
+        
+        try:
+            import logging
+            import tempfile
+            import threading
+            from apscheduler.schedulers.background import BackgroundScheduler
+            from scheduler_engine import ConcurrencyLimiter
+            
+            class HistoryStub:
+                def __init__(self):
+                    self.records = []
+                    self.done = threading.Event()
+                
+                def record(self, record):
+                    self.records.append(record)
+                    if len(self.records) == 3:
+                        self.done.set()
+            
+            engine = object.__new__(SchedulerEngine)
+            engine.logger = logging.getLogger("test_retry")
+            
+            # 指数退避、间隔上限与随机抖动
+            backoff = Task(task_id="backoff", task_name="backoff", task_exec="true", task_schedule="* * * * *",
+                           task_retry_interval=10, task_retry_backoff=2, task_retry_max_interval=25)
+            jitter = Task(task_id="jitter", task_name="jitter", task_exec="true", task_schedule="* * * * *",
+                          task_retry_interval=10, task_retry_jitter=0.5)
+            delays = [engine._get_retry_delay(backoff, n) for n in (1, 2, 3, 4)]
+            jittered = [engine._get_retry_delay(jitter, 1) for _ in range(200)]
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                engine.scheduler = BackgroundScheduler()
+                engine.scheduler.start()
+                engine.task_executor = TaskExecutor(tmp_dir)
+                engine.execution_history = HistoryStub()
+                engine.concurrency_limiter = ConcurrencyLimiter()
+                engine.admission_retry_delay = 60
+                try:
+                    # 技术失败（退出码 2）的重试作为一次性作业提交给调度器，调用线程不等待退避时间
+                    flaky = Task(task_id="flaky", task_name="flaky", task_exec="exit 2", task_schedule="* * * * *",
+                                 task_retry=2, task_retry_interval=1, task_log=os.path.join(tmp_dir, "flaky.log"))
+                    engine.tasks = {"flaky": flaky}
+                    started = time.monotonic()
+                    engine._execute_task_wrapper(flaky)
+                    wrapper_elapsed = time.monotonic() - started
+                    retry_job = engine.scheduler.get_job(SchedulerEngine._retry_job_id("flaky"))
+                    retried = engine.execution_history.done.wait(15)
+                    time.sleep(0.5)
+                    attempts = [record["attempt"] for record in engine.execution_history.records]
+                    
+                    # 同一任务仍在执行时，重试推迟到稍后再试，定时触发直接跳过，不会与其并发运行
+                    slow = Task(task_id="slow", task_name="slow", task_exec="sleep 1", task_schedule="* * * * *",
+                                task_log=os.path.join(tmp_dir, "slow.log"))
+                    engine.tasks["slow"] = slow
+                    runner = threading.Thread(target=engine._execute_task_wrapper, args=(slow,))
+                    runner.start()
+                    deadline = time.monotonic() + 5
+                    while not engine.task_executor.get_running_executions("slow") and time.monotonic() < deadline:
+                        time.sleep(0.05)
+                    engine._execute_task_wrapper(slow, 1)
+                    engine._execute_task_wrapper(slow)
+                    concurrent_runs = len(engine.task_executor.get_running_executions("slow"))
+                    retry_requeued = engine.scheduler.get_job(SchedulerEngine._retry_job_id("slow")) is not None
+                    cron_skipped = engine.scheduler.get_job("slow__deferred") is None
+                    runner.join()
+                finally:
+                    engine.scheduler.shutdown(wait=False)
+            
+            checks = [
+                ("指数退避与上限", delays == [10, 20, 25, 25]),
+                ("随机抖动", all(5 <= d <= 15 for d in jittered) and len(set(jittered)) > 1),
+                ("非阻塞重试", wrapper_elapsed < 1 and retry_job is not None),
+                ("重试次数", retried and attempts == [0, 1, 2]),
+                ("同一任务不重叠执行", concurrent_runs == 1 and retry_requeued and cron_skipped),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 重试调度测试失败: {e}")
+            return False
+    
+    def test_execution_events(self) -> bool:
+        """测试 JSON Lines 生命周期事件"""
+        print("\n" + "="*50)
+        print("测试 14: 生命周期事件")
+        print("="*50)
+        
+        try:
+            import logging
+            import tempfile
+            import log_writer
+            from apscheduler.schedulers.background import BackgroundScheduler
+            from log_reader import event_log_path, read_task_events
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                executor = TaskExecutor(tmp_dir)
+                
+                def run(task_id, task_exec, event_format):
+                    task = Task(task_id=task_id, task_name=task_id, task_exec=task_exec, task_schedule="* * * * *",
+                                task_log=os.path.join(tmp_dir, f"{task_id}.log"))
+                    log_writer.EVENT_LOG_FORMAT = event_format
+                    return task, executor.execute_task(task)
+                
+                event_format = log_writer.EVENT_LOG_FORMAT
+                try:
+                    both_task, both_run = run("both_task", "echo hello", "both")
+                    # jsonl 格式下任务日志中只保留子进程输出
+                    jsonl_task, _ = run("jsonl_task", "echo hello", "jsonl")
+                    with open(jsonl_task.task_log, encoding='utf-8') as f:
+                        jsonl_log = f.read()
+                    text_task, _ = run("text_task", "echo hello", "text")
+                    
+                    # 调度重试时记录 retry_scheduled 事件
+                    log_writer.EVENT_LOG_FORMAT = "jsonl"
+                    engine = object.__new__(SchedulerEngine)
+                    engine.logger = logging.getLogger("test_events")
+                    engine.scheduler = BackgroundScheduler()
+                    engine._schedule_retry(both_task, 1, both_run)
+                finally:
+                    log_writer.EVENT_LOG_FORMAT = event_format
+                
+                events = read_task_events(both_task.task_log, execution_id=both_run.execution_id)
+                ends = read_task_events(both_task.task_log, event="end")
+                retries = read_task_events(both_task.task_log, event="retry_scheduled")
+                text_events = os.path.exists(event_log_path(text_task.task_log))
+            
+            checks = [
+                ("开始与结束事件", [e["event"] for e in events[:2]] == ["start", "end"]
+                 and events[0]["command"] == "echo hello" and events[0]["log_cursor"] == both_run.log_cursor_start),
+                ("结束事件字段", len(ends) == 1 and ends[0]["status"] == "success" and ends[0]["return_code"] == 0
+                 and ends[0]["output_lines"] == 1 and ends[0]["log_cursor_end"] == both_run.log_cursor_end),
+                ("重试事件", len(retries) == 1 and retries[0]["attempt"] == 1
+                 and retries[0]["execution_id"] == both_run.execution_id and retries[0]["delay"] == both_task.task_retry_interval),
+                ("jsonl 格式不写文本事件", jsonl_log == "hello\n"),
+                ("text 格式不写事件日志", not text_events),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 生命周期事件测试失败: {e}")
+            return False
+    
+    def test_logging_pipeline(self) -> bool:
+        """测试异步日志管道"""
+        print("\n" + "="*50)
+        print("测试 15: 异步日志管道")
+        print("="*50)
+        
+        try:
+            import queue
+            import logging
+            import logger_helper
+            from logger_helper import BoundedQueueHandler, TimedQueueListener, get_logging_stats
+            
+            class CollectHandler(logging.Handler):
+                def __init__(self, delay=0.0):
+                    super().__init__()
+                    self.messages = []
+                    self.delay = delay
+                
+                def emit(self, record):
+                    time.sleep(self.delay)
+                    self.messages.append(record.getMessage())
+            
+            logger = logging.getLogger("test_logging_pipeline")
+            logger.propagate = False
+            logger.setLevel(logging.DEBUG)
+            
+            # 队列已满时丢弃低级别日志并计数，队列恢复后写入一条汇总
+            log_queue = queue.Queue(maxsize=2)
+            handler = BoundedQueueHandler(log_queue)
+            logger.addHandler(handler)
+            try:
+                for i in range(5):
+                    logger.info(f"message {i}")
+                dropped = dict(handler.dropped_total)
+                queued = [log_queue.get_nowait().getMessage() for _ in range(log_queue.qsize())]
+                logger.info("after drain")
+                recovered = [log_queue.get_nowait().getMessage() for _ in range(log_queue.qsize())]
+                
+                # WARNING 及以上的日志在队列满时最多等待 LOG_QUEUE_BLOCK_TIMEOUT 秒，超时后同样丢弃并计数
+                logger.info("fill 1")
+                logger.info("fill 2")
+                started = time.monotonic()
+                logger.warning("blocked warning")
+                blocked_for = time.monotonic() - started
+                warning_dropped = handler.dropped_total["WARNING"]
+            finally:
+                logger.removeHandler(handler)
+            
+            # 后台线程写出日志，调用线程不等待处理器（即使处理器很慢）
+            log_queue = queue.Queue(maxsize=100)
+            collector = CollectHandler(delay=0.05)
+            listener = TimedQueueListener(log_queue, collector)
+            handler = BoundedQueueHandler(log_queue)
+            logger.addHandler(handler)
+            listener.start()
+            try:
+                started = time.monotonic()
+                for i in range(10):
+                    logger.warning(f"event {i}")
+                caller_elapsed = time.monotonic() - started
+                
+                # 统计信息：队列深度、写入与丢弃数量、调用方与写入线程的耗时
+                saved = logger_helper._queue_handler, logger_helper._queue_listener
+                logger_helper._queue_handler, logger_helper._queue_listener = handler, listener
+                try:
+                    running_stats = get_logging_stats()
+                finally:
+                    logger_helper._queue_handler, logger_helper._queue_listener = saved
+            finally:
+                listener.stop()
+                logger.removeHandler(handler)
+            
+            checks = [
+                ("队列满时丢弃", dropped == {"INFO": 3} and queued == ["message 0", "message 1"]),
+                ("丢弃汇总", len(recovered) == 2 and "丢弃了 3 条日志" in recovered[0] and recovered[1] == "after drain"),
+                ("高级别日志限时等待", warning_dropped == 1
+                 and logger_helper.LOG_QUEUE_BLOCK_TIMEOUT * 0.8 <= blocked_for < logger_helper.LOG_QUEUE_BLOCK_TIMEOUT + 0.5),
+                ("后台写出", collector.messages == [f"event {i}" for i in range(10)] and listener.handled == 10),
+                ("调用方不等待处理器", caller_elapsed < 0.25),
+                ("统计信息", running_stats["enabled"] and running_stats["enqueued"] == 10
+                 and running_stats["queue_high_water"] >= 1 and running_stats["dropped_total"] == 0
+                 and running_stats["queue_size"] == 100),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 日志管道测试失败: {e}")
+            return False
+    
+    def test_task_locks(self) -> bool:
+        """测试任务锁"""
+        print("\n" + "="*50)
+        print("测试 16: 任务锁")
+        print("="*50)
+        
+        try:
+            import subprocess
+            import tempfile
+            import threading
+            from flask import Flask
+            import api_blueprint
+            from api_blueprint import TaskLockRegistry, with_task_lock
+            
+            results = {}
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                for multi_process in (False, True):
+                    registry = TaskLockRegistry(tmp_dir, multi_process)
+                    handle = registry.acquire("demo")
+                    
+                    # 持有锁期间同一任务的请求等待超时，其他任务不受影响
+                    try:
+                        registry.acquire("demo", timeout=0.2)
+                        timed_out = False
+                    except TimeoutError:
+                        timed_out = True
+                    other = registry.acquire("other", timeout=0.2)
+                    registry.release(other)
+                    
+                    # 锁释放时立即交接给等待方
+                    handed_over = threading.Event()
+                    waiter_handle = []
+                    
+                    def waiter():
+                        waiter_handle.append(registry.acquire("demo", timeout=5))
+                        handed_over.set()
+                    
+                    thread = threading.Thread(target=waiter)
+                    thread.start()
+                    time.sleep(0.1)
+                    released_at = time.monotonic()
+                    registry.release(handle)
+                    handed = handed_over.wait(5)
+                    handover_delay = time.monotonic() - released_at
+                    thread.join()
+                    registry.release(waiter_handle[0])
+                    
+                    results[multi_process] = (timed_out, handed and handover_delay < 0.5, not registry._locks)
+                
+                # 多个线程竞争同一任务的锁时，同一时间只有一个持有者
+                registry = TaskLockRegistry(tmp_dir)
+                holders = []
+                max_holders = []
+                
+                def contend():
+                    for _ in range(20):
+                        handle = registry.acquire("shared", timeout=5)
+                        holders.append(1)
+                        max_holders.append(len(holders))
+                        holders.pop()
+                        registry.release(handle)
+                
+                threads = [threading.Thread(target=contend) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                exclusive = max(max_holders) == 1 and len(max_holders) == 160 and not registry._locks
+                
+                # 多进程模式下与持有锁文件的其他进程互斥，对方释放后即可获得
+                registry = TaskLockRegistry(tmp_dir, multi_process=True)
+                lock_file = os.path.join(tmp_dir, "cross.lock")
+                holder = subprocess.Popen([sys.executable, "-c", (
+                    "import fcntl, sys, time\n"
+                    f"f = open({lock_file!r}, 'w+')\n"
+                    "fcntl.flock(f, fcntl.LOCK_EX)\n"
+                    "print('locked', flush=True)\n"
+                    "time.sleep(1)\n"
+                )], stdout=subprocess.PIPE, text=True)
+                holder.stdout.readline()
+                try:
+                    registry.acquire("cross", timeout=0.2)
+                    cross_blocked = False
+                except TimeoutError:
+                    cross_blocked = True
+                cross_handle = registry.acquire("cross", timeout=5)
+                registry.release(cross_handle)
+                holder.wait()
+                
+                # API 请求在等待任务锁超时后返回 423
+                class QuickRegistry(TaskLockRegistry):
+                    def acquire(self, task_id, timeout=0.1):
+                        return super().acquire(task_id, timeout)
+                
+                saved_locks = api_blueprint.task_locks
+                api_blueprint.task_locks = QuickRegistry(tmp_dir)
+                try:
+                    busy = api_blueprint.task_locks.acquire("demo")
+                    guarded = with_task_lock(lambda task_id: ("ok", 200))
+                    with Flask(__name__).test_request_context():
+                        _, locked_status = guarded(task_id="demo")
+                        api_blueprint.task_locks.release(busy)
+                        _, free_status = guarded(task_id="demo")
+                finally:
+                    api_blueprint.task_locks = saved_locks
+            
+            checks = [
+                ("进程内互斥", results[False][0]),
+                ("释放即交接", results[False][1]),
+                ("空闲锁回收", results[False][2]),
+                ("多进程模式", all(results[True])),
+                ("竞争时互斥", exclusive),
+                ("跨进程互斥", cross_blocked),
+                ("API 锁超时", locked_status == 423 and free_status == 200),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 任务锁测试失败: {e}")
+            return False
+    
+    def test_config_debounce(self) -> bool:
+        """测试配置事件防抖"""
+        print("\n" + "="*50)
+        print("测试 17: 配置事件防抖")
+        print("="*50)
+        
+        try:
+            import threading
+            from watchdog.events import DirCreatedEvent, DirModifiedEvent, DirMovedEvent, FileModifiedEvent
+            from scheduler_engine import ConfigFileHandler, KeyedDebounceQueue
+            
+            # 防抖：同一个键的连续事件合并为一次回调，持续的事件最长等待 max_delay
+            batches = []
+            fired = threading.Event()
+            
+            def on_batch(keys):
+                batches.append(sorted(keys))
+                fired.set()
+            
+            queue = KeyedDebounceQueue(on_batch, delay=0.2, max_delay=0.6, name="test-debounce")
+            try:
+                for _ in range(5):
+                    queue.push("alpha")
+                    queue.push("beta")
+                fired.wait(2)
+                time.sleep(0.3)
+                coalesced = list(batches)
+                batches.clear()
+                started = time.monotonic()
+                while time.monotonic() - started < 1.0:
+                    queue.push("busy")
+                    time.sleep(0.05)
+                capped = len(batches) >= 1
+            finally:
+                queue.stop()
+            
+            # 回调抛出异常后队列线程继续处理后续的键
+            handled = []
+            recovered = threading.Event()
+            
+            def flaky(keys):
+                handled.append(sorted(keys))
+                if len(handled) == 1:
+                    raise RuntimeError("reload failed")
+                recovered.set()
+            
+            queue = KeyedDebounceQueue(flaky, delay=0.05, max_delay=0.2, name="test-flaky")
+            try:
+                queue.push("first")
+                time.sleep(0.2)
+                queue.push("second")
+                survived = recovered.wait(2) and handled == [["first"], ["second"]]
+            finally:
+                queue.stop()
+            
+            # 监控事件按任务目录合并：只关注任务目录和 config.json，忽略其他文件、目录修改事件和隐藏目录
+            class EngineStub:
+                def __init__(self):
+                    self.reloads = []
+                    self.reloaded = threading.Event()
+                
+                def _reload_tasks(self, task_ids):
+                    self.reloads.append(sorted(task_ids))
+                    self.reloaded.set()
+            
+            tasks_dir = os.path.abspath("tasks_under_test")
+            engine = EngineStub()
+            os.environ['TASK_CONFIG_DEBOUNCE'] = "0.2"
+            try:
+                handler = ConfigFileHandler(engine, tasks_dir)
+            finally:
+                del os.environ['TASK_CONFIG_DEBOUNCE']
+            try:
+                events = [FileModifiedEvent(os.path.join(tasks_dir, "demo", "config.json")) for _ in range(5)] + [
+                    FileModifiedEvent(os.path.join(tasks_dir, "demo", "run.sh")),
+                    DirModifiedEvent(os.path.join(tasks_dir, "other")),
+                    DirCreatedEvent(os.path.join(tasks_dir, "new")),
+                    DirMovedEvent(os.path.join(tasks_dir, "old"), os.path.join(tasks_dir, "moved")),
+                    DirCreatedEvent(os.path.join(tasks_dir, ".trash", "txn")),
+                ]
+                started = time.monotonic()
+                for event in events:
+                    handler.on_any_event(event)
+                dispatch_elapsed = time.monotonic() - started
+                engine.reloaded.wait(2)
+                time.sleep(0.3)
+            finally:
+                handler.stop()
+            
+            checks = [
+                ("事件合并", coalesced == [["alpha", "beta"]]),
+                ("最长等待", capped),
+                ("回调异常后继续", survived),
+                ("按任务合并监控事件", engine.reloads == [["demo", "moved", "new", "old"]]),
+                ("不阻塞观察者线程", dispatch_elapsed < 0.1),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 配置事件防抖测试失败: {e}")
+            return False
+    
+    def test_output_tail(self) -> bool:
+        """测试有界的输出尾部缓冲"""
+        print("\n" + "="*50)
+        print("测试 18: 输出尾部缓冲")
+        print("="*50)
+        
+        try:
+            import tempfile
+            from scheduler_engine import OutputTail
+            
+            # 按行数和字节数双重限制，超过字节上限的单行只计数不保留
+            tail = OutputTail(max_lines=3, max_bytes=12)
+            for line in ("a\n", "b\n", "c\n", "d\n", "x" * 20 + "\n", "eeeee\n", "ffff\n"):
+                tail.append(line)
+            
+            # 任意切分的输出按换行拼接成行，最后不完整的行在结束时写入
+            fed = OutputTail(max_lines=10)
+            for chunk in ("one\ntw", "o\nthr", "ee"):
+                fed.feed(chunk)
+            fed.close()
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                # 内存中只保留输出尾部，完整输出只写入日志
+                task = Task(task_id="tail_task", task_name="tail_task", task_exec="seq 1 1000", task_schedule="* * * * *",
+                            task_output_tail_lines=5, task_log=os.path.join(tmp_dir, "tail_task.log"))
+                execution = TaskExecutor(tmp_dir).execute_task(task)
+                with open(task.task_log, encoding='utf-8') as f:
+                    logged = [line for line in f.read().splitlines() if line.isdigit()]
+            
+            checks = [
+                ("行数与字节上限", tail.text() == "eeeee\nffff" and tail.total_lines == 7),
+                ("按块拼接", fed.text() == "one\ntwo\nthree" and fed.total_lines == 3),
+                ("执行记录只保留尾部", execution.output_lines == 1000
+                 and execution.output_tail.split() == ["996", "997", "998", "999", "1000"]),
+                ("完整输出写入日志", len(logged) == 1000),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 输出尾部缓冲测试失败: {e}")
+            return False
+    
+    def test_task_working_directory(self) -> bool:
+        """测试任务工作目录"""
+        print("\n" + "="*50)
+        print("测试 19: 任务工作目录")
+        print("="*50)
+        
+        try:
+            import tempfile
+            import threading
+            from project_paths import PROJECT_ROOT
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                executor = TaskExecutor(tmp_dir)
+                
+                def make_task(task_id, task_exec):
+                    os.makedirs(os.path.join(tmp_dir, task_id), exist_ok=True)
+                    # 相对日志路径以项目根目录为基准解析
+                    return Task(task_id=task_id, task_name=task_id, task_exec=task_exec, task_schedule="* * * * *",
+                                task_log=os.path.relpath(os.path.join(tmp_dir, f"{task_id}.log"), PROJECT_ROOT))
+                
+                # 并发执行的任务各自在自己的目录中运行，不修改调度器进程的工作目录
+                cwd = os.getcwd()
+                results = {}
+                threads = [
+                    threading.Thread(target=lambda task_id=task_id: results.update(
+                        {task_id: executor.execute_task(make_task(task_id, "sleep 0.2; pwd; echo $TASK_LOG"))}))
+                    for task_id in ("dir_a", "dir_b", "dir_c")
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                cwd_unchanged = os.getcwd() == cwd
+                outputs = {task_id: execution.output_tail.splitlines() for task_id, execution in results.items()}
+            
+            checks = [
+                ("各自的工作目录", all(lines[0] == os.path.join(tmp_dir, task_id) for task_id, lines in outputs.items())
+                 and len(outputs) == 3),
+                ("进程工作目录不变", cwd_unchanged),
+                ("日志路径为绝对路径", all(os.path.isabs(lines[1])
+                                          and os.path.normpath(lines[1]) == os.path.join(tmp_dir, f"{task_id}.log")
+                                          for task_id, lines in outputs.items())),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 任务工作目录测试失败: {e}")
+            return False
+    
+    def test_concurrency_groups(self) -> bool:
+        """测试并发组准入控制"""
+        print("\n" + "="*50)
+        print("测试 20: 并发组")
+        print("="*50)
+        
+        try:
+            import logging
+            import tempfile
+            import threading
+            from apscheduler.schedulers.background import BackgroundScheduler
+            from scheduler_engine import ConcurrencyLimiter
+            
+            # 并发组：名额用完后拒绝，释放后恢复；未配置的组不限制
+            os.environ['TASK_CONCURRENCY_GROUPS'] = "browser=1, bad, http=0"
+            try:
+                limiter = ConcurrencyLimiter.from_env()
+            finally:
+                del os.environ['TASK_CONCURRENCY_GROUPS']
+            admitted = [limiter.try_acquire("browser"), limiter.try_acquire("browser")]
+            limiter.release("browser")
+            readmitted = limiter.try_acquire("browser")
+            limiter.release("browser")
+            
+            # 多个线程同时申请名额时不会超过组上限
+            shared = ConcurrencyLimiter({"http": 3})
+            barrier = threading.Barrier(10)
+            granted = []
+            
+            def contend():
+                barrier.wait()
+                granted.append(shared.try_acquire("http"))
+            
+            threads = [threading.Thread(target=contend) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            # 并发组已满时推迟执行，而不是占用线程等待名额
+            engine = object.__new__(SchedulerEngine)
+            engine.logger = logging.getLogger("test_concurrency")
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                engine.scheduler = BackgroundScheduler()
+                engine.scheduler.start()
+                engine.task_executor = TaskExecutor(tmp_dir)
+                engine.concurrency_limiter = limiter
+                engine.admission_retry_delay = 60
+                try:
+                    grouped = Task(task_id="grouped", task_name="grouped", task_exec="true", task_schedule="* * * * *",
+                                   task_concurrency_group="browser", task_log=os.path.join(tmp_dir, "grouped.log"))
+                    engine.tasks = {"grouped": grouped}
+                    limiter.try_acquire("browser")
+                    started = time.monotonic()
+                    engine._execute_task_wrapper(grouped)
+                    wrapper_elapsed = time.monotonic() - started
+                    deferred = engine.scheduler.get_job("grouped__deferred") is not None
+                finally:
+                    engine.scheduler.shutdown(wait=False)
+            
+            checks = [
+                ("并发组配置解析", limiter.group_limits == {"browser": 1, "http": 1}),
+                ("并发组名额", admitted == [True, False] and readmitted and limiter.try_acquire("unknown")),
+                ("并发申请不超限", granted.count(True) == 3),
+                ("并发组已满时推迟", deferred and wrapper_elapsed < 1),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 并发组测试失败: {e}")
+            return False
+    
+    def test_process_group(self) -> bool:
+        """测试进程组终止与资源统计"""
+        print("\n" + "="*50)
+        print("测试 21: 进程组与资源统计")
+        print("="*50)
+        
+        try:
+            import tempfile
+            import threading
+            from dataclasses import asdict
+            from scheduler_engine import AsyncTaskExecutor
+            
+            def grandchild_alive(pid_file):
+                with open(pid_file) as f:
+                    pid = int(f.read())
+                time.sleep(0.2)
+                try:
+                    # 已退出但尚未被 init 回收的僵尸进程视为已终止
+                    with open(f"/proc/{pid}/stat") as f:
+                        return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+                except FileNotFoundError:
+                    return False
+            
+            busy_exec = f"{sys.executable} -c \"import time; end = time.process_time() + 0.3\nwhile time.process_time() < end: pass\""
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                def make_task(task_id, task_exec, **fields):
+                    return Task(task_id=task_id, task_name=task_id, task_exec=task_exec, task_schedule="* * * * *",
+                                task_log=os.path.join(tmp_dir, f"{task_id}.log"), **fields)
+                
+                executor = TaskExecutor(tmp_dir)
+                # wait4 统计包含 shell 启动的子进程
+                busy = executor.execute_task(make_task("busy_task", busy_exec))
+                
+                # 超时后整个进程组被终止，后台启动的孙进程不会遗留
+                timeout_pid = os.path.join(tmp_dir, "timeout.pid")
+                group = executor.execute_task(make_task("group_task", f"sleep 60 & echo $! > {timeout_pid}; wait",
+                                                        task_timeout=1))
+                timeout_orphan = grandchild_alive(timeout_pid)
+                
+                # stop_task 同样终止整个进程组
+                stop_pid = os.path.join(tmp_dir, "stop.pid")
+                result = {}
+                runner = threading.Thread(target=lambda: result.update(
+                    execution=executor.execute_task(make_task("stop_task", f"sleep 60 & echo $! > {stop_pid}; wait"))))
+                runner.start()
+                deadline = time.monotonic() + 5
+                while not (executor.get_running_executions("stop_task") and os.path.exists(stop_pid)) \
+                        and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                for running in executor.get_running_executions("stop_task"):
+                    executor.stop_task(running["execution_id"])
+                runner.join(10)
+                stop_orphan = grandchild_alive(stop_pid)
+                
+                async_executor = AsyncTaskExecutor(tmp_dir)
+                try:
+                    async_busy = async_executor.execute_task(make_task("async_busy", busy_exec))
+                finally:
+                    async_executor.shutdown()
+            
+            def accounted(execution):
+                return (execution.status == "success" and (execution.max_rss_kb or 0) > 0
+                        and (execution.cpu_user_time or 0) + (execution.cpu_system_time or 0) >= 0.25)
+            
+            record = asdict(busy)
+            checks = [
+                ("子进程资源统计", accounted(busy)),
+                ("异步模式资源统计", accounted(async_busy)),
+                ("写入执行记录", all(record.get(key) is not None for key in ("cpu_user_time", "cpu_system_time", "max_rss_kb"))),
+                ("超时终止进程组", group.status == "timeout" and not timeout_orphan),
+                ("停止终止进程组", result.get("execution") is not None and result["execution"].status == "stopped"
+                 and not stop_orphan),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 进程组测试失败: {e}")
+            return False
+    
+    def test_log_streaming(self) -> bool:
+        """测试基于游标的增量日志读取"""
+        print("\n" + "="*50)
+        print("测试 22: 增量日志读取")
+        print("="*50)
+        
+        try:
+            import tempfile
+            import threading
+            from log_reader import current_cursor, read_log_from, watch_log
+            from log_writer import RotatingLogWriter
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                log_path = os.path.join(tmp_dir, "stream.log")
+                # 订阅时日志尚不存在，游标指向日志开头
+                start = current_cursor(log_path)
+                writer = RotatingLogWriter(log_path)
+                writer.write("first\nsecond\n")
+                first = read_log_from(log_path, start)
+                
+                # 只返回游标之后新增的完整行，未写完的行留到下次读取
+                writer.write("third\npart")
+                second = read_log_from(log_path, first["next_cursor"])
+                idle = read_log_from(log_path, second["next_cursor"])
+                writer.write("ial\n")
+                completed = read_log_from(log_path, second["next_cursor"])
+                
+                # 无效游标从最新分段的开头重新读取，并通知调用方重置已显示的内容
+                stale = read_log_from(log_path, "1:3")
+                
+                # 写入方写入后立即唤醒订阅方，不需要轮询
+                woken = {}
+                with watch_log(log_path) as watch:
+                    version = watch.version
+                    waiter = threading.Thread(target=lambda: woken.update(ok=watch.wait(version, 5)))
+                    waiter.start()
+                    time.sleep(0.1)
+                    written_at = time.monotonic()
+                    writer.write("pushed\n")
+                    waiter.join()
+                    wake_delay = time.monotonic() - written_at
+                writer.close()
+            
+            def contents(result):
+                return [line["content"] for line in result["lines"]]
+            
+            checks = [
+                ("从开头订阅", start == "0:0" and contents(first) == ["first", "second"] and not first["reset"]),
+                ("只返回新增的完整行", contents(second) == ["third"] and second["lines"][0]["line"] == 3),
+                ("没有新内容", contents(idle) == [] and idle["next_cursor"] == second["next_cursor"]),
+                ("补全的行", contents(completed) == ["partial"]),
+                ("无效游标重置", stale["reset"] and contents(stale)[0] == "first"),
+                ("写入即唤醒", woken.get("ok") and wake_delay < 1),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 增量日志读取测试失败: {e}")
+            return False
+    
+    def test_log_rotation(self) -> bool:
+        """测试写入端的日志轮转"""
+        print("\n" + "="*50)
+        print("测试 23: 日志轮转")
+        print("="*50)
+        
+        try:
+            import tempfile
+            import log_writer
+            from log_reader import log_segments, read_log_lines, read_log_from
+            from log_writer import RotatingLogWriter
+            
+            compress_rotated = log_writer.COMPRESS_ROTATED
+            log_writer.COMPRESS_ROTATED = False
+            try:
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    log_path = os.path.join(tmp_dir, "task.log")
+                    writer = RotatingLogWriter(log_path, max_bytes=64, backup_count=2)
+                    writer.write("line 00\n")
+                    follower = read_log_from(log_path, "0:0")
+                    active_inode = os.stat(log_path).st_ino
+                    
+                    # 超过大小后在行边界处轮转：未写完的行不会被拆到两个分段中
+                    writer.write("x" * 80)
+                    unrotated = os.listdir(tmp_dir)
+                    writer.write("\n")
+                    renamed = os.stat(f"{log_path}.1").st_ino == active_inode
+                    
+                    # 跟随日志末尾的游标在轮转后依然有效，读完旧分段后继续读取更新的分段
+                    writer.write("line 01\nline 02\n")
+                    followed = []
+                    cursor = follower["next_cursor"]
+                    for _ in range(5):
+                        result = read_log_from(log_path, cursor)
+                        followed.extend(line["content"] for line in result["lines"])
+                        cursor = result["next_cursor"]
+                        if not result["has_more"]:
+                            break
+                    
+                    for i in range(3, 30):
+                        writer.write(f"line {i:02d}\n")
+                    writer.close()
+                    segments = log_segments(log_path)
+                    segment_endings = []
+                    for segment in segments:
+                        with open(segment, 'rb') as f:
+                            segment_endings.append(f.read().endswith(b'\n'))
+                    
+                    # 读取不修改任何文件；各分段作为一个日志流读取
+                    before = {name: os.stat(os.path.join(tmp_dir, name)) for name in os.listdir(tmp_dir)}
+                    stream = read_log_lines(log_path, limit=100)
+                    after = {name: os.stat(os.path.join(tmp_dir, name)) for name in os.listdir(tmp_dir)}
+                    untouched = before.keys() == after.keys() and all(
+                        (before[name].st_ino, before[name].st_size, before[name].st_mtime_ns)
+                        == (after[name].st_ino, after[name].st_size, after[name].st_mtime_ns) for name in before)
+            finally:
+                log_writer.COMPRESS_ROTATED = compress_rotated
+            
+            contents = [line["content"] for line in stream["lines"]]
+            checks = [
+                ("行边界轮转", unrotated == ["task.log"] and renamed and all(segment_endings)),
+                ("保留数量", len(segments) == 3 and segments[-1] == log_path),
+                ("读取不修改文件", untouched),
+                ("分段连续读取", contents == sorted(contents) and contents[-1] == "line 29"
+                 and stream["total_lines"] == len(contents)),
+                ("游标跨越轮转", not result["reset"] and followed == ["x" * 80, "line 01", "line 02"]),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 日志轮转测试失败: {e}")
+            return False
+    
+    def test_atomic_config_writes(self) -> bool:
+        """测试配置文件的原子写入"""
+        print("\n" + "="*50)
+        print("测试 24: 配置原子写入")
+        print("="*50)
+        
+        try:
+            import json
+            import stat
+            import tempfile
+            import threading
+            from file_transaction import atomic_write
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                # 原子写入保留原文件权限，不留下临时文件
+                script = os.path.join(tmp_dir, "run.sh")
+                atomic_write(script, "echo old\n", mode=0o755)
+                atomic_write(script, "echo new\n")
+                with open(script) as f:
+                    atomic_ok = (f.read() == "echo new\n" and stat.S_IMODE(os.stat(script).st_mode) == 0o755
+                                 and os.listdir(tmp_dir) == ["run.sh"])
+                
+                # 写入失败时原文件保持不变，临时文件被清理
+                try:
+                    atomic_write(script, 12345)
+                    failed = False
+                except TypeError:
+                    failed = True
+                with open(script) as f:
+                    preserved = failed and f.read() == "echo new\n" and os.listdir(tmp_dir) == ["run.sh"]
+                
+                # 并发读取只会看到完整的旧内容或新内容
+                loader = TaskLoader(os.path.join(tmp_dir, "tasks"))
+                config_file = loader.config_path("demo")
+                task = Task(task_id="demo", task_name="demo", task_exec="true", task_schedule="* * * * *")
+                loader.write_config(task)
+                stop = threading.Event()
+                torn_reads = []
+                
+                def reader():
+                    while not stop.is_set():
+                        try:
+                            with open(config_file, encoding='utf-8') as f:
+                                json.load(f)
+                        except ValueError:
+                            torn_reads.append(1)
+                
+                thread = threading.Thread(target=reader)
+                thread.start()
+                try:
+                    for i in range(50):
+                        loader.write_config(Task(task_id="demo", task_name="demo " + "x" * (i * 200), task_exec="true",
+                                                 task_schedule="* * * * *"))
+                finally:
+                    stop.set()
+                    thread.join()
+                
+                # 自身写入的内容被识别为已知内容，内容相同时不重复写入
+                written = loader.write_config(task)
+                rewritten = loader.write_config(task)
+                own_write_known = loader.is_known_config(config_file)
+                leftovers = [name for name in os.listdir(os.path.dirname(config_file)) if name != "config.json"]
+            
+            checks = [
+                ("原子写入", atomic_ok),
+                ("失败时保留原文件", preserved),
+                ("并发读取不会读到半截内容", not torn_reads),
+                ("自身写入", written and not rewritten and own_write_known),
+                ("没有遗留临时文件", not leftovers),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 配置原子写入测试失败: {e}")
+            return False
+    
+    def test_config_fingerprint(self) -> bool:
+        """测试按内容哈希的配置变更检测"""
+        print("\n" + "="*50)
+        print("测试 25: 配置指纹")
+        print("="*50)
+        
+        try:
+            import json
+            import tempfile
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                loader = TaskLoader(os.path.join(tmp_dir, "tasks"))
+                task = Task(task_id="demo", task_name="demo", task_exec="true", task_schedule="* * * * *")
+                config_file = loader.config_path("demo")
+                loader.write_config(task)
+                
+                # stat 信息未变时沿用缓存的指纹；仅 touch（内容不变）时内容哈希不变，仍视为已知内容
+                first = loader.fingerprint(config_file)
+                cached = loader.fingerprint(config_file)
+                os.utime(config_file, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+                touched = loader.fingerprint(config_file)
+                touched_known = loader.is_known_config(config_file)
+                
+                # 内容未变时直接返回缓存的解析结果（副本），不重新解析 JSON
+                parsed = []
+                real_loads = json.loads
+                json.loads = lambda *args, **kwargs: parsed.append(1) or real_loads(*args, **kwargs)
+                try:
+                    loaded = loader.load_config(config_file)
+                    loaded.task_name = "mutated"
+                    os.utime(config_file, ns=(first.mtime_ns + 2 * 10**9, first.mtime_ns + 2 * 10**9))
+                    reloaded_same = loader.load_config(config_file)
+                finally:
+                    json.loads = real_loads
+                
+                # 外部修改内容后不再被视为已知内容，重新加载得到新内容
+                with open(config_file, encoding='utf-8') as f:
+                    config = json.load(f)
+                with open(config_file, 'w', encoding='utf-8') as f:
+                    json.dump({**config, "task_name": "changed"}, f)
+                external_known = loader.is_known_config(config_file)
+                reloaded = loader.load_config(config_file)
+                changed_known = loader.is_known_config(config_file)
+                
+                # 配置文件被删除时没有指纹
+                os.remove(config_file)
+                missing = loader.fingerprint(config_file)
+            
+            checks = [
+                ("指纹缓存", cached is first and touched.sha1 == first.sha1 and touched.mtime_ns != first.mtime_ns
+                 and touched_known),
+                ("解析结果缓存", not parsed and reloaded_same.task_name == "demo" and reloaded_same is not loaded),
+                ("外部修改", not external_known and reloaded.task_name == "changed" and changed_known),
+                ("文件删除", missing is None),
+            ]
+            for desc, ok in checks:
+                print(f"{'✅' if ok else '❌'} {desc}")
+            return all(ok for _, ok in checks)
+            
+        except Exception as e:
+            print(f"❌ 配置指纹测试失败: {e}")
+            return False
+    
     def run_all_tests(self):
         """运行所有测试"""
         print("🚀 开始通用任务调度器测试")
@@ -234,6 +1813,27 @@ class SchedulerTester:
             ("任务执行器", self.test_task_executor),
             ("调度引擎", self.test_scheduler_engine),
             ("CRON验证", self.test_cron_validation),
+            ("日志读取", self.test_log_reader),
+            ("执行历史", self.test_execution_history),
+            ("文件事务", self.test_file_transaction),
+            ("重载计划", self.test_reload_planner),
+            ("任务超时", self.test_timeout),
+            ("停止任务", self.test_stop_task),
+            ("资源限制", self.test_resource_limits),
+            ("异步执行器", self.test_async_executor),
+            ("重试调度", self.test_retry_scheduling),
+            ("生命周期事件", self.test_execution_events),
+            ("日志管道", self.test_logging_pipeline),
+            ("任务锁", self.test_task_locks),
+            ("配置事件防抖", self.test_config_debounce),
+            ("输出尾部缓冲", self.test_output_tail),
+            ("任务工作目录", self.test_task_working_directory),
+            ("并发组", self.test_concurrency_groups),
+            ("进程组与资源统计", self.test_process_group),
+            ("增量日志读取", self.test_log_streaming),
+            ("日志轮转", self.test_log_rotation),
+            ("配置原子写入", self.test_atomic_config_writes),
+            ("配置指纹", self.test_config_fingerprint),
         ]
         
         results = []
@@ -270,7 +1870,7 @@ class SchedulerTester:
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='通用任务调度器测试工具')
-    parser.add_argument('--test', choices=['loader', 'executor', 'scheduler', 'cron', 'api', 'all'], 
+    parser.add_argument('--test', choices=['loader', 'executor', 'scheduler', 'cron', 'logs', 'history', 'transaction', 'reload', 'timeout', 'stop', 'limits', 'async', 'retry', 'events', 'pipeline', 'locks', 'debounce', 'tail', 'cwd', 'groups', 'procgroup', 'stream', 'rotation', 'atomic', 'fingerprint', 'api', 'all'], 
                        default='all', help='选择要测试的组件')
     
     args = parser.parse_args()
@@ -284,7 +1884,28 @@ def main():
             'loader': tester.test_task_loader,
             'executor': tester.test_task_executor,
             'scheduler': tester.test_scheduler_engine,
-            'cron': tester.test_cron_validation
+            'cron': tester.test_cron_validation,
+            'logs': tester.test_log_reader,
+            'history': tester.test_execution_history,
+            'transaction': tester.test_file_transaction,
+            'reload': tester.test_reload_planner,
+            'timeout': tester.test_timeout,
+            'stop': tester.test_stop_task,
+            'limits': tester.test_resource_limits,
+            'async': tester.test_async_executor,
+            'retry': tester.test_retry_scheduling,
+            'events': tester.test_execution_events,
+            'pipeline': tester.test_logging_pipeline,
+            'locks': tester.test_task_locks,
+            'debounce': tester.test_config_debounce,
+            'tail': tester.test_output_tail,
+            'cwd': tester.test_task_working_directory,
+            'groups': tester.test_concurrency_groups,
+            'procgroup': tester.test_process_group,
+            'stream': tester.test_log_streaming,
+            'rotation': tester.test_log_rotation,
+            'atomic': tester.test_atomic_config_writes,
+            'fingerprint': tester.test_config_fingerprint,
         }
         
         success = test_map[args.test]()
@@ -29,8 +29,7 @@ function handleApiError(error, context) {
         }
         
         if (StateManager.getNewLogRefreshInterval()) {
-            clearInterval(StateManager.getNewLogRefreshInterval());
-            StateManager.setNewLogRefreshInterval(null);
+            StateManager.clearNewLogRefresh();
             // 更新新版日志刷新按钮和旋转动画状态
             const spinner = document.getElementById('new-log-refresh-spinner');
             const stopBtn = document.getElementById('stop-new-log-refresh-btn');
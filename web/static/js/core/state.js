@@ -9,7 +9,7 @@ let reconnectActive = true;
 
 // 定时器管理
 let logRefreshInterval = null;
-let newLogRefreshInterval = null;
+let newLogRefreshInterval = null;  // 新版日志刷新：EventSource 推送连接，或不支持时的轮询定时器
 let statusRefreshInterval = null;
 let healthCheckInterval = null;
 
@@ -37,6 +37,14 @@ const StateManager = {
     
     getNewLogRefreshInterval: () => newLogRefreshInterval,
     setNewLogRefreshInterval: (value) => { newLogRefreshInterval = value; },
+    clearNewLogRefresh: () => {
+        if (newLogRefreshInterval && typeof newLogRefreshInterval.close === 'function') {
+            newLogRefreshInterval.close();
+        } else if (newLogRefreshInterval) {
+            clearInterval(newLogRefreshInterval);
+        }
+        newLogRefreshInterval = null;
+    },
     
     getStatusRefreshInterval: () => statusRefreshInterval,
     setStatusRefreshInterval: (value) => { statusRefreshInterval = value; },
@@ -66,10 +74,7 @@ const StateManager = {
             clearInterval(logRefreshInterval);
             logRefreshInterval = null;
         }
-        if (newLogRefreshInterval) {
-            clearInterval(newLogRefreshInterval);
-            newLogRefreshInterval = null;
-        }
+        StateManager.clearNewLogRefresh();
         if (statusRefreshInterval) {
             clearInterval(statusRefreshInterval);
             statusRefreshInterval = null;
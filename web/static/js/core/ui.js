@@ -141,14 +141,11 @@ function toggleLogRefresh(isNew, start) {
         if (stopBtn) stopBtn.style.display = 'inline-block';
         if (startBtn) startBtn.style.display = 'none';
     } else {
-        const interval = isNew ? StateManager.getNewLogRefreshInterval() : StateManager.getLogRefreshInterval();
-        if (interval) {
-            clearInterval(interval);
-            if (isNew) {
-                StateManager.setNewLogRefreshInterval(null);
-            } else {
-                StateManager.setLogRefreshInterval(null);
-            }
+        if (isNew) {
+            StateManager.clearNewLogRefresh();
+        } else if (StateManager.getLogRefreshInterval()) {
+            clearInterval(StateManager.getLogRefreshInterval());
+            StateManager.setLogRefreshInterval(null);
         }
         if (spinner) spinner.style.display = 'none';
         if (stopBtn) stopBtn.style.display = 'none';
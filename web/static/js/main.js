@@ -40,6 +40,7 @@ window.stopNewLogRefresh = LogsManager.stopNewLogRefresh;
 window.startNewLogRefresh = LogsManager.startNewLogRefresh;
 
 window.clearNewLog = LogsManager.clearNewLog;
+window.viewExecutionLog = LogsManager.viewExecutionLog;
 
 window.validateCron = Scheduler.validateCron;
 window.stopReconnect = APIManager.stopReconnect;
@@ -166,6 +166,15 @@ const LegacyLogs = {
 
 // 新版本日志功能
 const NewLogs = {
+    // 日志视图中最多保留的行数，超出后移除最早的行
+    MAX_RENDERED_LINES: 5000,
+    // 下一次增量读取的游标、已显示的最后一行行号，以及该行是否尚未写完
+    cursor: null,
+    lastLine: 0,
+    lastLinePartial: false,
+    // 当前查看的执行ID，为空时显示全部输出并跟随日志末尾
+    executionId: null,
+
     // 查看新版日志
     async viewNewLogs(taskId, taskName) {
         if (!Utils.isValidTaskId(taskId)) {
@@ -173,7 +182,7 @@ const NewLogs = {
             return;
         }
         
-        // 如果是同一个任务且定时器已在运行，则不操作
+        // 如果是同一个任务且刷新已在运行，则不操作
         if (StateManager.getCurrentNewTaskId() === taskId && StateManager.getNewLogRefreshInterval()) {
             return;
         }
@@ -184,35 +193,130 @@ const NewLogs = {
             newLogTitle.textContent = `任务日志: ${taskName}`;
         }
         
-        // 停止旧的定时器
-        if (StateManager.getNewLogRefreshInterval()) {
-            clearInterval(StateManager.getNewLogRefreshInterval());
-            StateManager.setNewLogRefreshInterval(null);
-        }
+        // 停止旧的推送连接或定时器
+        StateManager.clearNewLogRefresh();
 
         // 重置当前日志文件路径
         StateManager.setCurrentLogFile(null);
+        this.executionId = null;
 
         // 立即加载一次日志
         await this.loadNewTaskLogs(taskId, true);
+        this.loadNewLogExecutions(taskId);
         
-        // 只有在服务器连接正常时才启动定时器
+        // 只有在服务器连接正常时才订阅后续日志
         if (StateManager.getServerConnected()) {
-            // 启动新的定时器
+            this.startNewLogFollow(taskId);
+            UIManager.toggleLogRefresh(true, true);
+        } else {
+            // 服务器已断开连接，不订阅日志，确保旋转动画不显示
+            UIManager.toggleLogRefresh(true, false);
+        }
+    },
+
+    // 订阅新增日志：优先使用 SSE 推送，不支持时退化为按游标增量轮询
+    startNewLogFollow(taskId) {
+        StateManager.clearNewLogRefresh();
+
+        if (!window.EventSource) {
             const interval = setInterval(() => {
                 if (StateManager.getCurrentNewTaskId() === taskId) {
                     this.loadNewTaskLogs(taskId, false);
                 }
             }, 2000);
             StateManager.setNewLogRefreshInterval(interval);
-            UIManager.toggleLogRefresh(true, true);
-        } else {
-            // 服务器已断开连接，不启动定时器，确保旋转动画不显示
-            UIManager.toggleLogRefresh(true, false);
+            return;
+        }
+
+        const cursor = this.cursor ? `?cursor=${encodeURIComponent(this.cursor)}` : '';
+        const source = new EventSource(`${StateManager.getNewApiBaseUrl()}/api/scheduler/tasks/${taskId}/logs/stream${cursor}`);
+        source.addEventListener('lines', (event) => {
+            if (StateManager.getCurrentNewTaskId() !== taskId) return;
+            this.cursor = event.lastEventId;
+            this.appendNewLogs(JSON.parse(event.data).lines);
+        });
+        source.addEventListener('reset', (event) => {
+            if (StateManager.getCurrentNewTaskId() !== taskId) return;
+            this.cursor = event.lastEventId;
+            this.renderNewLogs(JSON.parse(event.data).lines);
+        });
+        StateManager.setNewLogRefreshInterval(source);
+    },
+
+    // 加载日志中记录的执行列表，用于跳转到某次执行的输出
+    async loadNewLogExecutions(taskId) {
+        const select = document.getElementById('newLogExecutionSelect');
+        if (!select) return;
+
+        try {
+            const result = await APIManager.fetchApi(`${StateManager.getNewApiBaseUrl()}/api/scheduler/tasks/${taskId}/logs/executions?limit=50`, {}, `loadNewLogExecutions for ${taskId}`);
+            if (StateManager.getCurrentNewTaskId() !== taskId) return;
+
+            select.innerHTML = '<option value="">全部输出</option>';
+            (result.data || []).forEach(execution => {
+                const option = document.createElement('option');
+                option.value = execution.execution_id;
+                option.disabled = !execution.available;
+                option.textContent = `${Utils.formatTimestamp(execution.start_time || '')} ${execution.status}${execution.available ? '' : ' (已清理)'}`;
+                select.appendChild(option);
+            });
+            select.value = this.executionId || '';
+        } catch (error) {
+            console.warn('加载日志执行列表失败:', error);
+        }
+    },
+
+    // 查看某次执行的输出：从其起始游标开始读取到结束游标；选择“全部输出”时恢复跟随日志末尾
+    async viewExecutionLog(executionId) {
+        const taskId = StateManager.getCurrentNewTaskId();
+        if (!taskId) return;
+
+        StateManager.clearNewLogRefresh();
+        this.executionId = executionId || null;
+        this.cursor = null;
+
+        if (!executionId) {
+            await this.loadNewTaskLogs(taskId, true);
+            if (StateManager.getServerConnected()) {
+                this.startNewLogFollow(taskId);
+                UIManager.toggleLogRefresh(true, true);
+            }
+            return;
+        }
+
+        UIManager.toggleLogRefresh(true, false);
+        const logViewer = document.getElementById('newLogViewer');
+        if (!logViewer) return;
+        logViewer.innerHTML = '<div class="text-center"><div class="spinner"></div><p>加载中...</p></div>';
+
+        try {
+            let cursor = null;
+            let loaded = 0;
+            let result;
+            do {
+                const query = `execution_id=${encodeURIComponent(executionId)}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`;
+                result = await APIManager.fetchApi(`${StateManager.getNewApiBaseUrl()}/api/scheduler/tasks/${taskId}/logs?${query}`, {}, `viewExecutionLog for ${executionId}`);
+                if (StateManager.getCurrentNewTaskId() !== taskId || this.executionId !== executionId) return;
+
+                if (!result.available) {
+                    logViewer.innerHTML = '<div class="log-placeholder"><p>该次执行的日志已被轮转清理</p></div>';
+                    return;
+                }
+                if (loaded === 0) {
+                    this.renderNewLogs(result.data);
+                } else {
+                    this.appendNewLogs(result.data);
+                }
+                loaded += result.data.length;
+                cursor = result.next_cursor;
+            } while (result.has_more && loaded < this.MAX_RENDERED_LINES);
+            logViewer.scrollTop = 0;
+        } catch (error) {
+            logViewer.innerHTML = '<div class="log-placeholder"><p>加载日志失败</p></div>';
         }
     },
 
-    // 加载新版任务日志
+    // 加载新版任务日志：首次加载读取末尾的日志，之后只按游标读取新增的行
     async loadNewTaskLogs(taskId, showLoadingIndicator = true) {
         if (!Utils.isValidTaskId(taskId)) {
             console.warn('无效的任务ID:', taskId);
@@ -222,12 +326,14 @@ const NewLogs = {
         const logViewer = document.getElementById('newLogViewer');
         if (!logViewer) return;
         
+        const incremental = !showLoadingIndicator && this.cursor;
         if (showLoadingIndicator) {
             logViewer.innerHTML = '<div class="text-center"><div class="spinner"></div><p>加载中...</p></div>';
         }
         
         try {
-            const result = await APIManager.fetchApi(`${StateManager.getNewApiBaseUrl()}/api/scheduler/tasks/${taskId}/logs`, {}, `loadNewTaskLogs for ${taskId}`);
+            const query = incremental ? `cursor=${encodeURIComponent(this.cursor)}` : 'offset=-100&limit=100';
+            const result = await APIManager.fetchApi(`${StateManager.getNewApiBaseUrl()}/api/scheduler/tasks/${taskId}/logs?${query}`, {}, `loadNewTaskLogs for ${taskId}`);
             if (showLoadingIndicator) {
                 UIManager.hideLoading('newLogViewer');
             }
@@ -235,10 +341,15 @@ const NewLogs = {
             // 保存当前日志文件路径，用于后续刷新
             if (result.log_file) {
                 StateManager.setCurrentLogFile(result.log_file);
-                console.log(`已更新日志文件路径: ${result.log_file}`);
             }
             
-            this.renderNewLogs(result.data);
+            this.cursor = result.next_cursor || null;
+            if (incremental && !result.reset) {
+                this.appendNewLogs(result.data);
+            } else {
+                this.renderNewLogs(result.data);
+                this.lastLinePartial = !!result.partial;
+            }
         } catch (error) {
             if (showLoadingIndicator) {
                 UIManager.hideLoading('newLogViewer');
@@ -249,27 +360,68 @@ const NewLogs = {
         }
     },
 
-    // 渲染新版日志
+    // 创建单行日志元素
+    createLogLine(log) {
+        const line = document.createElement('div');
+        line.className = `log-line ${log.content.includes('ERROR') ? 'error' : log.content.includes('WARNING') ? 'warning' : ''}`;
+        line.dataset.line = log.line;
+        line.innerHTML = `
+                <span class="log-line-number">${log.line}</span>
+                <span class="log-line-content">${Utils.escapeHtml(log.content)}</span>
+            `;
+        return line;
+    },
+
+    // 渲染新版日志（整体替换）
     renderNewLogs(logs) {
         const logViewer = document.getElementById('newLogViewer');
         if (!logViewer) return;
         
+        this.lastLine = 0;
+        this.lastLinePartial = false;
         if (!logs || logs.length === 0) {
             logViewer.innerHTML = '<div class="log-placeholder">暂无日志</div>';
             return;
         }
 
-        const html = logs.map(log => `
-            <div class="log-line ${log.content.includes('ERROR') ? 'error' : log.content.includes('WARNING') ? 'warning' : ''}">
-                <span class="log-line-number">${log.line}</span>
-                <span class="log-line-content">${Utils.escapeHtml(log.content)}</span>
-            </div>
-        `).join('');
-
-        logViewer.innerHTML = html;
+        logViewer.innerHTML = '';
+        this.appendNewLogs(logs);
         logViewer.scrollTop = logViewer.scrollHeight;
     },
 
+    // 追加新版日志，只向视图末尾添加新行，不重建已有内容
+    appendNewLogs(logs) {
+        const logViewer = document.getElementById('newLogViewer');
+        if (!logViewer || !logs || logs.length === 0) return;
+        
+        const placeholder = logViewer.querySelector('.log-placeholder');
+        if (placeholder) {
+            logViewer.innerHTML = '';
+        }
+        
+        const atBottom = logViewer.scrollHeight - logViewer.scrollTop - logViewer.clientHeight < 20;
+        const fragment = document.createDocumentFragment();
+        logs.forEach(log => {
+            // 首次加载时末尾未写完的行，在写完后会以相同行号再次返回
+            if (this.lastLinePartial && log.line === this.lastLine && logViewer.lastElementChild) {
+                logViewer.lastElementChild.replaceWith(this.createLogLine(log));
+                this.lastLinePartial = false;
+                return;
+            }
+            this.lastLinePartial = false;
+            fragment.appendChild(this.createLogLine(log));
+            this.lastLine = log.line;
+        });
+        logViewer.appendChild(fragment);
+        
+        while (logViewer.childElementCount > this.MAX_RENDERED_LINES) {
+            logViewer.firstElementChild.remove();
+        }
+        if (atBottom) {
+            logViewer.scrollTop = logViewer.scrollHeight;
+        }
+    },
+
     // 刷新新版日志
     refreshNewLog() {
         const currentNewTaskId = StateManager.getCurrentNewTaskId();
@@ -318,18 +470,13 @@ const NewLogs = {
                     newLogViewer.innerHTML = '<div class="log-placeholder"><p>日志已清空，等待新日志...</p></div>';
                 }
                 
-                // 重新启动日志刷新
-                if (StateManager.getNewLogRefreshInterval()) {
-                    clearInterval(StateManager.getNewLogRefreshInterval());
-                }
-                
-                const interval = setInterval(() => {
-                    const current = StateManager.getCurrentNewTaskId();
-                    if (current) {
-                        this.loadNewTaskLogs(current, false);
-                    }
-                }, 2000);
-                StateManager.setNewLogRefreshInterval(interval);
+                // 从清空后的日志开头重新订阅
+                this.executionId = null;
+                this.loadNewLogExecutions(currentNewTaskId);
+                this.cursor = null;
+                this.lastLine = 0;
+                this.lastLinePartial = false;
+                this.startNewLogFollow(currentNewTaskId);
             } else {
                 UIManager.showNewMessage(`清空日志失败: ${result.message}`, 'error');
                 this.loadNewTaskLogs(currentNewTaskId); // 重新加载日志
@@ -369,6 +516,8 @@ window.LogsManager = {
     viewNewLogs: NewLogs.viewNewLogs.bind(NewLogs),
     loadNewTaskLogs: NewLogs.loadNewTaskLogs.bind(NewLogs),
     renderNewLogs: NewLogs.renderNewLogs.bind(NewLogs),
+    appendNewLogs: NewLogs.appendNewLogs.bind(NewLogs),
+    viewExecutionLog: NewLogs.viewExecutionLog.bind(NewLogs),
     refreshNewLog: NewLogs.refreshNewLog.bind(NewLogs),
     clearNewLog: NewLogs.clearNewLog.bind(NewLogs),
     startNewLogRefresh: NewLogs.startNewLogRefresh.bind(NewLogs),
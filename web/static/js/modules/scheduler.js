@@ -281,8 +281,7 @@ const Scheduler = {
                 if (StateManager.getCurrentNewTaskId() === taskId) {
                     // 清理定时器
                     if (StateManager.getNewLogRefreshInterval()) {
-                        clearInterval(StateManager.getNewLogRefreshInterval());
-                        StateManager.setNewLogRefreshInterval(null);
+                        StateManager.clearNewLogRefresh();
                     }
                     const newLogViewer = document.getElementById('newLogViewer');
                     if (newLogViewer) {